@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up.
+from django.conf import settings  # noqa: E402
+from core.stream import stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """Serve the change stream, hand everything else to Django"""
+    if scope['type'] == 'http' and scope['path'] == settings.STREAM_PATH:
+        return await stream(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'djoser',
@@ -46,18 +47,27 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'user',
     'recipe',
-    'event'
+    'event',
+    'dashboard',
 ]
 
+# The session, CSRF, authentication, messages and clickjacking middleware
+# are skipped on API_PATH_PREFIX, see core.middleware.BrowserOnlyMixin and
+# `python manage.py benchmark_middleware`.
+API_PATH_PREFIX = '/api/'
+
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
+    'core.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.CsrfViewMiddleware',
+    'core.middleware.AuthenticationMiddleware',
+    'core.middleware.MessageMiddleware',
+    'core.middleware.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -94,12 +104,88 @@ DATABASES = {
     }
 }
 
+# Read replicas, as a comma separated list of hosts sharing the primary's
+# name and credentials. Safe API requests read from them, except for a
+# user's requests within REPLICA_PIN_SECONDS of one of their writes.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))
+):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
+
+# Request profiling, see core.profiling
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_HEADER = 'X-Profile'
+PROFILE_TOKEN_MAX_AGE = 3600
+PROFILE_INTERVAL = 0.005
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/vol/web/profiles')
+
+# Queries slower than this many milliseconds are logged with their plan,
+# see core.slow_queries. 0 disables the slow query log.
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+
+# Cache
+# Rate limits and replica pins must be shared by every worker process,
+# REDIS_URL points them to Redis. Without it each process keeps its own
+# in-memory cache, which is only suitable for development and tests.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Change stream
+# Server-sent events served by app.asgi, see core.stream. Seconds between
+# keepalive comments, and changes kept for a slow client before telling it
+# to fetch its data again.
+STREAM_PATH = '/api/stream/'
+STREAM_KEEPALIVE = int(os.environ.get('STREAM_KEEPALIVE', 15))
+STREAM_QUEUE_SIZE = 100
+STREAM_REDIS_URL = os.environ.get('REDIS_URL')
+
 # Email Configuration
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = 'mailhog'  # Adresse du serveur MailHog
 EMAIL_PORT = 1025  # Port de MailHog
 EMAIL_USE_TLS = False  # MailHog ne nécessite généralement pas TLS
 
+# Background jobs
+# Emails and other slow side effects are queued in the database and run by
+# `python manage.py run_worker`. TASKS_EAGER=1 runs them in the request.
+TASKS_EAGER = bool(int(os.environ.get('TASKS_EAGER', 0)))
+TASK_BATCH_SIZE = int(os.environ.get('TASK_BATCH_SIZE', 100))
+# Seconds before the first retry, doubled on each attempt.
+TASK_RETRY_DELAY = int(os.environ.get('TASK_RETRY_DELAY', 30))
+# Seconds after which a running job is considered abandoned.
+TASK_TIMEOUT = int(os.environ.get('TASK_TIMEOUT', 600))
+# Rows deleted per transaction when removing an account's data.
+USER_DELETION_BATCH_SIZE = int(os.environ.get('USER_DELETION_BATCH_SIZE', 500))
+
+# Dashboard
+# Number of recent recipes and upcoming events on the dashboard, and for
+# how many seconds it is cached. Changes invalidate it right away, the
+# timeout only drops events that have started.
+DASHBOARD_RECIPES = 10
+DASHBOARD_EVENTS = 20
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 300))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -140,6 +226,46 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Uploads are stored once per distinct content, unreferenced files are
+# removed by `python manage.py collect_media`. They are kept in MEDIA_ROOT,
+# or in the S3 compatible bucket S3_BUCKET when it is set.
+DEFAULT_FILE_STORAGE = os.environ.get(
+    'DEFAULT_FILE_STORAGE',
+    'core.storage.S3Storage' if os.environ.get('S3_BUCKET')
+    else 'core.storage.ContentAddressedStorage',
+)
+
+# Object store, see core.s3. Presigned URLs are signed for
+# S3_PRESIGN_ENDPOINT_URL, the address clients reach the store at, when it
+# differs from the one of the API.
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL', 'https://s3.amazonaws.com')
+S3_PRESIGN_ENDPOINT_URL = os.environ.get('S3_PRESIGN_ENDPOINT_URL')
+S3_BUCKET = os.environ.get('S3_BUCKET')
+S3_REGION = os.environ.get('S3_REGION', 'us-east-1')
+S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID')
+S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY')
+S3_PUBLIC_URL = os.environ.get('S3_PUBLIC_URL')
+S3_URL_EXPIRY = 3600
+S3_TIMEOUT = 30
+
+# Recipe images uploaded straight to the object store, see
+# RecipeViewSet.image_upload.
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+IMAGE_UPLOAD_EXPIRY = 900
+
+# Minimum estimated Jaccard similarity of the title trigrams and
+# ingredients of two recipes reported as duplicates, see recipe.dedup.
+RECIPE_DUPLICATE_THRESHOLD = 0.7
+
+# How media files are sent, see core.media: 'direct', 'x-accel-redirect'
+# (nginx, with an internal location at MEDIA_ACCEL_PREFIX aliased to
+# MEDIA_ROOT) or 'x-sendfile'.
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'direct')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Pregenerated OpenAPI schema, see `python manage.py generate_schema`
+SCHEMA_ROOT = os.environ.get('SCHEMA_ROOT', BASE_DIR / 'schema')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -158,6 +284,16 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'core.throttling.AnonRateThrottle',
+        'core.throttling.UserRateThrottle',
+        'core.throttling.ScopedRateThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.environ.get('THROTTLE_ANON_RATE', '60/min'),
+        'user': os.environ.get('THROTTLE_USER_RATE', '600/min'),
+        'auth': os.environ.get('THROTTLE_AUTH_RATE', '20/min'),
+    },
 }
 
 # JWT Settings
@@ -166,9 +302,24 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
-    "UPDATE_LAST_LOGIN": True,
+    # last_login is written in batches by user.logins instead.
+    "UPDATE_LAST_LOGIN": False,
 }
 
+# Logins skip the last_login write while it is younger than
+# LAST_LOGIN_WINDOW seconds, other writes are buffered for up to
+# LAST_LOGIN_FLUSH_INTERVAL seconds or LAST_LOGIN_BATCH_SIZE users.
+LAST_LOGIN_WINDOW = int(os.environ.get('LAST_LOGIN_WINDOW', 300))
+LAST_LOGIN_FLUSH_INTERVAL = int(os.environ.get('LAST_LOGIN_FLUSH_INTERVAL', 10))
+LAST_LOGIN_BATCH_SIZE = 500
+
+# Revoked refresh tokens are checked against a Bloom filter of the
+# RevokedToken table sized for this many tokens, see user.revocation. It
+# is rebuilt, and expired tokens purged, every REVOCATION_REBUILD_SECONDS.
+REVOCATION_BLOOM_CAPACITY = 100000
+REVOCATION_BLOOM_ERROR_RATE = 0.001
+REVOCATION_REBUILD_SECONDS = 3600
+
 # Djoser Settings
 DJOSER = {
     'LOGIN_FIELD': 'email',
@@ -200,5 +351,7 @@ DJOSER = {
 # a supprimer apres la phase de test
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
+    # Refreshed tokens are revoked, see user.revocation.
+    'ROTATE_REFRESH_TOKENS': True,
     # ...
 }
@@ -14,21 +14,22 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from drf_spectacular.views import (
-    SpectacularAPIView,
     SpectacularRedocView,
     SpectacularSwaggerView
 )
 
 
 from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls import static
+from django.urls import path, re_path, include
 from django.conf import settings
 
+from core import media
+from core.schema import SchemaView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema/',
-         SpectacularAPIView.as_view(),
+         SchemaView.as_view(),
          name='api-schema'),
     # Optional UI:
     path('api/docs/',
@@ -40,12 +41,10 @@ urlpatterns = [
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls')),
     path('api/event/', include('event.urls')),
+    path('api/dashboard/', include('dashboard.urls')),
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.*)$',
+            media.serve,
+            name='media'),
 
     # ajoutez cette ligne
 ]
-
-if settings.DEBUG:
-    urlpatterns += static.static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT
-    )
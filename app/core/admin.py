@@ -2,10 +2,62 @@
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from core import models
 
+# Below this many rows, counting exactly is cheap enough.
+ESTIMATE_THRESHOLD = 100000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using the planner's row estimate for unfiltered lists.
+
+    COUNT(*) scans the whole table, the estimate kept in pg_class by
+    ANALYZE is read instantly. Filtered lists are still counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if not query.where:
+            estimate = self.estimate(self.object_list)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def estimate(queryset):
+        """Return the estimated row count of the table, None if unknown"""
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            # Partitioned tables hold no rows, add up their partitions.
+            cursor.execute(
+                'SELECT c.reltuples FROM pg_class c '
+                'WHERE (c.oid = %s::regclass AND c.relkind <> %s) '
+                'OR c.oid IN (SELECT inhrelid FROM pg_inherits '
+                'WHERE inhparent = %s::regclass)',
+                [queryset.model._meta.db_table, 'p',
+                 queryset.model._meta.db_table],
+            )
+            rows = [row[0] for row in cursor.fetchall()]
+        # reltuples is -1 for tables never analyzed.
+        if not rows or any(tuples < 0 for tuples in rows):
+            return None
+        return int(sum(rows))
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Admin for tables with millions of rows"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-id',)
+
 
 class UserModelAdmin(BaseUserAdmin):
     # The fields to be used in displaying the User model.
@@ -31,8 +83,52 @@ class UserModelAdmin(BaseUserAdmin):
     filter_horizontal = ()
 
 
+class RecipeAdmin(LargeTableAdmin):
+    list_display = ('id', 'title', 'user', 'time_minutes', 'price')
+    list_select_related = ('user',)
+    # icontains lookups, backed by the upper(title) trigram index.
+    search_fields = ('title',)
+    raw_id_fields = ('user', 'tags', 'ingredients')
+
+
+class TagAdmin(LargeTableAdmin):
+    list_display = ('id', 'name', 'user')
+    list_select_related = ('user',)
+    search_fields = ('name',)
+    raw_id_fields = ('user',)
+
+
+class IngredientAdmin(TagAdmin):
+    pass
+
+
+class EventAdmin(LargeTableAdmin):
+    list_display = ('id', 'title', 'user', 'start_time', 'end_time')
+    list_select_related = ('user',)
+    # icontains lookups, backed by the upper(title) trigram index.
+    search_fields = ('title',)
+    raw_id_fields = ('user', 'recipe')
+    date_hierarchy = 'start_time'
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'task', 'status', 'attempts', 'run_at', 'progress',
+    )
+    list_filter = ('status',)
+    ordering = ('-id',)
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('fingerprint', 'calls', 'total_ms', 'max_ms', 'sql')
+    ordering = ('-total_ms',)
+    search_fields = ('sql',)
+
+
 admin.site.register(models.User, UserModelAdmin)
-admin.site.register(models.Recipe)
-admin.site.register(models.Tag)
-admin.site.register(models.Ingredient)
-admin.site.register(models.Event)
+admin.site.register(models.Recipe, RecipeAdmin)
+admin.site.register(models.Tag, TagAdmin)
+admin.site.register(models.Ingredient, IngredientAdmin)
+admin.site.register(models.Event, EventAdmin)
+admin.site.register(models.Job, JobAdmin)
+admin.site.register(models.SlowQuery, SlowQueryAdmin)
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_save
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core import stream
+        from core.changes import data_changed, model_changed
+        from core.models import Event, Ingredient, Recipe, Tag
+
+        for model in (Recipe, Tag, Ingredient, Event):
+            # No post_delete, it turns off fast deletes, see core.changes.
+            post_save.connect(model_changed, sender=model)
+        for through in (Recipe.tags.through, Recipe.ingredients.through):
+            m2m_changed.connect(model_changed, sender=through)
+        data_changed.connect(stream.publish_change)
@@ -0,0 +1,64 @@
+"""Per action query and time budgets of the API viewsets.
+
+Viewsets using QueryBudgetMixin declare `query_budgets`, a mapping from
+action to Budget. Every request counts its queries, a request going over
+the budget of its action is logged as a warning carrying the counts as
+extra fields for metrics. Tests assert the budgets with
+core.testing.QueryBudgetTestMixin.
+"""
+
+import logging
+import time
+from collections import namedtuple
+from contextlib import ExitStack
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of queries, and optionally of milliseconds, per request.
+Budget = namedtuple('Budget', ['queries', 'ms'], defaults=[None])
+
+
+class QueryCounter:
+    """Database execute wrapper counting queries"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """Report requests exceeding the budget of their action"""
+    query_budgets = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = super().dispatch(request, *args, **kwargs)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        budget = self.query_budgets.get(getattr(self, 'action', None))
+        if budget is not None and (
+            counter.count > budget.queries
+            or (budget.ms is not None and duration_ms > budget.ms)
+        ):
+            view = f'{type(self).__name__}.{self.action}'
+            logger.warning(
+                'Budget exceeded by %s: %d queries in %.0f ms, budget %s',
+                view, counter.count, duration_ms, budget,
+                extra={
+                    'view': view,
+                    'queries': counter.count,
+                    'duration_ms': duration_ms,
+                    'query_budget': budget.queries,
+                    'time_budget_ms': budget.ms,
+                },
+            )
+        return response
@@ -0,0 +1,46 @@
+"""Notifications of changes to user owned data.
+
+Saves and M2M changes of recipes, tags, ingredients and events send
+data_changed once their transaction commits. Bulk operations, which send
+no model signals, call notify() themselves. Receivers get the model as
+sender and the owner's user_id, the action and the changed ids.
+
+Deletes are notified by the code deleting, NotifyDeleteMixin for the
+viewsets: a post_delete receiver would make Django load and signal every
+cascaded row instead of deleting them with one query. The rows cascading
+from a deleted object, such as the events of a recipe, are not notified.
+"""
+
+from django.db import transaction
+from django.dispatch import Signal
+
+data_changed = Signal()
+
+
+def notify(model, user_id, action, ids=()):
+    """Send data_changed for objects of model once the changes commit"""
+    ids = list(ids)
+    transaction.on_commit(lambda: data_changed.send(
+        sender=model, user_id=user_id, action=action, ids=ids,
+    ))
+
+
+def model_changed(sender, instance, created=None, action=None, **kwargs):
+    """Notify a saved or relinked object"""
+    if action is not None:
+        # m2m_changed, where instance is either side of the relation.
+        if not action.startswith('post_'):
+            return
+        notify(type(instance), instance.user_id, 'updated', [instance.pk])
+    else:
+        notify(sender, instance.user_id,
+               'created' if created else 'updated', [instance.pk])
+
+
+class NotifyDeleteMixin:
+    """Notify the objects deleted by a viewset"""
+
+    def perform_destroy(self, instance):
+        model, user_id, pk = type(instance), instance.user_id, instance.pk
+        super().perform_destroy(instance)
+        notify(model, user_id, 'deleted', [pk])
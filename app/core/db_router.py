@@ -0,0 +1,43 @@
+"""Database router sending safe API reads to read replicas"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Set by ReplicaRoutingMiddleware for the duration of a safe request.
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def read_from_replica(enabled):
+    """Route reads of the current context to replicas, return a reset token"""
+    return _read_from_replica.set(enabled)
+
+
+def reset_read_from_replica(token):
+    """Restore the routing in place before read_from_replica was called"""
+    _read_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Send reads to a random replica when the current request allows it.
+
+    Writes, migrations and reads outside a routed request always use the
+    primary database.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and _read_from_replica.get():
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
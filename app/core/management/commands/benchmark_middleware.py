@@ -0,0 +1,102 @@
+""" Django command to benchmark the middleware of API requests"""
+import statistics
+import time
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import RequestFactory, override_settings
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+
+# Stock Django middleware replaced by the BrowserOnlyMixin subclasses.
+STOCK = {
+    'core.middleware.SessionMiddleware':
+        'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.CsrfViewMiddleware':
+        'django.middleware.csrf.CsrfViewMiddleware',
+    'core.middleware.AuthenticationMiddleware':
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.MessageMiddleware':
+        'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.XFrameOptionsMiddleware':
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+}
+
+
+@csrf_exempt
+def ping(request):
+    """Stand in for an API view, exempted from CSRF like DRF views"""
+    return JsonResponse({})
+
+
+# Requests are resolved here so the view costs next to nothing.
+urlpatterns = [
+    path('api/ping/', ping),
+]
+
+
+class Command(BaseCommand):
+    """Time a trivial API view behind the stock and lean middleware"""
+    help = 'Benchmark the per request overhead of the middleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000,
+                            help='Number of requests per run')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of runs per middleware list')
+
+    def handle(self, *args, **options):
+        stock = [STOCK.get(name, name) for name in settings.MIDDLEWARE]
+        results = {}
+        for name, middleware in (
+            ('stock', stock),
+            ('lean', settings.MIDDLEWARE),
+        ):
+            results[name] = self._time(
+                name, middleware, options['requests'], options['repeat'])
+
+        saved = results['stock'] - results['lean']
+        self.stdout.write(
+            f'{"saved":<8} {saved:>8.1f} us/request '
+            f'({saved / results["stock"]:.0%})'
+        )
+
+    def _handler(self, middleware):
+        """Return a handler running the middleware"""
+        # The profiler and the slow query log are left out, their cost
+        # depends on sampling and the database.
+        with override_settings(MIDDLEWARE=[
+            name for name in middleware
+            if name not in ('core.profiling.ProfilingMiddleware',
+                            'core.slow_queries.SlowQueryMiddleware')
+        ]):
+            handler = BaseHandler()
+            handler.load_middleware()
+        return handler
+
+    def _time(self, name, middleware, count, repeat):
+        """Print and return the median microseconds per request"""
+        handler = self._handler(middleware)
+        factory = RequestFactory()
+        environment = override_settings(
+            ALLOWED_HOSTS=['testserver'], DEBUG=False)
+        environment.enable()
+        durations = []
+        for _ in range(repeat):
+            requests = []
+            for _ in range(count):
+                request = factory.get(
+                    '/api/ping/', HTTP_AUTHORIZATION='Bearer token')
+                request.urlconf = __name__
+                requests.append(request)
+            start = time.perf_counter()
+            for request in requests:
+                handler.get_response(request)
+            durations.append(
+                (time.perf_counter() - start) * 1e6 / count)
+        environment.disable()
+        median = statistics.median(durations)
+        self.stdout.write(f'{name:<8} {median:>8.1f} us/request')
+        return median
@@ -0,0 +1,125 @@
+""" Django command to benchmark the recipe list filters"""
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.views import RecipeViewSet
+
+
+class Command(BaseCommand):
+    """Seed a large dataset in a rolled back transaction and time filters"""
+    help = 'Benchmark the recipe filters on a generated dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=20000,
+                            help='Number of recipes to generate')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of runs per query')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self._seed(options['recipes'])
+            tag_ids = list(
+                Tag.objects.filter(user=user).values_list('id', flat=True)
+            )[:2]
+            ingredient_ids = list(
+                Ingredient.objects.filter(user=user).values_list(
+                    'id', flat=True)
+            )[:1]
+            base = Recipe.objects.filter(user=user)
+            view = RecipeViewSet()
+            related = view._filter_related
+
+            queries = {
+                'join + distinct (any)': related(
+                    related(base, 'tags', tag_ids, False),
+                    'ingredients', ingredient_ids, False,
+                ),
+                'id in subquery (any)': base.filter(
+                    id__in=Recipe.tags.through.objects.filter(
+                        tag_id__in=tag_ids).values('recipe_id'),
+                ).filter(
+                    id__in=Recipe.ingredients.through.objects.filter(
+                        ingredient_id__in=ingredient_ids,
+                    ).values('recipe_id'),
+                ),
+                'exists (any)': base.filter(
+                    Exists(Recipe.tags.through.objects.filter(
+                        recipe_id=OuterRef('pk'), tag_id__in=tag_ids)),
+                ).filter(
+                    Exists(Recipe.ingredients.through.objects.filter(
+                        recipe_id=OuterRef('pk'),
+                        ingredient_id__in=ingredient_ids)),
+                ),
+                'group by having (all)': related(
+                    related(base, 'tags', tag_ids, True),
+                    'ingredients', ingredient_ids, True,
+                ),
+                'time and price range': base.filter(
+                    time_minutes__lte=30,
+                    price__gte=Decimal('5.00'),
+                    price__lte=Decimal('10.00'),
+                ),
+            }
+            for name, queryset in queries.items():
+                self._time(name, queryset.order_by('-id'), options['repeat'])
+
+            transaction.set_rollback(True)
+
+    def _seed(self, count):
+        """Create a user owning count randomly tagged recipes"""
+        user = get_user_model().objects.create_user(
+            email='benchmark@example.com',
+            name='benchmark',
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(user=user, name=f'Tag {i}') for i in range(30)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=f'Ingredient {i}') for i in range(80)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                user=user,
+                title=f'Recipe {i}',
+                time_minutes=random.randint(5, 120),
+                price=Decimal(random.randint(100, 2500)) / 100,
+            )
+            for i in range(count)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe in recipes
+            for tag in random.sample(tags, random.randint(1, 4))
+        )
+        Recipe.ingredients.through.objects.bulk_create(
+            Recipe.ingredients.through(
+                recipe_id=recipe.id, ingredient_id=ingredient.id)
+            for recipe in recipes
+            for ingredient in random.sample(ingredients, random.randint(3, 8))
+        )
+        with connection.cursor() as cursor:
+            for model in (Recipe, Recipe.tags.through,
+                          Recipe.ingredients.through):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        self.stdout.write(f'Seeded {count} recipes')
+        return user
+
+    def _time(self, name, queryset, repeat):
+        """Run the query repeat times and print the median duration"""
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = len(queryset.values_list('id', flat=True))
+            durations.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(
+            f'{name:<24} {rows:>7} rows '
+            f'{statistics.median(durations):>8.1f} ms'
+        )
@@ -0,0 +1,31 @@
+""" Django command deleting unreferenced media files"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core import storage
+
+
+class Command(BaseCommand):
+    """Delete uploaded files no longer referenced by any row"""
+    help = 'Delete unreferenced uploaded files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default='uploads',
+                            help='Storage directory to clean')
+        parser.add_argument('--grace-hours', type=int, default=24,
+                            help='Keep files younger than this')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List the files without deleting them')
+
+    def handle(self, *args, **options):
+        deleted, size = storage.collect_garbage(
+            options['directory'],
+            grace=timedelta(hours=options['grace_hours']),
+            dry_run=options['dry_run'],
+        )
+        for name in deleted:
+            self.stdout.write(name)
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(deleted)} files ({size} bytes)'))
@@ -0,0 +1,62 @@
+""" Django command merging the request profiles into a flamegraph input"""
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    """Merge profiles written by the profiling middleware"""
+    help = 'Merge request profiles into folded stacks for flamegraphs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='',
+                            help='Only merge requests under this path')
+        parser.add_argument('--output',
+                            help='File receiving the merged folded stacks')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete the merged profiles')
+        parser.add_argument('--token', action='store_true',
+                            help='Print a header value enabling profiling')
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(
+                f'{settings.PROFILE_HEADER}: {profiling.make_token()}')
+            return
+
+        stacks = Counter()
+        queries = Counter()
+        merged = []
+        for summary_path in sorted(Path(settings.PROFILE_DIR).glob('*.json')):
+            summary = json.loads(summary_path.read_text())
+            if not summary['path'].startswith(options['path']):
+                continue
+            folded_path = summary_path.with_suffix('.folded')
+            for line in folded_path.read_text().splitlines():
+                stack, _, count = line.rpartition(' ')
+                stacks[stack] += int(count)
+            for query in summary['queries']:
+                queries[query['sql']] += query['duration_ms']
+            merged.append((summary_path, folded_path, summary))
+
+        lines = [f'{stack} {count}' for stack, count in stacks.most_common()]
+        if options['output']:
+            Path(options['output']).write_text(''.join(
+                f'{line}\n' for line in lines))
+        else:
+            for line in lines:
+                self.stdout.write(line)
+
+        self.stderr.write(f'Merged {len(merged)} profiles')
+        for sql, total in queries.most_common(10):
+            self.stderr.write(f'{total:10.1f} ms  {sql[:200]}')
+
+        if options['clear']:
+            for summary_path, folded_path, _ in merged:
+                summary_path.unlink()
+                folded_path.unlink()
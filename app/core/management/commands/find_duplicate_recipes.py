@@ -0,0 +1,63 @@
+""" Django command finding near duplicate recipes"""
+import multiprocessing
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.models import Recipe, RecipeSignature
+from recipe import dedup
+
+
+class Command(BaseCommand):
+    """Report the near duplicate recipes of every user"""
+    help = 'Find near duplicate recipes in the whole database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Number of processes scanning users')
+        parser.add_argument('--chunk-size', type=int, default=100,
+                            help='Number of users scanned per task')
+        parser.add_argument('--threshold', type=float,
+                            help='Minimum similarity of duplicates, '
+                                 'RECIPE_DUPLICATE_THRESHOLD by default')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Compute every signature again')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            RecipeSignature.objects.all().delete()
+
+        user_ids = list(
+            Recipe.objects.order_by('user_id')
+            .values_list('user_id', flat=True).distinct()
+        )
+        size = options['chunk_size']
+        chunks = [
+            user_ids[i:i + size] for i in range(0, len(user_ids), size)
+        ]
+        scan = partial(dedup.scan_users, threshold=options['threshold'])
+
+        if options['processes'] <= 1:
+            count = self.report(map(scan, chunks))
+        else:
+            # Children must open their own database connections.
+            connections.close_all()
+            with multiprocessing.Pool(options['processes']) as pool:
+                count = self.report(pool.imap_unordered(scan, chunks))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Found {count} groups of duplicates among {len(user_ids)} '
+            'users'))
+
+    def report(self, results):
+        """Write the groups of each scanned chunk, return how many"""
+        count = 0
+        for groups in results:
+            for user_id, score, ids in groups:
+                self.stdout.write(
+                    f'User {user_id}: recipes '
+                    f'{", ".join(map(str, ids))} ({score:.2f})'
+                )
+                count += 1
+        return count
@@ -0,0 +1,13 @@
+""" Django command writing the OpenAPI schema artifacts"""
+from django.core.management.base import BaseCommand
+
+from core import schema
+
+
+class Command(BaseCommand):
+    """Generate the schema served at /api/schema/"""
+    help = 'Generate the OpenAPI schema for the current code'
+
+    def handle(self, *args, **options):
+        for path in schema.write(schema.generate()):
+            self.stdout.write(self.style.SUCCESS(f'Wrote {path}'))
@@ -0,0 +1,61 @@
+""" Django command to maintain the time range partitions of events"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import partitions
+
+
+class Command(BaseCommand):
+    """Create upcoming event partitions and archive old ones"""
+    help = 'Create future event partitions and archive old history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', choices=('month', 'year'),
+                            default='month',
+                            help='Length of the partitions to create')
+        parser.add_argument('--ahead', type=int, default=3,
+                            help='Number of future partitions to create')
+        parser.add_argument('--archive-before', type=date.fromisoformat,
+                            help='Archive events starting before this date '
+                                 '(YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned(connection):
+            raise CommandError('The event table is not partitioned.')
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._create(cursor, options['interval'], options['ahead'])
+            if options['archive_before']:
+                self._archive(cursor, options['archive_before'])
+
+    def _create(self, cursor, interval, ahead):
+        """Create the current partition and the following ahead ones"""
+        existing = partitions.partitions(cursor)
+        day = timezone.localdate()
+        for _ in range(ahead + 1):
+            name, start, end = partitions.period(day, interval)
+            overlaps = any(
+                start < other_end and other_start < end
+                for _, other_start, other_end in existing
+            )
+            if not overlaps:
+                partitions.create_partition(cursor, name, start, end)
+                existing.append((name, start, end))
+                self.stdout.write(self.style.SUCCESS(
+                    f'Created partition {name}'))
+            day = end.date()
+
+    def _archive(self, cursor, before):
+        """Archive the partitions and default rows older than before"""
+        cutoff = partitions.midnight(before)
+        for name, _, end in partitions.partitions(cursor):
+            if end <= cutoff:
+                count = partitions.archive_partition(cursor, name)
+                self.stdout.write(self.style.SUCCESS(
+                    f'Archived partition {name} ({count} events)'))
+        count = partitions.archive_default_rows(cursor, cutoff)
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {count} events from the default partition'))
@@ -0,0 +1,65 @@
+""" Django command running the background job worker"""
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    """Run queued jobs until stopped"""
+    help = 'Run the background jobs queued in the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Number of worker processes')
+        parser.add_argument('--batch-size', type=int,
+                            help='Maximum number of jobs claimed at once')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 1:
+            self.work(options)
+            return
+
+        # Children must open their own database connections.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=self.work, args=(options,))
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+
+    def work(self, options):
+        """Run jobs in this process until stopped"""
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        try:
+            while not self.stopping:
+                tasks.requeue_stale()
+                count = tasks.run_pending(options['batch_size'])
+                if count:
+                    self.stdout.write(f'Ran {count} jobs')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+
+    def stop(self, signum, frame):
+        """Finish the current jobs then exit"""
+        self.stopping = True
@@ -0,0 +1,45 @@
+""" Django command reporting the slow query statistics"""
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from core.models import SlowQuery
+
+
+class Command(BaseCommand):
+    """Print the slowest query fingerprints"""
+    help = 'Report queries logged as slow, by total time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Number of fingerprints to print')
+        parser.add_argument('--order', choices=('total', 'max', 'calls'),
+                            default='total',
+                            help='Sort by total time, worst time or calls')
+        parser.add_argument('--reset', action='store_true',
+                            help='Delete the statistics')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            count, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {count} fingerprints'))
+            return
+
+        order = {
+            'total': F('total_ms').desc(),
+            'max': F('max_ms').desc(),
+            'calls': F('calls').desc(),
+        }[options['order']]
+        for query in SlowQuery.objects.order_by(order)[:options['limit']]:
+            self.stdout.write(self.style.WARNING(
+                f'{query.fingerprint}  {query.calls} calls, '
+                f'{query.total_ms:.1f} ms total, {query.max_ms:.1f} ms max'
+            ))
+            self.stdout.write(query.sql)
+            for where, calls in sorted(
+                query.origins.items(), key=lambda item: -item[1]
+            ):
+                self.stdout.write(f'  {calls:6d}  {where}')
+            if query.plan:
+                self.stdout.write(query.plan)
+            self.stdout.write('')
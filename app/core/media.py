@@ -0,0 +1,143 @@
+"""Serving of uploaded media files.
+
+MEDIA_SERVE_MODE selects how the file body is sent:
+
+- 'direct': Django streams the file, full responses use FileResponse so
+  the WSGI server can send it with sendfile().
+- 'x-accel-redirect': nginx sends the file from the internal location
+  MEDIA_ACCEL_PREFIX, mapped to MEDIA_ROOT.
+- 'x-sendfile': Apache (mod_xsendfile) or lighttpd sends the file.
+
+Uploads are named after the hash of their content (see core.storage), or
+with a random UUID for older ones, and never change: those responses are
+cacheable forever.
+"""
+
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.storage import HASH_NAME
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=0, must-revalidate'
+CHUNK_SIZE = 64 * 1024
+
+_UUID_NAME = re.compile(
+    r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}(\.\w+)?$'
+)
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_immutable(path):
+    """Return whether the file name is a generated, never reused, name"""
+    name = Path(path).name
+    return bool(HASH_NAME.match(name) or _UUID_NAME.match(name))
+
+
+def parse_range(header, size):
+    """Return the (start, end) bytes of a single range header, inclusive.
+
+    Return None when the header is absent or not a single byte range, the
+    whole file is then sent. Raise ValueError when it is unsatisfiable.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range, the last bytes of the file.
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _read(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve(request, path):
+    """Serve the media file at path relative to MEDIA_ROOT"""
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(fullpath)
+    except OSError:
+        raise Http404('File not found')
+    if not os.path.isfile(fullpath):
+        raise Http404('File not found')
+
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = _file_response(request, path, fullpath, stat.st_size, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = (
+        IMMUTABLE if is_immutable(path) else REVALIDATE
+    )
+    return response
+
+
+def _file_response(request, path, fullpath, size, etag):
+    content_type = mimetypes.guess_type(fullpath)[0]
+    content_type = content_type or 'application/octet-stream'
+    mode = settings.MEDIA_SERVE_MODE
+
+    if mode == 'x-accel-redirect':
+        # nginx answers range and conditional requests itself.
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + path
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = fullpath
+        return response
+
+    if_range = request.headers.get('If-Range')
+    byte_range = None
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(
+            open(fullpath, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read(fullpath, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
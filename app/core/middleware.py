@@ -0,0 +1,111 @@
+"""Middleware shared by the api apps"""
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.core.cache import cache
+from django.middleware import clickjacking, csrf
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from core.db_router import read_from_replica, reset_read_from_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def _token_user_id(request):
+    """Return the user id of the request's JWT without a database query"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+
+class ReplicaRoutingMiddleware:
+    """Serve safe requests from read replicas when configured.
+
+    A user's reads stay on the primary for REPLICA_PIN_SECONDS after one
+    of their writes, so they see their own changes despite replication
+    lag.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        user_id = _token_user_id(request)
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if user_id is not None:
+                cache.set(
+                    _pin_key(user_id), True, settings.REPLICA_PIN_SECONDS
+                )
+            return response
+
+        pinned = user_id is not None and cache.get(_pin_key(user_id))
+        token = read_from_replica(not pinned)
+        try:
+            return self.get_response(request)
+        finally:
+            reset_read_from_replica(token)
+
+
+def _is_api(request):
+    return request.path_info.startswith(settings.API_PATH_PREFIX)
+
+
+class BrowserOnlyMixin:
+    """Skip a middleware on API_PATH_PREFIX.
+
+    The API authenticates with JWT and answers JSON, so sessions, CSRF,
+    messages and framing protection only matter to the admin.
+    """
+
+    def __call__(self, request):
+        if _is_api(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(BrowserOnlyMixin, sessions.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(BrowserOnlyMixin, csrf.CsrfViewMiddleware):
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if _is_api(request):
+            return None
+        return super().process_view(
+            request, view_func, view_args, view_kwargs)
+
+
+class AuthenticationMiddleware(BrowserOnlyMixin,
+                               auth.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(BrowserOnlyMixin, messages.MessageMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(BrowserOnlyMixin,
+                              clickjacking.XFrameOptionsMiddleware):
+    pass
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-19 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['user', 'start_time'], name='core_event_user_id_ddf4a2_idx'),
+        ),
+    ]
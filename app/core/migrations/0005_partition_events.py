@@ -0,0 +1,106 @@
+# Generated by Django 4.0.10 on 2026-10-19 11:48
+
+from django.conf import settings
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def rebuild_event_table(schema_editor, partitioned):
+    """Recreate core_event, partitioned by start_time or not, keeping rows.
+
+    A regular table cannot be turned into a partitioned one in place, so
+    the rows are copied into a new table which takes over the sequence,
+    indexes and foreign keys of the old one.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes "
+            "WHERE tablename = 'core_event' AND indexname <> 'core_event_pkey'"
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = 'core_event'::regclass AND contype = 'f'"
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute("SELECT pg_get_serial_sequence('core_event', 'id')")
+        sequence = cursor.fetchone()[0]
+
+        cursor.execute('ALTER TABLE core_event RENAME TO core_event_old')
+        cursor.execute(
+            'ALTER TABLE core_event_old '
+            'RENAME CONSTRAINT core_event_pkey TO core_event_old_pkey'
+        )
+        if partitioned:
+            cursor.execute(
+                'CREATE TABLE core_event '
+                '(LIKE core_event_old INCLUDING DEFAULTS) '
+                'PARTITION BY RANGE (start_time)'
+            )
+            # The partition key must be part of the primary key.
+            cursor.execute(
+                'ALTER TABLE core_event ADD PRIMARY KEY (id, start_time)'
+            )
+            cursor.execute(
+                'CREATE TABLE core_event_default '
+                'PARTITION OF core_event DEFAULT'
+            )
+        else:
+            cursor.execute(
+                'CREATE TABLE core_event '
+                '(LIKE core_event_old INCLUDING DEFAULTS)'
+            )
+            cursor.execute('ALTER TABLE core_event ADD PRIMARY KEY (id)')
+        cursor.execute('INSERT INTO core_event SELECT * FROM core_event_old')
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY core_event.id')
+        cursor.execute('DROP TABLE core_event_old')
+
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(
+                f'ALTER TABLE core_event ADD CONSTRAINT {name} {definition}'
+            )
+
+
+def partition_events(apps, schema_editor):
+    rebuild_event_table(schema_editor, partitioned=True)
+
+
+def unpartition_events(apps, schema_editor):
+    rebuild_event_table(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('recipe', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='eventarchive',
+            index=models.Index(fields=['user', 'start_time'], name='core_eventa_user_id_bc3293_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventarchive',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['start_time'], name='eventarchive_start_brin'),
+        ),
+        migrations.RunPython(partition_events, unpartition_events),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-19 12:47
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_event_title_trigram_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='recipesignature',
+            name='recipesignature_bands',
+        ),
+    ]
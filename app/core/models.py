@@ -7,6 +7,9 @@ from django.utils import timezone
 from django.conf import settings
 
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import BrinIndex, GinIndex, OpClass
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -110,10 +113,38 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'time_minutes']),
+            models.Index(fields=['user', 'price']),
+            # Backs the admin's case insensitive search on titles.
+            GinIndex(
+                OpClass(Upper('title'), name='gin_trgm_ops'),
+                name='recipe_title_upper_trgm',
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
 
+class RecipeSignature(models.Model):
+    """MinHash signature of a recipe, see recipe.dedup"""
+    recipe = models.OneToOneField(
+        Recipe,
+        primary_key=True,
+        related_name='signature',
+        on_delete=models.CASCADE
+    )
+    minhash = models.BinaryField()
+    # Locality sensitive hashes of the bands of minhash, recipes sharing
+    # one are candidate duplicates.
+    bands = ArrayField(models.BigIntegerField())
+
+    def __str__(self):
+        return f'Signature of recipe {self.recipe_id}'
+
+
 class Tag(models.Model):
     """Tag for filtering recipes"""
     name = models.CharField(max_length=255)
@@ -122,6 +153,20 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            # Trigram indexes backing prefix and typo tolerant search.
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                name='tag_name_upper_trgm',
+            ),
+            GinIndex(
+                fields=['name'],
+                opclasses=['gin_trgm_ops'],
+                name='tag_name_trgm',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -134,6 +179,20 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            # Trigram indexes backing prefix and typo tolerant search.
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                name='ingredient_name_upper_trgm',
+            ),
+            GinIndex(
+                fields=['name'],
+                opclasses=['gin_trgm_ops'],
+                name='ingredient_name_trgm',
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -153,6 +212,16 @@ class Event(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_time']),
+            # Backs the admin's case insensitive search on titles.
+            GinIndex(
+                OpClass(Upper('title'), name='gin_trgm_ops'),
+                name='event_title_upper_trgm',
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -160,3 +229,107 @@ class Event(models.Model):
         if not self.title:
             self.title = self.recipe.title
         super().save(*args, **kwargs)
+
+
+class EventArchive(models.Model):
+    """Past event moved out of the partitioned event table"""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        null=True,
+        on_delete=models.SET_NULL
+    )
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_time']),
+            # Archived rows are appended in time order, a BRIN index
+            # stays tiny however many years of history are kept.
+            BrinIndex(fields=['start_time'], name='eventarchive_start_brin'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class Job(models.Model):
+    """Background job run by the worker, see core.tasks"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    progress = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers poll for due jobs, finished ones pile up and
+            # must not be scanned.
+            models.Index(
+                fields=['run_at'],
+                name='job_pending_run_at',
+                condition=models.Q(status='pending'),
+            ),
+            models.Index(fields=['status', 'locked_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.task} ({self.status})'
+
+
+class SlowQuery(models.Model):
+    """Statistics of the slow queries sharing a normalized SQL"""
+    fingerprint = models.CharField(max_length=32, unique=True)
+    sql = models.TextField()
+    calls = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    origins = models.JSONField(default=dict, blank=True)
+    params = models.JSONField(default=list, blank=True)
+    plan = models.TextField(blank=True)
+    first_seen = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = 'slow queries'
+
+    def __str__(self):
+        return self.sql[:100]
+
+
+class RevokedToken(models.Model):
+    """Refresh token revoked before it expires, see user.revocation"""
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,115 @@
+"""Helpers managing the time range partitions of the event table"""
+
+import re
+from datetime import date, datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+PARENT_TABLE = 'core_event'
+DEFAULT_PARTITION = 'core_event_default'
+ARCHIVE_TABLE = 'core_eventarchive'
+COLUMNS = (
+    'id, title, description, start_time, end_time, recipe_id, user_id'
+)
+
+_BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def is_partitioned(connection):
+    """Return whether the event table is partitioned on this database"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table '
+            'WHERE partrelid = %s::regclass',
+            [PARENT_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def period(day, interval):
+    """Return the name and bounds of the partition containing day"""
+    if interval == 'year':
+        start = date(day.year, 1, 1)
+        end = date(day.year + 1, 1, 1)
+        name = f'{PARENT_TABLE}_y{day.year}'
+    else:
+        start = date(day.year, day.month, 1)
+        end = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+        name = f'{PARENT_TABLE}_y{day.year}m{day.month:02d}'
+    return name, midnight(start), midnight(end)
+
+
+def midnight(day):
+    """Return the aware datetime at the start of day"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def partitions(cursor):
+    """Return (name, start, end) of every range partition of the table"""
+    cursor.execute(
+        'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) '
+        'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = %s::regclass',
+        [PARENT_TABLE],
+    )
+    result = []
+    for name, bound in cursor.fetchall():
+        match = _BOUNDS.search(bound)
+        if match:
+            start, end = (parse_datetime(value) for value in match.groups())
+            result.append((name, start, end))
+    return sorted(result, key=lambda partition: partition[1])
+
+
+def create_partition(cursor, name, start, end):
+    """Create and attach a partition, moving its rows out of the default.
+
+    Rows already stored in the default partition for the range must move,
+    otherwise attaching the new partition would fail.
+    """
+    cursor.execute(
+        f'CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)'
+    )
+    cursor.execute(
+        f'WITH moved AS ('
+        f'DELETE FROM {DEFAULT_PARTITION} '
+        f'WHERE start_time >= %s AND start_time < %s RETURNING {COLUMNS}) '
+        f'INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved',
+        [start, end],
+    )
+    cursor.execute(
+        f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        [start, end],
+    )
+
+
+def archive_partition(cursor, name):
+    """Detach a partition and move its rows to the archive table"""
+    # Deferred foreign key checks still pending on the partition's rows
+    # would prevent dropping it, run them now.
+    cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+    cursor.execute(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}')
+    cursor.execute(
+        f'INSERT INTO {ARCHIVE_TABLE} ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM {name} ON CONFLICT (id) DO NOTHING'
+    )
+    count = cursor.rowcount
+    cursor.execute(f'DROP TABLE {name}')
+    return count
+
+
+def archive_default_rows(cursor, before):
+    """Move rows older than before from the default partition to archive"""
+    cursor.execute(
+        f'WITH moved AS ('
+        f'DELETE FROM {DEFAULT_PARTITION} '
+        f'WHERE start_time < %s RETURNING {COLUMNS}) '
+        f'INSERT INTO {ARCHIVE_TABLE} ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM moved ON CONFLICT (id) DO NOTHING',
+        [before],
+    )
+    return cursor.rowcount
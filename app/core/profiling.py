@@ -0,0 +1,156 @@
+"""On-demand sampling profiler for requests.
+
+ProfilingMiddleware profiles a PROFILE_SAMPLE_RATE fraction of requests,
+and every request carrying a PROFILE_HEADER signed with the secret key
+(see `python manage.py collect_profiles --token`). A thread samples the
+request thread's stack every PROFILE_INTERVAL seconds and the SQL run is
+recorded. Each profile is written to PROFILE_DIR as folded stacks, the
+input format of flamegraph.pl and speedscope, plus a JSON summary.
+Requests not sampled only pay for a random draw and a header lookup.
+"""
+
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.utils import timezone
+
+SALT = 'core.profiling'
+
+
+def make_token():
+    """Return a header value enabling profiling for PROFILE_TOKEN_MAX_AGE"""
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def valid_token(value):
+    """Return whether value is an unexpired profiling token"""
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            value, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def fold(frame):
+    """Return the stack ending at frame as a folded stack line"""
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '?')
+        names.append(f'{module}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Sample the stack of a thread from a background thread"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold(frame)] += 1
+
+
+class QueryRecorder:
+    """Database execute wrapper recording the SQL of a request"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'duration_ms': (time.perf_counter() - start) * 1000,
+            })
+
+
+def write_profile(request, response, duration, stacks, queries):
+    """Write the folded stacks and summary of a request to PROFILE_DIR"""
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r'[^\w]+', '-', request.path).strip('-') or 'root'
+    name = (
+        f'{timezone.now():%Y%m%dT%H%M%S}-{request.method}-{slug}-'
+        f'{uuid.uuid4().hex[:8]}'
+    )
+    with open(directory / f'{name}.folded', 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{stack} {count}\n')
+    summary = {
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': duration * 1000,
+        'samples': sum(stacks.values()),
+        'queries': queries,
+    }
+    with open(directory / f'{name}.json', 'w') as f:
+        json.dump(summary, f, indent=2)
+    return directory / name
+
+
+class ProfilingMiddleware:
+    """Profile sampled requests and requests asking for it"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        rate = settings.PROFILE_SAMPLE_RATE
+        if rate and random.random() < rate:
+            return True
+        value = request.headers.get(settings.PROFILE_HEADER)
+        return value is not None and valid_token(value)
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        sampler = StackSampler(
+            threading.get_ident(), settings.PROFILE_INTERVAL)
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop()
+        duration = time.perf_counter() - start
+        path = write_profile(
+            request, response, duration, sampler.stacks, recorder.queries)
+        response['X-Profile-Id'] = path.name
+        return response
@@ -0,0 +1,213 @@
+"""Minimal client of S3 compatible object stores.
+
+Requests are signed with AWS Signature Version 4 and sent with urllib, it
+covers what core.storage.S3Storage and direct uploads need: objects are
+put, read, inspected, deleted and listed in one bucket, addressed in path
+style (endpoint/bucket/key) as MinIO and most S3 compatible stores expect.
+"""
+
+import hashlib
+import hmac
+import posixpath
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.error import HTTPError
+from urllib.parse import quote, urlencode, urlsplit
+from urllib.request import Request, urlopen
+from xml.etree import ElementTree
+
+from django.conf import settings
+
+ALGORITHM = 'AWS4-HMAC-SHA256'
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+EMPTY_SHA256 = hashlib.sha256(b'').hexdigest()
+XMLNS = '{http://s3.amazonaws.com/doc/2006-03-01/}'
+
+
+class S3Error(Exception):
+    """Request refused by the object store"""
+
+    def __init__(self, status, body):
+        super().__init__(f'{status}: {body[:500]!r}')
+        self.status = status
+
+
+def _hmac(key, message):
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _canonical_query(query):
+    return '&'.join(
+        f'{quote(str(key), safe="-_.~")}={quote(str(value), safe="-_.~")}'
+        for key, value in sorted(query.items())
+    )
+
+
+def signature(method, path, query, headers, payload_hash, now, region,
+              access_key, secret_key, service='s3'):
+    """Return the SigV4 credential scope and signature of a request.
+
+    headers maps the lowercase names of the signed headers to their
+    values, host included.
+    """
+    day = now.strftime('%Y%m%d')
+    scope = f'{day}/{region}/{service}/aws4_request'
+    names = sorted(headers)
+    canonical_request = '\n'.join([
+        method,
+        quote(path, safe='/-_.~'),
+        _canonical_query(query),
+        ''.join(f'{name}:{" ".join(str(headers[name]).split())}\n'
+                for name in names),
+        ';'.join(names),
+        payload_hash,
+    ])
+    string_to_sign = '\n'.join([
+        ALGORITHM,
+        now.strftime('%Y%m%dT%H%M%SZ'),
+        scope,
+        hashlib.sha256(canonical_request.encode()).hexdigest(),
+    ])
+    key = f'AWS4{secret_key}'.encode()
+    for part in (day, region, service, 'aws4_request'):
+        key = _hmac(key, part)
+    return scope, hmac.new(
+        key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+
+class S3Client:
+    """Objects of one bucket"""
+
+    def __init__(self, endpoint_url=None, bucket=None, region=None,
+                 access_key=None, secret_key=None, presign_endpoint_url=None):
+        self.endpoint_url = (endpoint_url or settings.S3_ENDPOINT_URL).rstrip(
+            '/')
+        self.presign_endpoint_url = (
+            presign_endpoint_url
+            or settings.S3_PRESIGN_ENDPOINT_URL
+            or self.endpoint_url
+        ).rstrip('/')
+        self.bucket = bucket or settings.S3_BUCKET
+        self.region = region or settings.S3_REGION
+        self.access_key = access_key or settings.S3_ACCESS_KEY_ID
+        self.secret_key = secret_key or settings.S3_SECRET_ACCESS_KEY
+
+    def _path(self, key):
+        return posixpath.join('/', self.bucket, key)
+
+    def request(self, method, key='', query=None, headers=None, body=b'',
+                payload_hash=None):
+        """Send a signed request, return the response status and headers
+        and body"""
+        query = query or {}
+        url = self.endpoint_url + quote(self._path(key), safe='/-_.~')
+        if query:
+            url += '?' + _canonical_query(query)
+        now = datetime.now(timezone.utc)
+        signed = {
+            'host': urlsplit(self.endpoint_url).netloc,
+            'x-amz-date': now.strftime('%Y%m%dT%H%M%SZ'),
+            'x-amz-content-sha256': payload_hash or (
+                hashlib.sha256(body).hexdigest()
+                if isinstance(body, bytes) else UNSIGNED_PAYLOAD),
+        }
+        signed.update((name.lower(), value)
+                      for name, value in (headers or {}).items())
+        scope, sig = signature(
+            method, self._path(key), query, signed,
+            signed['x-amz-content-sha256'], now, self.region,
+            self.access_key, self.secret_key,
+        )
+        signed['authorization'] = (
+            f'{ALGORITHM} Credential={self.access_key}/{scope}, '
+            f'SignedHeaders={";".join(sorted(signed))}, Signature={sig}'
+        )
+        del signed['host']
+        request = Request(url, data=body if method == 'PUT' else None,
+                          headers=signed, method=method)
+        try:
+            with urlopen(request, timeout=settings.S3_TIMEOUT) as response:
+                return response.status, response.headers, response.read()
+        except HTTPError as exc:
+            raise S3Error(exc.code, exc.read()) from None
+
+    def presign(self, method, key, expires, headers=None):
+        """Return a URL authorizing method on key for expires seconds.
+
+        headers, such as Content-Type or Content-Length, are signed and
+        must be sent as is with the request.
+        """
+        now = datetime.now(timezone.utc)
+        signed = {'host': urlsplit(self.presign_endpoint_url).netloc}
+        signed.update((name.lower(), value)
+                      for name, value in (headers or {}).items())
+        day = now.strftime('%Y%m%d')
+        query = {
+            'X-Amz-Algorithm': ALGORITHM,
+            'X-Amz-Credential':
+                f'{self.access_key}/{day}/{self.region}/s3/aws4_request',
+            'X-Amz-Date': now.strftime('%Y%m%dT%H%M%SZ'),
+            'X-Amz-Expires': int(expires),
+            'X-Amz-SignedHeaders': ';'.join(sorted(signed)),
+        }
+        _, sig = signature(
+            method, self._path(key), query, signed, UNSIGNED_PAYLOAD, now,
+            self.region, self.access_key, self.secret_key,
+        )
+        query['X-Amz-Signature'] = sig
+        return (self.presign_endpoint_url
+                + quote(self._path(key), safe='/-_.~')
+                + '?' + urlencode(query))
+
+    def put(self, key, body, size, sha256, content_type=None):
+        """Store size bytes read from the file body under key"""
+        headers = {'content-length': str(size)}
+        if content_type:
+            headers['content-type'] = content_type
+        self.request('PUT', key, headers=headers, body=body,
+                     payload_hash=sha256)
+
+    def touch(self, key, content_type=None):
+        """Copy key onto itself, updating its modification time"""
+        headers = {
+            'x-amz-copy-source': quote(self._path(key), safe='/-_.~'),
+            'x-amz-metadata-directive': 'REPLACE',
+        }
+        if content_type:
+            headers['content-type'] = content_type
+        self.request('PUT', key, headers=headers)
+
+    def get(self, key):
+        return self.request('GET', key)[2]
+
+    def head(self, key):
+        """Return the size, type and modification time of key, or None"""
+        try:
+            _, headers, _ = self.request('HEAD', key)
+        except S3Error as exc:
+            if exc.status == 404:
+                return None
+            raise
+        return {
+            'size': int(headers['Content-Length']),
+            'content_type': headers.get('Content-Type'),
+            'modified': parsedate_to_datetime(headers['Last-Modified']),
+        }
+
+    def delete(self, key):
+        self.request('DELETE', key)
+
+    def list(self, prefix='', delimiter='/'):
+        """Return the keys and common prefixes directly under prefix"""
+        keys, prefixes = [], []
+        query = {'list-type': 2, 'prefix': prefix, 'delimiter': delimiter}
+        while True:
+            root = ElementTree.fromstring(self.request('GET', query=query)[2])
+            keys += [item.findtext(f'{XMLNS}Key')
+                     for item in root.iter(f'{XMLNS}Contents')]
+            prefixes += [item.findtext(f'{XMLNS}Prefix')
+                         for item in root.iter(f'{XMLNS}CommonPrefixes')]
+            if root.findtext(f'{XMLNS}IsTruncated') != 'true':
+                return keys, prefixes
+            query['continuation-token'] = root.findtext(
+                f'{XMLNS}NextContinuationToken')
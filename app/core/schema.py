@@ -0,0 +1,155 @@
+"""OpenAPI schema generated once per code version.
+
+`python manage.py generate_schema` writes the schema rendered as YAML and
+JSON, plain and gzipped, to SCHEMA_ROOT under a name holding a fingerprint
+of the code. The schema view serves those files from memory, generating
+them on first use when the artifact for the running code is missing.
+"""
+
+import gzip
+import hashlib
+import threading
+from importlib.metadata import version
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+RENDERERS = {
+    'yaml': OpenApiYamlRenderer,
+    'json': OpenApiJsonRenderer,
+}
+# Packages whose upgrade changes the generated schema.
+PACKAGES = (
+    'drf-spectacular',
+    'djangorestframework',
+    'djangorestframework-simplejwt',
+    'djoser',
+)
+
+_fingerprint = None
+_artifacts = {}
+_lock = threading.Lock()
+
+
+def fingerprint():
+    """Return a digest of the code the schema is generated from"""
+    global _fingerprint
+    if _fingerprint is None:
+        base_dir = Path(settings.BASE_DIR)
+        digest = hashlib.sha256()
+        for package in PACKAGES:
+            digest.update(f'{package}=={version(package)}\n'.encode())
+        for path in sorted(base_dir.rglob('*.py')):
+            if {'tests', 'migrations'} & set(path.parts):
+                continue
+            digest.update(str(path.relative_to(base_dir)).encode())
+            digest.update(path.read_bytes())
+        _fingerprint = digest.hexdigest()[:16]
+    return _fingerprint
+
+
+def artifact_path(fmt, compressed=False):
+    """Return the path of the artifact for the running code"""
+    name = f'openapi-{fingerprint()}.{fmt}'
+    if compressed:
+        name += '.gz'
+    return Path(settings.SCHEMA_ROOT) / name
+
+
+def generate():
+    """Generate the schema, return {format: (body, gzipped body)}"""
+    generator = SpectacularAPIView.generator_class(
+        urlconf=spectacular_settings.SERVE_URLCONF,
+    )
+    schema = generator.get_schema(
+        request=None,
+        public=spectacular_settings.SERVE_PUBLIC,
+    )
+    artifacts = {}
+    for fmt, renderer_class in RENDERERS.items():
+        body = renderer_class().render(schema, renderer_context={})
+        artifacts[fmt] = (body, gzip.compress(body, mtime=0))
+    return artifacts
+
+
+def write(artifacts):
+    """Write the artifacts and remove those of other code versions"""
+    root = Path(settings.SCHEMA_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    current = set()
+    for fmt, (body, compressed) in artifacts.items():
+        for path, data in ((artifact_path(fmt), body),
+                           (artifact_path(fmt, True), compressed)):
+            # Write then rename so readers never see a partial file.
+            tmp = path.with_name(path.name + '.tmp')
+            tmp.write_bytes(data)
+            tmp.replace(path)
+            current.add(path)
+    for path in root.glob('openapi-*'):
+        if path not in current:
+            path.unlink()
+    return sorted(current)
+
+
+def load(fmt):
+    """Return the (body, gzipped body) of the schema in fmt"""
+    if fmt not in _artifacts:
+        with _lock:
+            if fmt not in _artifacts:
+                try:
+                    _artifacts.update({
+                        name: (
+                            artifact_path(name).read_bytes(),
+                            artifact_path(name, True).read_bytes(),
+                        )
+                        for name in RENDERERS
+                    })
+                except FileNotFoundError:
+                    artifacts = generate()
+                    try:
+                        write(artifacts)
+                    except OSError:
+                        pass
+                    _artifacts.update(artifacts)
+    return _artifacts[fmt]
+
+
+class SchemaView(SpectacularAPIView):
+    """Serve the pregenerated schema with ETag and gzip support"""
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('lang') or request.GET.get('version'):
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        fmt = 'json' if renderer.format == 'json' else 'yaml'
+        gzipped = 'gzip' in request.headers.get('Accept-Encoding', '')
+        # Each encoding is a different representation with its own ETag.
+        etag = f'"{fingerprint()}-{fmt}{"-gz" if gzipped else ""}"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            body, compressed = load(fmt)
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f'; charset={renderer.charset}'
+            if gzipped:
+                response = HttpResponse(compressed, content_type=content_type)
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(body, content_type=content_type)
+            response['Content-Disposition'] = (
+                f'inline; filename="{self._get_filename(request, None)}"'
+            )
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
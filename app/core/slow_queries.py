@@ -0,0 +1,159 @@
+"""Slow query log.
+
+SlowQueryMiddleware wraps the database connections of every request with
+an execute wrapper timing each query. Queries slower than SLOW_QUERY_MS
+are logged and aggregated in the SlowQuery table by fingerprint, the SQL
+with literals and IN lists normalized. The row keeps the number of calls,
+the total and worst durations, the views and serializers issuing the
+query, the last parameters and the plan from EXPLAIN, captured the first
+time a process sees the fingerprint.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sys
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from rest_framework.serializers import BaseSerializer
+
+from core.models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+_view = ContextVar('slow_query_view', default=None)
+_recording = ContextVar('slow_query_recording', default=False)
+_explained = set()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """Return sql with literals and value lists replaced by placeholders"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """Return a short digest identifying the normalized sql"""
+    return hashlib.md5(normalize(sql).encode()).hexdigest()
+
+
+def origin():
+    """Return the view and serializer running the current query"""
+    parts = [_view.get()] if _view.get() else []
+    frame = sys._getframe(2)
+    while frame is not None:
+        instance = frame.f_locals.get('self')
+        if isinstance(instance, BaseSerializer):
+            # Name the item serializer of a many=True list.
+            serializer = getattr(instance, 'child', instance)
+            parts.append(type(serializer).__name__)
+            break
+        frame = frame.f_back
+    return ' > '.join(parts) or 'unknown'
+
+
+def explain(connection, sql, params):
+    """Return the plan of a query, without running it"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (ANALYZE off) {sql}', params)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+def record(connection, sql, params, duration_ms):
+    """Log a slow query and add it to the statistics of its fingerprint"""
+    digest = fingerprint(sql)
+    where = origin()
+    logger.warning('Slow query (%.1f ms) %s from %s: %s',
+                   duration_ms, digest, where, sql)
+
+    token = _recording.set(True)
+    try:
+        plan = ''
+        if digest not in _explained and sql.lstrip()[:6].upper() == 'SELECT':
+            _explained.add(digest)
+            with transaction.atomic(using=connection.alias):
+                plan = explain(connection, sql, params)
+        with transaction.atomic(using='default'):
+            _upsert(digest, normalize(sql), where, params, duration_ms, plan)
+    except DatabaseError:
+        logger.exception('Could not record slow query %s', digest)
+    finally:
+        _recording.reset(token)
+
+
+def _upsert(digest, sql, where, params, duration_ms, plan):
+    params = [str(param)[:200] for param in params or ()]
+    with connections['default'].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {SlowQuery._meta.db_table} AS q '
+            '(fingerprint, sql, calls, total_ms, max_ms, origins, params, '
+            'plan, first_seen, last_seen) '
+            'VALUES (%s, %s, 1, %s, %s, %s, %s, %s, now(), now()) '
+            'ON CONFLICT (fingerprint) DO UPDATE SET '
+            'calls = q.calls + 1, '
+            'total_ms = q.total_ms + excluded.total_ms, '
+            'max_ms = GREATEST(q.max_ms, excluded.max_ms), '
+            'origins = jsonb_set(q.origins, ARRAY[%s], to_jsonb('
+            'COALESCE((q.origins ->> %s)::int, 0) + 1)), '
+            'params = excluded.params, '
+            'plan = COALESCE(NULLIF(excluded.plan, %s), q.plan), '
+            'last_seen = excluded.last_seen',
+            [digest, sql, duration_ms, duration_ms,
+             json.dumps({where: 1}), json.dumps(params), plan,
+             where, where, ''],
+        )
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """Execute wrapper recording queries slower than SLOW_QUERY_MS"""
+    if _recording.get():
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - start) * 1000
+    if duration_ms >= settings.SLOW_QUERY_MS and not many:
+        record(context['connection'], sql, params, duration_ms)
+    return result
+
+
+class SlowQueryMiddleware:
+    """Time the queries of every request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SLOW_QUERY_MS:
+            return self.get_response(request)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(slow_query_wrapper))
+            token = _view.set(None)
+            try:
+                return self.get_response(request)
+            finally:
+                _view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        cls = getattr(view_func, 'cls', None)
+        if cls is None:
+            _view.set(getattr(view_func, '__qualname__', None))
+            return
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower())
+        _view.set(f'{cls.__name__}.{action}' if action else cls.__name__)
@@ -0,0 +1,231 @@
+"""Content addressed file storage.
+
+Uploads are stored under the SHA-256 of their content, so a file uploaded
+for many recipes is kept once. Reference counts are not stored: a file's
+references are the rows of file fields holding its name, counted when
+collecting garbage, so they cannot drift from the data.
+
+ContentAddressedStorage keeps files on the local file system, S3Storage
+in an S3 compatible object store, see core.s3. DEFAULT_FILE_STORAGE
+selects one.
+"""
+
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import tempfile
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import (
+    FileSystemStorage,
+    Storage,
+    default_storage,
+)
+from django.db import models
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from core.s3 import S3Client
+
+HASH_NAME = re.compile(r'^[0-9a-f]{64}(\.\w+)?$')
+
+
+def hashed_name(name, hexdigest):
+    """Return the name of a file stored as name with this SHA-256"""
+    directory, filename = posixpath.split(name)
+    ext = os.path.splitext(filename)[1].lower()
+    return posixpath.join(directory, hexdigest[:2], hexdigest + ext)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files after the hash of their content"""
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save, an existing
+        # file with that name holds the same bytes and is reused.
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        os.makedirs(self.path(directory), exist_ok=True)
+
+        # Hash while copying to a temporary file next to the destination,
+        # the upload is never held in memory and renaming it is atomic.
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.path(directory), prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            name = hashed_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.unlink(tmp_path)
+                # Restart the grace period of collect_garbage, the file may
+                # be old and unreferenced until the row saving it commits.
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                mode = self.file_permissions_mode
+                if mode is None:
+                    umask = os.umask(0)
+                    os.umask(umask)
+                    mode = 0o666 & ~umask
+                os.chmod(tmp_path, mode)
+                os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return name
+
+
+@deconstructible
+class S3Storage(Storage):
+    """Content addressed storage in an S3 compatible object store.
+
+    Files are served by the object store, from S3_PUBLIC_URL when the
+    bucket is public, otherwise through presigned URLs valid for
+    S3_URL_EXPIRY seconds.
+    """
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = S3Client()
+        return self._client
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        # Hash while spooling the upload, S3 needs its hash and length
+        # before the body.
+        digest = hashlib.sha256()
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as tmp:
+            for chunk in content.chunks():
+                digest.update(chunk)
+                tmp.write(chunk)
+                size += len(chunk)
+            name = hashed_name(name, digest.hexdigest())
+            head = self.client.head(name)
+            if head is None:
+                tmp.seek(0)
+                self.client.put(
+                    name, tmp, size, digest.hexdigest(),
+                    mimetypes.guess_type(name)[0],
+                )
+            else:
+                # Restart the grace period of collect_garbage, see
+                # ContentAddressedStorage._save.
+                self.client.touch(name, head['content_type'])
+        return name
+
+    def _open(self, name, mode='rb'):
+        content = ContentFile(self.client.get(name))
+        content.name = name
+        return content
+
+    def exists(self, name):
+        return self.client.head(name) is not None
+
+    def delete(self, name):
+        self.client.delete(name)
+
+    def _head(self, name):
+        head = self.client.head(name)
+        if head is None:
+            raise FileNotFoundError(name)
+        return head
+
+    def size(self, name):
+        return self._head(name)['size']
+
+    def get_modified_time(self, name):
+        return self._head(name)['modified']
+
+    def listdir(self, path):
+        prefix = path.strip('/') + '/' if path.strip('/') else ''
+        keys, prefixes = self.client.list(prefix)
+        return (
+            [posixpath.basename(p.rstrip('/')) for p in prefixes],
+            [posixpath.basename(key) for key in keys],
+        )
+
+    def url(self, name):
+        if settings.S3_PUBLIC_URL:
+            return f'{settings.S3_PUBLIC_URL.rstrip("/")}/{name}'
+        return self.client.presign('GET', name, settings.S3_URL_EXPIRY)
+
+
+def file_fields(storage=None):
+    """Return the (model, field name) of every file field of storage"""
+    storage = storage or default_storage
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, models.FileField) and field.storage is storage
+    ]
+
+
+def reference_counts(storage=None):
+    """Return the number of rows referencing each stored file name"""
+    counts = Counter()
+    for model, field in file_fields(storage):
+        rows = (
+            model._default_manager.exclude(**{field: ''})
+            .exclude(**{f'{field}__isnull': True})
+            .values_list(field)
+            .annotate(count=models.Count('pk'))
+            .order_by()
+        )
+        for name, count in rows.iterator():
+            counts[name] += count
+    return counts
+
+
+def stored_files(storage, directory=''):
+    """Yield the name of every file under directory"""
+    try:
+        directories, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield posixpath.join(directory, name)
+    for name in directories:
+        yield from stored_files(storage, posixpath.join(directory, name))
+
+
+def collect_garbage(directory, grace=timedelta(days=1), storage=None,
+                    dry_run=False):
+    """Delete files under directory that no row references.
+
+    Files younger than grace are kept, their row may not be committed yet.
+    Return the names and total size of the deleted files.
+    """
+    storage = storage or default_storage
+    counts = reference_counts(storage)
+    cutoff = timezone.now() - grace
+    deleted, size = [], 0
+    for name in stored_files(storage, directory):
+        if counts[name] or storage.get_modified_time(name) > cutoff:
+            continue
+        size += storage.size(name)
+        deleted.append(name)
+        if not dry_run:
+            storage.delete(name)
+    return deleted, size
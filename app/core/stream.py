@@ -0,0 +1,253 @@
+"""Server-sent events stream of the changes to a user's data.
+
+app.asgi routes STREAM_PATH to stream(), a plain ASGI application kept
+out of Django's request handling, so an idle connection costs a coroutine
+and a queue instead of a thread. Clients authenticate with their access
+token, in the Authorization header or, as EventSource cannot set headers,
+the token query parameter. The stream ends when the token expires and the
+client reconnects with a fresh one.
+
+Changes sent by core.changes are published to the broker, which fans them
+out to the connections of their owner. It is in memory when REDIS_URL is
+not set, so it only reaches connections of the process making the change.
+With REDIS_URL, changes go through a Redis pub/sub channel every process
+listens to.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'changes'
+# Sent instead of the changes a client was too slow to receive, it must
+# fetch its data again.
+RESYNC = {'action': 'resync'}
+
+
+def _put(queue, message):
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+        message = RESYNC
+    queue.put_nowait(message)
+
+
+class LocalBroker:
+    """Deliver messages to the connections of this process"""
+
+    def __init__(self):
+        self._queues = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """Return a queue receiving the messages of a user"""
+        queue = asyncio.Queue(settings.STREAM_QUEUE_SIZE)
+        with self._lock:
+            self._queues[user_id].add(
+                (asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            self._queues[user_id] = {
+                item for item in self._queues[user_id] if item[1] is not queue
+            }
+            if not self._queues[user_id]:
+                del self._queues[user_id]
+
+    def deliver(self, user_id, message):
+        """Queue a message for the connections of a user, from any thread"""
+        with self._lock:
+            subscribers = list(self._queues.get(user_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_put, queue, message)
+
+    def publish(self, user_id, message):
+        self.deliver(user_id, message)
+
+
+class RedisBroker(LocalBroker):
+    """Deliver messages to the connections of every process"""
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self._client = None
+        self._listeners = {}
+
+    def publish(self, user_id, message):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(
+            CHANNEL, json.dumps({'user': user_id, 'message': message}))
+
+    def subscribe(self, user_id):
+        loop = asyncio.get_running_loop()
+        listener = self._listeners.get(loop)
+        if listener is None or listener.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+        return super().subscribe(user_id)
+
+    async def _listen(self):
+        import redis.asyncio
+
+        while True:
+            try:
+                client = redis.asyncio.Redis.from_url(self.url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for item in pubsub.listen():
+                        if item['type'] != 'message':
+                            continue
+                        data = json.loads(item['data'])
+                        self.deliver(data['user'], data['message'])
+            except redis.RedisError:
+                logger.exception('Lost the %s channel, reconnecting', CHANNEL)
+                await asyncio.sleep(1)
+
+
+_broker = None
+
+
+def broker():
+    """Return the broker of this process"""
+    global _broker
+    if _broker is None:
+        if settings.STREAM_REDIS_URL:
+            _broker = RedisBroker(settings.STREAM_REDIS_URL)
+        else:
+            _broker = LocalBroker()
+    return _broker
+
+
+def publish_change(sender, user_id, action, ids, **kwargs):
+    """Publish a core.changes notification to the owner's connections"""
+    message = {
+        'model': sender._meta.model_name,
+        'action': action,
+        'ids': ids,
+    }
+    try:
+        broker().publish(user_id, message)
+    except Exception:
+        # Clients resynchronize when they reconnect, never fail the write.
+        logger.exception('Could not publish %s', message)
+
+
+def _raw_token(scope):
+    for name, value in scope['headers']:
+        if name == b'authorization':
+            parts = value.split()
+            if (len(parts) == 2
+                    and parts[0].decode() in api_settings.AUTH_HEADER_TYPES):
+                return parts[1]
+            return None
+    query = parse_qs(scope['query_string'].decode())
+    return query.get('token', [None])[0]
+
+
+def authenticate(scope):
+    """Return the user and validated access token of a connection"""
+    raw_token = _raw_token(scope)
+    if raw_token is None:
+        return None, None
+    authentication = JWTAuthentication()
+    try:
+        token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(token), token
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None, None
+    finally:
+        close_old_connections()
+
+
+async def _respond(send, status, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def _event(message):
+    return f'event: change\ndata: {json.dumps(message)}\n\n'.encode()
+
+
+async def stream(scope, receive, send):
+    """Stream the changes to the data of the authenticated user"""
+    if scope['method'] != 'GET':
+        await _respond(send, 405, b'{"detail": "Method not allowed."}')
+        return
+    user, token = await sync_to_async(authenticate)(scope)
+    if user is None:
+        await _respond(
+            send, 401, b'{"detail": "Authentication credentials were not '
+                       b'provided or are invalid."}')
+        return
+
+    queue = broker().subscribe(user.id)
+    disconnected = asyncio.ensure_future(_disconnected(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                # Stop nginx from buffering the stream.
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'retry: 5000\n\n',
+            'more_body': True,
+        })
+        while True:
+            remaining = token['exp'] - time.time()
+            if remaining <= 0:
+                break
+            received = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {received, disconnected},
+                timeout=min(settings.STREAM_KEEPALIVE, remaining),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected in done:
+                received.cancel()
+                return
+            if received in done:
+                body = _event(received.result())
+            else:
+                received.cancel()
+                body = b': keepalive\n\n'
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': True,
+            })
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+        broker().unsubscribe(user.id, queue)
@@ -0,0 +1,204 @@
+"""Database backed queue of background jobs.
+
+Functions decorated with `task` are queued with `enqueue` and run by
+`python manage.py run_worker`. Workers claim due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED so several processes never run the same
+job, failed jobs are retried with an exponential backoff.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, TextField, Value, When
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task(batch=False, bind=False, max_attempts=5):
+    """Register a function as a background task.
+
+    A batch task receives the payloads of all the claimed jobs of the task
+    at once and returns one error, or None on success, per payload. A bound
+    task receives its job, None when run eagerly, before the payload.
+    """
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.batch = batch
+        func.bind = bind
+        func.max_attempts = max_attempts
+        return func
+    return decorator
+
+
+def enqueue(func, payload=None, delay=None):
+    """Queue a run of the task with the JSON serializable payload.
+
+    The job is stored in the current transaction, it is dropped if the
+    transaction rolls back. With TASKS_EAGER the task runs immediately.
+    """
+    payload = {} if payload is None else payload
+    if settings.TASKS_EAGER:
+        if func.batch:
+            error = func([payload])[0]
+            if error is not None:
+                raise error
+        elif func.bind:
+            func(None, payload)
+        else:
+            func(payload)
+        return None
+
+    run_at = timezone.now()
+    if delay:
+        run_at += delay
+    return Job.objects.create(
+        task=func.task_name,
+        payload=payload,
+        max_attempts=func.max_attempts,
+        run_at=run_at,
+    )
+
+
+def claim(limit):
+    """Lock and return up to limit due jobs, marked as running"""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.PENDING, run_at__lte=now)
+            .order_by('run_at')[:limit]
+        )
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=Job.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_at=now,
+        )
+    for job in jobs:
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.locked_at = now
+    return jobs
+
+
+def requeue_stale(timeout=None):
+    """Put back jobs left running by a worker that died, return how many.
+
+    Jobs out of attempts fail instead, one killing its worker every time
+    would otherwise be run forever.
+    """
+    timeout = settings.TASK_TIMEOUT if timeout is None else timeout
+    now = timezone.now()
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=now - timedelta(seconds=timeout),
+    ).update(
+        status=Case(
+            When(attempts__gte=F('max_attempts'), then=Value(Job.FAILED)),
+            default=Value(Job.PENDING),
+        ),
+        last_error=Case(
+            When(attempts__gte=F('max_attempts'),
+                 then=Value('Worker died while running the job')),
+            default=F('last_error'),
+            output_field=TextField(),
+        ),
+        finished_at=Case(
+            When(attempts__gte=F('max_attempts'), then=Value(now)),
+            default=F('finished_at'),
+        ),
+        locked_at=None,
+    )
+
+
+def report_progress(job, progress):
+    """Store the progress of a running job.
+
+    Also renews its lock, long jobs reporting progress are not mistaken for
+    abandoned ones.
+    """
+    if job is None:
+        return
+    job.progress = progress
+    job.locked_at = timezone.now()
+    Job.objects.filter(id=job.id).update(
+        progress=progress,
+        locked_at=job.locked_at,
+    )
+
+
+def retry_delay(attempts):
+    """Return how long to wait before the next attempt"""
+    return timedelta(seconds=settings.TASK_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_pending(limit=None):
+    """Claim and run due jobs, return the number of jobs run"""
+    jobs = claim(limit or settings.TASK_BATCH_SIZE)
+    by_task = defaultdict(list)
+    for job in jobs:
+        by_task[job.task].append(job)
+
+    for name, task_jobs in by_task.items():
+        try:
+            func = import_string(name)
+        except ImportError as error:
+            errors = [error] * len(task_jobs)
+        else:
+            errors = _run(func, task_jobs)
+        _finish(task_jobs, errors)
+    return len(jobs)
+
+
+def _run(func, jobs):
+    """Run the jobs of one task, return an error or None per job"""
+    if func.batch:
+        try:
+            return func([job.payload for job in jobs])
+        except Exception as error:
+            return [error] * len(jobs)
+
+    errors = []
+    for job in jobs:
+        try:
+            if func.bind:
+                func(job, job.payload)
+            else:
+                func(job.payload)
+        except Exception as error:
+            errors.append(error)
+        else:
+            errors.append(None)
+    return errors
+
+
+def _finish(jobs, errors):
+    """Record the outcome of the jobs"""
+    now = timezone.now()
+    done = [job.id for job, error in zip(jobs, errors) if error is None]
+    Job.objects.filter(id__in=done).update(
+        status=Job.DONE,
+        finished_at=now,
+        last_error='',
+    )
+    for job, error in zip(jobs, errors):
+        if error is None:
+            continue
+        logger.warning('Job %s (%s) failed: %r', job.id, job.task, error)
+        job.last_error = repr(error)
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = now
+        else:
+            job.status = Job.PENDING
+            job.run_at = now + retry_delay(job.attempts)
+        job.save(update_fields=[
+            'status', 'run_at', 'locked_at', 'last_error', 'finished_at',
+        ])
@@ -0,0 +1,43 @@
+"""Helpers shared by the test suites of the api apps"""
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetTestMixin:
+    """Assert viewset actions stay within their query budget.
+
+    Time budgets are only monitored in production, timings in tests are
+    too noisy to assert.
+    """
+    budget_sizes = (1, 10, 50)
+
+    def assertWithinBudget(self, viewset, action, request, seed,
+                           sizes=None):
+        """Assert request stays within the budget as seed adds rows.
+
+        seed(count) must add count rows to the data the request reads,
+        request() must send the request and return its response. The
+        number of queries must not exceed the budget, nor grow with the
+        amount of data.
+        """
+        budget = viewset.query_budgets[action]
+        seeded, counts = 0, []
+        for size in sizes or self.budget_sizes:
+            seed(size - seeded)
+            seeded = size
+            with CaptureQueriesContext(connections['default']) as queries:
+                res = request()
+            self.assertLess(res.status_code, 400, res.data)
+            counts.append(len(queries))
+            self.assertLessEqual(
+                len(queries), budget.queries,
+                f'{viewset.__name__}.{action} ran {len(queries)} queries '
+                f'with {size} rows, its budget is {budget.queries}:\n'
+                + '\n'.join(query['sql'] for query in queries),
+            )
+        self.assertEqual(
+            len(set(counts)), 1,
+            f'{viewset.__name__}.{action} queries grow with the data: '
+            f'{counts} for {sizes or self.budget_sizes} rows',
+        )
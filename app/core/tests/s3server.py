@@ -0,0 +1,181 @@
+"""In memory S3 compatible server for the tests.
+
+It checks the SigV4 signatures of header signed and presigned requests,
+and serves the object operations core.s3.S3Client uses.
+"""
+
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+from core.s3 import UNSIGNED_PAYLOAD, signature
+
+ACCESS_KEY = 'test-access-key'
+SECRET_KEY = 'test-secret-key'
+REGION = 'us-east-1'
+BUCKET = 'test-bucket'
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _authorized(self, path, query, body):
+        if 'X-Amz-Signature' in query:
+            query = dict(query)
+            sent = query.pop('X-Amz-Signature')
+            names = query['X-Amz-SignedHeaders'].split(';')
+            date = query['X-Amz-Date']
+            payload_hash = UNSIGNED_PAYLOAD
+            expires = datetime.strptime(date, '%Y%m%dT%H%M%SZ').replace(
+                tzinfo=timezone.utc) + timedelta(
+                    seconds=int(query['X-Amz-Expires']))
+            if expires < datetime.now(timezone.utc):
+                return False
+        else:
+            authorization = self.headers.get('Authorization', '')
+            fields = dict(
+                part.strip().split('=', 1)
+                for part in authorization.split(' ', 1)[-1].split(',')
+                if '=' in part
+            )
+            if not fields.get('Credential', '').startswith(ACCESS_KEY):
+                return False
+            sent = fields['Signature']
+            names = fields['SignedHeaders'].split(';')
+            date = self.headers['X-Amz-Date']
+            payload_hash = self.headers['X-Amz-Content-Sha256']
+            if (payload_hash != UNSIGNED_PAYLOAD
+                    and hashlib.sha256(body).hexdigest() != payload_hash):
+                return False
+        headers = {name: self.headers.get(name, '') for name in names}
+        now = datetime.strptime(date, '%Y%m%dT%H%M%SZ').replace(
+            tzinfo=timezone.utc)
+        _, expected = signature(
+            self.command, path, query, headers, payload_hash, now, REGION,
+            ACCESS_KEY, SECRET_KEY,
+        )
+        return sent == expected
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        query = dict(parse_qsl(url.query, keep_blank_values=True))
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if not self._authorized(path, query, body):
+            return self._reply(403, b'<Error>SignatureDoesNotMatch</Error>')
+        bucket, _, key = path.lstrip('/').partition('/')
+        if bucket != BUCKET:
+            return self._reply(404, b'<Error>NoSuchBucket</Error>')
+        objects = self.server.objects
+
+        if not key and self.command == 'GET':
+            return self._list(query)
+        copy_source = self.headers.get('X-Amz-Copy-Source')
+        if self.command == 'PUT' and copy_source:
+            source = unquote(copy_source).lstrip('/').partition('/')[2]
+            if source not in objects:
+                return self._reply(404, b'<Error>NoSuchKey</Error>')
+            objects[key] = {
+                'body': objects[source]['body'],
+                'content_type': self.headers.get(
+                    'Content-Type', objects[source]['content_type']),
+                'modified': datetime.now(timezone.utc),
+            }
+            return self._reply(200, b'<CopyObjectResult/>')
+        if self.command == 'PUT':
+            objects[key] = {
+                'body': body,
+                'content_type': self.headers.get(
+                    'Content-Type', 'binary/octet-stream'),
+                'modified': datetime.now(timezone.utc),
+            }
+            return self._reply(200)
+        if self.command == 'DELETE':
+            objects.pop(key, None)
+            return self._reply(204)
+        if key not in objects:
+            return self._reply(404, b'<Error>NoSuchKey</Error>')
+        item = objects[key]
+        self.send_response(200)
+        self.send_header('Content-Type', item['content_type'])
+        self.send_header('Content-Length', str(len(item['body'])))
+        self.send_header('Last-Modified',
+                         format_datetime(item['modified'], usegmt=True))
+        self.end_headers()
+        if self.command == 'GET':
+            self.wfile.write(item['body'])
+
+    def _list(self, query):
+        prefix = query.get('prefix', '')
+        delimiter = query.get('delimiter', '')
+        keys, prefixes = [], set()
+        for key in sorted(self.server.objects):
+            if not key.startswith(prefix):
+                continue
+            rest = key[len(prefix):]
+            if delimiter and delimiter in rest:
+                prefixes.add(prefix + rest.split(delimiter)[0] + delimiter)
+            else:
+                keys.append(key)
+        body = (
+            '<ListBucketResult '
+            'xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+            '<IsTruncated>false</IsTruncated>'
+            + ''.join(f'<Contents><Key>{escape(key)}</Key></Contents>'
+                      for key in keys)
+            + ''.join(f'<CommonPrefixes><Prefix>{escape(p)}</Prefix>'
+                      '</CommonPrefixes>' for p in sorted(prefixes))
+            + '</ListBucketResult>'
+        )
+        self._reply(200, body.encode(), {'Content-Type': 'application/xml'})
+
+    do_GET = do_HEAD = do_PUT = do_DELETE = _handle
+
+
+class S3Server:
+    """Serve a bucket on a random local port while used as a context"""
+
+    def __enter__(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.objects = {}
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    @property
+    def objects(self):
+        return self.server.objects
+
+    def settings(self):
+        """Return the settings pointing the storage to this server"""
+        return {
+            'DEFAULT_FILE_STORAGE': 'core.storage.S3Storage',
+            'S3_ENDPOINT_URL': self.url,
+            'S3_PRESIGN_ENDPOINT_URL': None,
+            'S3_BUCKET': BUCKET,
+            'S3_REGION': REGION,
+            'S3_ACCESS_KEY_ID': ACCESS_KEY,
+            'S3_SECRET_ACCESS_KEY': SECRET_KEY,
+            'S3_PUBLIC_URL': None,
+        }
@@ -0,0 +1,55 @@
+"""Tests for the query budgets of the viewsets"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.budgets import Budget
+from recipe.views import TagViewSet
+
+
+class TightTagViewSet(TagViewSet):
+    query_budgets = {'list': Budget(queries=0)}
+
+
+class SlowTagViewSet(TagViewSet):
+    query_budgets = {'list': Budget(queries=10, ms=0)}
+
+
+class QueryBudgetTests(TestCase):
+    """Test reporting requests over their budget"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+
+    def list(self, viewset):
+        request = APIRequestFactory().get('/api/recipe/tags/')
+        force_authenticate(request, self.user)
+        return viewset.as_view({'get': 'list'})(request)
+
+    def test_queries_over_budget_logged(self):
+        """Test a request running too many queries is reported"""
+        with self.assertLogs('core.budgets', 'WARNING') as logs:
+            res = self.list(TightTagViewSet)
+
+        self.assertEqual(res.status_code, 200)
+        record = logs.records[0]
+        self.assertEqual(record.view, 'TightTagViewSet.list')
+        self.assertEqual(record.queries, 1)
+        self.assertEqual(record.query_budget, 0)
+
+    def test_time_over_budget_logged(self):
+        """Test a request running too long is reported"""
+        with self.assertLogs('core.budgets', 'WARNING') as logs:
+            self.list(SlowTagViewSet)
+
+        self.assertEqual(logs.records[0].time_budget_ms, 0)
+
+    def test_within_budget_not_logged(self):
+        """Test requests within the budget are not reported"""
+        with self.assertNoLogs('core.budgets', 'WARNING'):
+            self.list(TagViewSet)
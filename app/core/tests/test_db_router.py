@@ -0,0 +1,115 @@
+"""Tests for read replica routing"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.db_router import (
+    ReplicaRouter,
+    read_from_replica,
+    reset_read_from_replica,
+)
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Recipe
+
+
+def auth_header(user):
+    """Return an Authorization header carrying an access token for user"""
+    return f'{api_settings.AUTH_HEADER_TYPES[0]} {AccessToken.for_user(user)}'
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test the database router"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_primary_by_default(self):
+        """Test reads outside a routed request use the primary"""
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_routed_reads_use_replica(self):
+        """Test reads use a replica when the request allows it"""
+        token = read_from_replica(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Recipe), 'replica_0')
+            self.assertEqual(self.router.db_for_write(Recipe), 'default')
+        finally:
+            reset_read_from_replica(token)
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_no_migrations_on_replicas(self):
+        """Test migrations only run on the primary"""
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'core'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        """Test reads use the primary when there is no replica"""
+        token = read_from_replica(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Recipe), 'default')
+        finally:
+            reset_read_from_replica(token)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], REPLICA_PIN_SECONDS=60)
+class ReplicaRoutingMiddlewareTests(TestCase):
+    """Test the middleware choosing where requests read from"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+        self.auth = auth_header(self.user)
+        self.read_from = []
+
+        def get_response(request):
+            self.read_from.append(ReplicaRouter().db_for_read(Recipe))
+            return HttpResponse()
+
+        self.middleware = ReplicaRoutingMiddleware(get_response)
+
+    def request(self, method, auth=None):
+        """Send a request through the middleware"""
+        request = getattr(self.factory, method)(
+            '/api/recipe/recipes/',
+            HTTP_AUTHORIZATION=auth or self.auth,
+        )
+        self.middleware(request)
+
+    def test_safe_requests_read_from_replica(self):
+        """Test GET requests read from a replica"""
+        self.request('get')
+
+        self.assertEqual(self.read_from, ['replica_0'])
+
+    def test_writes_use_primary(self):
+        """Test unsafe requests read from the primary"""
+        self.request('post')
+
+        self.assertEqual(self.read_from, ['default'])
+
+    def test_reads_pinned_after_write(self):
+        """Test a user reads from the primary right after writing"""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+            name='Other User',
+        )
+
+        self.request('patch')
+        self.request('get')
+        self.request('get', auth=auth_header(other))
+
+        self.assertEqual(self.read_from, ['default', 'default', 'replica_0'])
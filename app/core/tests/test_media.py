@@ -0,0 +1,115 @@
+"""Tests for media file serving"""
+
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core import media
+
+NAME = 'uploads/recipe/0b5e0e5c-5e5e-4e5e-9e5e-0123456789ab.jpg'
+CONTENT = bytes(range(256)) * 4
+
+
+class MediaTests(SimpleTestCase):
+    """Test serving uploaded files"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        settings = override_settings(
+            MEDIA_ROOT=str(root), MEDIA_SERVE_MODE='direct')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for name in (NAME, 'uploads/recipe/cover.jpg'):
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_bytes(CONTENT)
+        self.url = reverse('media', args=[NAME])
+
+    def test_full_file(self):
+        """Test the whole file is sent with immutable cache headers"""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Cache-Control'], media.IMMUTABLE)
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        res.close()
+
+    def test_mutable_name_revalidated(self):
+        """Test files without a generated name must be revalidated"""
+        url = reverse('media', args=['uploads/recipe/cover.jpg'])
+
+        res = self.client.get(url)
+
+        self.assertEqual(res['Cache-Control'], media.REVALIDATE)
+        res.close()
+
+    def test_range(self):
+        """Test a byte range gets a partial response"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[10:20])
+        self.assertEqual(res['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(res['Content-Length'], '10')
+
+    def test_suffix_range(self):
+        """Test a suffix range returns the end of the file"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=-100')
+
+        self.assertEqual(b''.join(res.streaming_content), CONTENT[-100:])
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end of the file is rejected"""
+        res = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_if_range_mismatch(self):
+        """Test a stale If-Range gets the whole file"""
+        res = self.client.get(
+            self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+
+        self.assertEqual(res.status_code, 200)
+        res.close()
+
+    def test_not_modified(self):
+        """Test a matching ETag gets a 304 response"""
+        etag = self.client.get(self.url)['ETag']
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_missing_file(self):
+        """Test a missing file is not found"""
+        res = self.client.get(reverse('media', args=['uploads/none.jpg']))
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_path_traversal(self):
+        """Test files outside the media root are not served"""
+        res = self.client.get(reverse('media', args=['../../etc/passwd']))
+
+        self.assertEqual(res.status_code, 400)
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel-redirect')
+    def test_x_accel_redirect(self):
+        """Test nginx is asked to send the file"""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res['X-Accel-Redirect'], f'/protected-media/{NAME}')
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['Cache-Control'], media.IMMUTABLE)
+
+    @override_settings(MEDIA_SERVE_MODE='x-sendfile')
+    def test_x_sendfile(self):
+        """Test the web server is asked to send the file"""
+        res = self.client.get(self.url)
+
+        self.assertTrue(res['X-Sendfile'].endswith(NAME))
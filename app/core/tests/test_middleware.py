@@ -0,0 +1,59 @@
+"""Tests for skipping browser middleware on the API"""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+
+class BrowserOnlyMiddlewareTests(TestCase):
+    """Test API requests skip the session and CSRF middleware"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+            name='Admin',
+        )
+
+    def test_api_skips_browser_middleware(self):
+        """Test API responses carry no session, CSRF or framing headers"""
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(self.user)
+
+        res = client.get(reverse('recipe:recipe-list'))
+
+        # The session cookie does not authenticate API requests.
+        self.assertEqual(res.status_code, 401)
+        self.assertNotIn('X-Frame-Options', res)
+        self.assertNotIn('Cookie', res.get('Vary', ''))
+
+    def test_admin_keeps_browser_middleware(self):
+        """Test the admin still uses sessions and CSRF protection"""
+        res = self.client.get(reverse('admin:login'))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['X-Frame-Options'], 'DENY')
+        self.assertIn('csrftoken', res.cookies)
+        self.assertIn('Cookie', res['Vary'])
+
+    def test_admin_csrf_enforced(self):
+        """Test admin posts without a CSRF token are refused"""
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(self.user)
+
+        res = client.post(reverse('admin:logout'))
+
+        self.assertEqual(res.status_code, 403)
+
+    def test_benchmark(self):
+        """Test the benchmark compares both middleware lists"""
+        out = StringIO()
+
+        call_command('benchmark_middleware', requests=10, repeat=1,
+                     stdout=out)
+
+        self.assertIn('saved', out.getvalue())
@@ -0,0 +1,133 @@
+"""Tests for the partitioned event table"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core import partitions
+from core.models import Event, EventArchive, Recipe
+
+EVENTS_URL = reverse('event:event-list')
+
+
+def at(year, month, day):
+    """Return an aware datetime at noon"""
+    return timezone.make_aware(datetime(year, month, day, 12))
+
+
+class PartitionTests(TestCase):
+    """Test partition maintenance of the event table"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+
+    def create_event(self, start_time):
+        """Create an event for the sample recipe"""
+        return Event.objects.create(
+            user=self.user,
+            recipe=self.recipe,
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=1),
+        )
+
+    def partition_names(self):
+        with connection.cursor() as cursor:
+            return [name for name, _, _ in partitions.partitions(cursor)]
+
+    def test_event_table_partitioned(self):
+        """Test the migrations partition the event table"""
+        self.assertTrue(partitions.is_partitioned(connection))
+
+    def test_period(self):
+        """Test partition bounds for months and years"""
+        name, start, end = partitions.period(date(2024, 12, 15), 'month')
+
+        self.assertEqual(name, 'core_event_y2024m12')
+        self.assertEqual(start, partitions.midnight(date(2024, 12, 1)))
+        self.assertEqual(end, partitions.midnight(date(2025, 1, 1)))
+
+        name, start, end = partitions.period(date(2024, 12, 15), 'year')
+        self.assertEqual(name, 'core_event_y2024')
+        self.assertEqual(end, partitions.midnight(date(2025, 1, 1)))
+
+    def test_create_partitions_moves_default_rows(self):
+        """Test upcoming partitions are created around existing rows"""
+        today = timezone.localdate()
+        event = self.create_event(timezone.now())
+
+        call_command('manage_event_partitions', ahead=2, stdout=StringIO())
+        call_command('manage_event_partitions', ahead=2, stdout=StringIO())
+
+        names = self.partition_names()
+        self.assertEqual(len(names), 3)
+        self.assertIn(partitions.period(today, 'month')[0], names)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {partitions.DEFAULT_PARTITION}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertTrue(Event.objects.filter(id=event.id).exists())
+
+    def test_archive_old_events(self):
+        """Test old partitions and default rows are moved to the archive"""
+        with connection.cursor() as cursor:
+            name, start, end = partitions.period(date(2020, 1, 1), 'month')
+            partitions.create_partition(cursor, name, start, end)
+        old = self.create_event(at(2020, 1, 10))
+        older = self.create_event(at(2019, 6, 1))
+        recent = self.create_event(at(2020, 2, 10))
+
+        call_command(
+            'manage_event_partitions',
+            ahead=0,
+            archive_before=date(2020, 2, 1),
+            stdout=StringIO(),
+        )
+
+        self.assertNotIn(name, self.partition_names())
+        self.assertEqual(
+            set(Event.objects.values_list('id', flat=True)), {recent.id})
+        archived = EventArchive.objects.get(id=old.id)
+        self.assertEqual(archived.title, old.title)
+        self.assertEqual(archived.start_time, old.start_time)
+        self.assertTrue(EventArchive.objects.filter(id=older.id).exists())
+
+    def test_list_range_prunes_partitions(self):
+        """Test listing a date range only scans the matching partition"""
+        with connection.cursor() as cursor:
+            for month in (1, 2):
+                partitions.create_partition(
+                    cursor, *partitions.period(date(2024, month, 1), 'month'))
+        january = self.create_event(at(2024, 1, 10))
+        self.create_event(at(2024, 2, 10))
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(EVENTS_URL, {'start': '2024-01-01',
+                                      'end': '2024-01-31'})
+
+        self.assertEqual([event['id'] for event in res.data], [january.id])
+        plan = Event.objects.filter(
+            start_time__gte=partitions.midnight(date(2024, 1, 1)),
+            start_time__lt=partitions.midnight(date(2024, 2, 1)),
+        ).explain()
+        self.assertIn('core_event_y2024m01', plan)
+        self.assertNotIn('core_event_y2024m02', plan)
@@ -0,0 +1,96 @@
+"""Tests for the request profiler"""
+
+import json
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import profiling
+
+
+def slow_view(request):
+    """Run a query then keep the thread busy for a while"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        pass
+    return HttpResponse()
+
+
+class ProfilingTests(TestCase):
+    """Test profiling requests"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        settings = override_settings(
+            PROFILE_DIR=tmp.name,
+            PROFILE_SAMPLE_RATE=0,
+            PROFILE_INTERVAL=0.001,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.factory = RequestFactory()
+        self.middleware = profiling.ProfilingMiddleware(slow_view)
+
+    def request(self, **headers):
+        return self.middleware(
+            self.factory.get('/api/recipe/recipes/', **headers))
+
+    def test_not_profiled_by_default(self):
+        """Test requests are not profiled without sampling or token"""
+        res = self.request(HTTP_X_PROFILE='forged')
+
+        self.assertNotIn('X-Profile-Id', res)
+        self.assertEqual(list(self.dir.iterdir()), [])
+
+    def test_profiled_with_token(self):
+        """Test a signed header profiles the request"""
+        res = self.request(HTTP_X_PROFILE=profiling.make_token())
+
+        name = res['X-Profile-Id']
+        folded = (self.dir / f'{name}.folded').read_text()
+        self.assertIn('core.tests.test_profiling:slow_view', folded)
+        summary = json.loads((self.dir / f'{name}.json').read_text())
+        self.assertEqual(summary['path'], '/api/recipe/recipes/')
+        self.assertGreater(summary['samples'], 0)
+        self.assertIn('SELECT 1', [q['sql'] for q in summary['queries']])
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sampled(self):
+        """Test sampled requests are profiled"""
+        res = self.request()
+
+        self.assertIn('X-Profile-Id', res)
+
+    def test_collect_profiles(self):
+        """Test the command merges the folded stacks"""
+        self.request(HTTP_X_PROFILE=profiling.make_token())
+        self.request(HTTP_X_PROFILE=profiling.make_token())
+        output = self.dir / 'merged.txt'
+
+        call_command('collect_profiles', output=str(output), clear=True,
+                     stdout=StringIO(), stderr=StringIO())
+
+        lines = output.read_text().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit()
+                            for line in lines))
+        self.assertEqual(list(self.dir.glob('*.json')), [])
+
+    def test_token_command(self):
+        """Test the command prints a valid token"""
+        out = StringIO()
+
+        call_command('collect_profiles', token=True, stdout=out)
+
+        value = out.getvalue().split(': ', 1)[1].strip()
+        self.assertTrue(profiling.valid_token(value))
@@ -0,0 +1,96 @@
+"""Tests for the pregenerated OpenAPI schema"""
+
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaTests(SimpleTestCase):
+    """Test generating and serving the schema"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        settings = override_settings(SCHEMA_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        schema._artifacts.clear()
+        self.addCleanup(schema._artifacts.clear)
+        self.client = APIClient()
+
+    def test_generate_schema_command(self):
+        """Test the command writes the artifacts of the current code"""
+        stale = self.root / 'openapi-0000.json'
+        stale.write_text('{}')
+
+        call_command('generate_schema', stdout=StringIO())
+
+        self.assertFalse(stale.exists())
+        data = json.loads(schema.artifact_path('json').read_bytes())
+        self.assertIn('/api/recipe/recipes/', data['paths'])
+        self.assertTrue(schema.artifact_path('yaml', True).exists())
+
+    def test_serves_artifact(self):
+        """Test the schema is read from the artifact, not regenerated"""
+        call_command('generate_schema', stdout=StringIO())
+        schema.artifact_path('json').write_bytes(b'{"cached": true}')
+
+        res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b'{"cached": true}')
+        self.assertEqual(res['ETag'], f'"{schema.fingerprint()}-json"')
+
+    def test_generated_when_missing(self):
+        """Test a missing artifact is generated and written"""
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith(
+            'application/vnd.oai.openapi'))
+        self.assertIn(b'openapi: 3', res.content)
+        self.assertTrue(schema.artifact_path('yaml').exists())
+
+    def test_not_modified(self):
+        """Test a matching ETag gets an empty 304 response"""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b'')
+
+    def test_gzip(self):
+        """Test clients accepting gzip get the compressed artifact"""
+        plain = self.client.get(SCHEMA_URL)
+
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertIn('Accept-Encoding', res['Vary'])
+
+    def test_etag_per_encoding(self):
+        """Test gzipped and plain responses have different ETags"""
+        plain = self.client.get(SCHEMA_URL)['ETag']
+        gzipped = self.client.get(
+            SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+
+        self.assertNotEqual(plain, gzipped)
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=gzipped)
+        self.assertEqual(res.status_code, 200)
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=gzipped,
+                              HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(res.status_code, 304)
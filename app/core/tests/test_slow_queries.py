@@ -0,0 +1,114 @@
+"""Tests for the slow query log"""
+
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from core import slow_queries
+from core.models import Recipe, SlowQuery
+
+
+class RecipeCountSerializer(serializers.Serializer):
+    count = serializers.SerializerMethodField()
+
+    def get_count(self, user):
+        return Recipe.objects.filter(user=user).count()
+
+
+class FingerprintTests(SimpleTestCase):
+    """Test normalizing SQL"""
+
+    def test_literals_normalized(self):
+        """Test queries differing by literals share a fingerprint"""
+        self.assertEqual(
+            slow_queries.fingerprint(
+                "SELECT * FROM t WHERE a = 1 AND b = 'x' AND c IN (1, 2)"),
+            slow_queries.fingerprint(
+                "SELECT * FROM t WHERE a = 25 AND b = 'y''z' AND c IN (3)"),
+        )
+
+    def test_placeholder_lists_normalized(self):
+        """Test IN lists of any length share a fingerprint"""
+        self.assertEqual(
+            slow_queries.normalize('SELECT 1 WHERE id IN (%s, %s, %s)'),
+            'SELECT ? WHERE id IN (...)',
+        )
+
+    def test_identifiers_kept(self):
+        """Test digits inside identifiers are not replaced"""
+        self.assertIn(
+            'core_event_y2024m01',
+            slow_queries.normalize('SELECT 1 FROM core_event_y2024m01'),
+        )
+
+
+@override_settings(SLOW_QUERY_MS=0.000001)
+class SlowQueryLogTests(TestCase):
+    """Test recording slow queries"""
+
+    def setUp(self):
+        slow_queries._explained.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+        Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+
+    def test_request_queries_recorded(self):
+        """Test slow queries of a request are recorded with their view"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.assertLogs('core.slow_queries', 'WARNING'):
+            client.get(reverse('recipe:recipe-list'))
+            client.get(reverse('recipe:recipe-list'))
+
+        query = SlowQuery.objects.get(sql__contains='FROM "core_recipe"')
+        self.assertEqual(query.calls, 2)
+        self.assertEqual(
+            query.origins, {'RecipeViewSet.list > RecipeSerializer': 2})
+        self.assertIn('Scan', query.plan)
+        self.assertEqual(query.params, [str(self.user.id)])
+        self.assertGreaterEqual(query.total_ms, query.max_ms)
+
+    def test_serializer_origin(self):
+        """Test queries issued by a serializer name it"""
+        with connection.execute_wrapper(slow_queries.slow_query_wrapper), \
+                self.assertLogs('core.slow_queries', 'WARNING'):
+            RecipeCountSerializer(self.user).data
+
+        query = SlowQuery.objects.get()
+        self.assertEqual(query.origins, {'RecipeCountSerializer': 1})
+
+    @override_settings(SLOW_QUERY_MS=10000)
+    def test_fast_queries_ignored(self):
+        """Test queries under the threshold are not recorded"""
+        with connection.execute_wrapper(slow_queries.slow_query_wrapper):
+            Recipe.objects.count()
+
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_report_command(self):
+        """Test the command prints the recorded queries"""
+        with connection.execute_wrapper(slow_queries.slow_query_wrapper), \
+                self.assertLogs('core.slow_queries', 'WARNING'):
+            Recipe.objects.count()
+        out = StringIO()
+
+        call_command('slow_queries', stdout=out)
+
+        self.assertIn('1 calls', out.getvalue())
+        self.assertIn('core_recipe', out.getvalue())
@@ -0,0 +1,126 @@
+"""Tests for the content addressed storage"""
+
+import hashlib
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core import media, storage
+from core.models import Recipe
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test storing and collecting uploaded files"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings = override_settings(MEDIA_ROOT=tmp.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+
+    def create_recipe(self, content):
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+        recipe.image.save('photo.JPG', ContentFile(content))
+        return recipe
+
+    def age(self, name, hours):
+        """Move the modification time of a stored file to the past"""
+        past = time.time() - hours * 3600
+        os.utime(default_storage.path(name), (past, past))
+
+    def test_named_by_content(self):
+        """Test files are stored under the hash of their content"""
+        recipe = self.create_recipe(b'photo')
+
+        digest = hashlib.sha256(b'photo').hexdigest()
+        self.assertEqual(
+            recipe.image.name,
+            f'uploads/recipe/{digest[:2]}/{digest}.jpg',
+        )
+        self.assertEqual(recipe.image.read(), b'photo')
+        self.assertTrue(media.is_immutable(recipe.image.name))
+
+    def test_duplicates_stored_once(self):
+        """Test the same content uploaded twice is stored once"""
+        first = self.create_recipe(b'photo')
+        second = self.create_recipe(b'photo')
+        other = self.create_recipe(b'other photo')
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        files = list(storage.stored_files(default_storage, 'uploads'))
+        self.assertEqual(len(files), 2)
+
+    def test_reference_counts(self):
+        """Test references are counted per stored file"""
+        first = self.create_recipe(b'photo')
+        self.create_recipe(b'photo')
+
+        counts = storage.reference_counts()
+
+        self.assertEqual(counts[first.image.name], 2)
+
+    def test_collect_garbage(self):
+        """Test only old unreferenced files are deleted"""
+        kept = self.create_recipe(b'kept')
+        dropped = self.create_recipe(b'dropped')
+        young = self.create_recipe(b'young')
+        names = [r.image.name for r in (kept, dropped, young)]
+        Recipe.objects.filter(id__in=[dropped.id, young.id]).update(image='')
+        self.age(names[0], 48)
+        self.age(names[1], 48)
+
+        deleted, size = storage.collect_garbage(
+            'uploads', grace=timedelta(hours=24))
+
+        self.assertEqual(deleted, [names[1]])
+        self.assertEqual(size, len(b'dropped'))
+        self.assertTrue(default_storage.exists(names[0]))
+        self.assertFalse(default_storage.exists(names[1]))
+        self.assertTrue(default_storage.exists(names[2]))
+
+    def test_reupload_restarts_grace(self):
+        """Test uploading an old unreferenced file again keeps it"""
+        dropped = self.create_recipe(b'photo')
+        name = dropped.image.name
+        dropped.delete()
+        self.age(name, 48)
+
+        # Saved again before the row referencing it is committed.
+        default_storage.save('uploads/recipe/photo.jpg', ContentFile(b'photo'))
+        call_command('collect_media', stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(name))
+
+    def test_collect_media_dry_run(self):
+        """Test the command only lists files in dry run mode"""
+        recipe = self.create_recipe(b'dropped')
+        name = recipe.image.name
+        recipe.delete()
+        self.age(name, 48)
+        out = StringIO()
+
+        call_command('collect_media', dry_run=True, stdout=out)
+
+        self.assertIn(name, out.getvalue())
+        self.assertTrue(default_storage.exists(name))
@@ -0,0 +1,163 @@
+"""Tests for the change stream"""
+
+import asyncio
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import stream
+from core.models import Recipe
+
+
+def scope(token=None, query=False, method='GET'):
+    headers = []
+    query_string = b''
+    if token is not None and query:
+        query_string = f'token={token}'.encode()
+    elif token is not None:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    return {
+        'type': 'http',
+        'method': method,
+        'path': '/api/stream/',
+        'headers': headers,
+        'query_string': query_string,
+    }
+
+
+def messages(body):
+    """Return the change messages of a chunk of the stream"""
+    return [
+        json.loads(line[len('data: '):])
+        for line in body.decode().splitlines() if line.startswith('data: ')
+    ]
+
+
+class LocalBrokerTests(TestCase):
+    """Test delivering messages in memory"""
+
+    @override_settings(STREAM_QUEUE_SIZE=2)
+    def test_overflow_resyncs(self):
+        """Test a full queue is replaced by a resync message"""
+        broker = stream.LocalBroker()
+
+        async def run():
+            queue = broker.subscribe(1)
+            for i in range(3):
+                broker.publish(1, {'ids': [i]})
+            await asyncio.sleep(0)
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        self.assertEqual(async_to_sync(run)(), [stream.RESYNC])
+
+
+@override_settings(STREAM_REDIS_URL=None)
+class StreamTests(TestCase):
+    """Test streaming changes to connected clients"""
+
+    def setUp(self):
+        stream._broker = None
+        # Closing would end the transaction of the test.
+        patcher = patch('core.stream.close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+        self.token = str(AccessToken.for_user(self.user))
+
+    def create_recipe(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                user=user,
+                title='Sample recipe',
+                time_minutes=10,
+                price=Decimal('5.00'),
+            )
+
+    async def connect(self, scope):
+        communicator = ApplicationCommunicator(stream.stream, scope)
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(1)
+        return communicator, start
+
+    async def disconnect(self, communicator):
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait(1)
+
+    def test_auth_required(self):
+        """Test connecting without a valid token is refused"""
+        async def run():
+            _, start = await self.connect(scope('invalid'))
+            return start['status']
+
+        self.assertEqual(async_to_sync(run)(), 401)
+
+    def test_routed_by_asgi_application(self):
+        """Test the ASGI entry point serves the stream"""
+        from app.asgi import application
+
+        async def run():
+            communicator = ApplicationCommunicator(application, scope())
+            await communicator.send_input({'type': 'http.request'})
+            return (await communicator.receive_output(1))['status']
+
+        self.assertEqual(async_to_sync(run)(), 401)
+
+    def test_changes_pushed(self):
+        """Test the user's changes are pushed to their stream"""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+            name='Other User',
+        )
+
+        async def run():
+            communicator, start = await self.connect(scope(self.token))
+            await communicator.receive_output(1)
+            await sync_to_async(self.create_recipe)(other)
+            recipe = await sync_to_async(self.create_recipe)(self.user)
+            body = (await communicator.receive_output(1))['body']
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(1)
+            return start, recipe, body
+
+        start, recipe, body = async_to_sync(run)()
+
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'),
+                      start['headers'])
+        self.assertEqual(messages(body), [
+            {'model': 'recipe', 'action': 'created', 'ids': [recipe.id]},
+        ])
+        self.assertEqual(stream.broker()._queues, {})
+
+    def test_query_token(self):
+        """Test the token can be passed as a query parameter"""
+        async def run():
+            communicator, start = await self.connect(
+                scope(self.token, query=True))
+            await self.disconnect(communicator)
+            return start['status']
+
+        self.assertEqual(async_to_sync(run)(), 200)
+
+    @override_settings(STREAM_KEEPALIVE=0.01)
+    def test_keepalive(self):
+        """Test idle streams receive keepalive comments"""
+        async def run():
+            communicator, _ = await self.connect(scope(self.token))
+            await communicator.receive_output(1)
+            body = (await communicator.receive_output(1))['body']
+            await self.disconnect(communicator)
+            return body
+
+        self.assertEqual(async_to_sync(run)(), b': keepalive\n\n')
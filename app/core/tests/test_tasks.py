@@ -0,0 +1,142 @@
+"""Tests for the background job queue"""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Job
+
+calls = []
+
+
+@tasks.task()
+def record(payload):
+    calls.append(payload)
+
+
+@tasks.task(max_attempts=2)
+def broken(payload):
+    raise RuntimeError('boom')
+
+
+@tasks.task(batch=True)
+def record_batch(payloads):
+    calls.append(payloads)
+    return [ValueError() if p.get('fail') else None for p in payloads]
+
+
+@override_settings(TASKS_EAGER=False, TASK_RETRY_DELAY=10)
+class TaskQueueTests(TestCase):
+    """Test queueing and running jobs"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_creates_job(self):
+        """Test enqueue stores the job without running it"""
+        job = tasks.enqueue(record, {'value': 1})
+
+        self.assertEqual(job.task, 'core.tests.test_tasks.record')
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(calls, [])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_enqueue_eager(self):
+        """Test eager mode runs the task immediately"""
+        tasks.enqueue(record, {'value': 1})
+
+        self.assertEqual(calls, [{'value': 1}])
+        self.assertFalse(Job.objects.exists())
+
+    def test_run_pending(self):
+        """Test due jobs are run and marked as done"""
+        done = tasks.enqueue(record, {'value': 1})
+        later = tasks.enqueue(record, {'value': 2}, delay=timedelta(hours=1))
+
+        self.assertEqual(tasks.run_pending(), 1)
+
+        self.assertEqual(calls, [{'value': 1}])
+        done.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual(done.status, Job.DONE)
+        self.assertEqual(done.attempts, 1)
+        self.assertEqual(later.status, Job.PENDING)
+
+    def test_retry_with_backoff(self):
+        """Test failed jobs are retried later then given up"""
+        job = tasks.enqueue(broken)
+
+        with self.assertLogs('core.tasks', 'WARNING'):
+            tasks.run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertIn('boom', job.last_error)
+        self.assertGreater(
+            job.run_at, timezone.now() + timedelta(seconds=5))
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'WARNING'):
+            tasks.run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_batch_task(self):
+        """Test jobs of a batch task run in one call"""
+        ok = tasks.enqueue(record_batch, {'value': 1})
+        failed = tasks.enqueue(record_batch, {'fail': True})
+
+        with self.assertLogs('core.tasks', 'WARNING'):
+            tasks.run_pending()
+
+        self.assertEqual(calls, [[{'value': 1}, {'fail': True}]])
+        ok.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertEqual(ok.status, Job.DONE)
+        self.assertEqual(failed.status, Job.PENDING)
+
+    def test_requeue_stale(self):
+        """Test jobs abandoned by a dead worker are run again"""
+        job = tasks.enqueue(record)
+        Job.objects.filter(id=job.id).update(
+            status=Job.RUNNING,
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+
+        self.assertEqual(tasks.requeue_stale(timeout=60), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+
+    def test_stale_out_of_attempts(self):
+        """Test a stale job at its attempt cap fails instead of rerunning"""
+        job = tasks.enqueue(record)
+        Job.objects.filter(id=job.id).update(
+            status=Job.RUNNING,
+            attempts=job.max_attempts,
+            locked_at=timezone.now() - timedelta(hours=1),
+        )
+
+        tasks.requeue_stale(timeout=60)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIn('Worker died', job.last_error)
+        self.assertEqual(tasks.run_pending(), 0)
+
+    def test_run_worker_once(self):
+        """Test the worker command drains the queue"""
+        tasks.enqueue(record, {'value': 1})
+        tasks.enqueue(record, {'value': 2})
+
+        call_command('run_worker', once=True, stdout=StringIO())
+
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
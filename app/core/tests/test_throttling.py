@@ -0,0 +1,115 @@
+"""Tests for the cache backed rate limiting"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from core.throttling import ScopedRateThrottle
+
+TOKEN_URL = reverse('user:jwt-create')
+RATES = {'anon': '3/min', 'user': '5/min', 'auth': '2/min', 'test': '3/min'}
+
+
+class ScopedView(APIView):
+    permission_classes = []
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'test'
+
+    def get(self, request):
+        return Response()
+
+
+@patch('rest_framework.throttling.SimpleRateThrottle.THROTTLE_RATES', RATES)
+class SlidingWindowTests(SimpleTestCase):
+    """Test the sliding window counter"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.now = 600.0
+        patcher = patch.object(
+            ScopedRateThrottle, 'timer', lambda throttle: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self):
+        return ScopedView.as_view()(self.factory.get('/'))
+
+    def test_limit_reached(self):
+        """Test requests over the rate are refused"""
+        codes = [self.request().status_code for _ in range(4)]
+
+        self.assertEqual(codes, [200, 200, 200, 429])
+
+    def test_previous_window_weighted(self):
+        """Test requests of the previous window still count partially"""
+        for _ in range(3):
+            self.request()
+
+        # Two thirds of the previous window overlap the last minute.
+        self.now += 60 + 20
+        allowed = self.request()
+        refused = self.request()
+
+        self.assertEqual(allowed.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            refused.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(refused['Retry-After'], '20')
+
+        self.now += 20
+        self.assertEqual(self.request().status_code, status.HTTP_200_OK)
+
+    def test_no_scope_not_throttled(self):
+        """Test views without a throttle scope are not limited"""
+        with patch.object(ScopedView, 'throttle_scope', None):
+            codes = {self.request().status_code for _ in range(5)}
+
+        self.assertEqual(codes, {200})
+
+
+@patch('rest_framework.throttling.SimpleRateThrottle.THROTTLE_RATES', RATES)
+class ApiThrottleTests(TestCase):
+    """Test the throttles configured on the API"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_per_user_rate(self):
+        """Test each user has its own allowance"""
+        user1 = get_user_model().objects.create_user(
+            email='user1@example.com', password='testpass123', name='One')
+        user2 = get_user_model().objects.create_user(
+            email='user2@example.com', password='testpass123', name='Two')
+        url = reverse('recipe:recipe-list')
+
+        self.client.force_authenticate(user1)
+        codes = [self.client.get(url).status_code for _ in range(6)]
+        self.client.force_authenticate(user2)
+        other = self.client.get(url).status_code
+
+        self.assertEqual(codes[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(codes[:5], [status.HTTP_200_OK] * 5)
+        self.assertEqual(other, status.HTTP_200_OK)
+
+    def test_auth_endpoint_throttled(self):
+        """Test token requests are limited by the auth rate"""
+        payload = {'email': 'nobody@example.com', 'password': 'wrong'}
+
+        codes = [
+            self.client.post(TOKEN_URL, payload).status_code
+            for _ in range(3)
+        ]
+
+        self.assertEqual(codes, [
+            status.HTTP_401_UNAUTHORIZED,
+            status.HTTP_401_UNAUTHORIZED,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        ])
@@ -0,0 +1,78 @@
+"""Rate limiting backed by the shared cache.
+
+DRF's throttles keep a list of request timestamps per client in the cache
+and rewrite it on every request, a read-modify-write that loses updates
+between worker processes. These throttles instead count requests with the
+cache's atomic add/incr, in a sliding window made of two fixed windows:
+the previous window's count is weighted by how much of it still overlaps
+the last `duration` seconds.
+"""
+
+from rest_framework import throttling
+
+
+class SlidingWindowMixin:
+    """Count requests with atomic cache operations"""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window, offset = divmod(now, self.duration)
+        key = f'{self.key}:{int(window)}'
+        count = self.increment(key)
+        previous = self.cache.get(f'{self.key}:{int(window) - 1}', 0)
+        weight = 1 - offset / self.duration
+        if previous * weight + count <= self.num_requests:
+            return True
+
+        # Refused requests do not use up the allowance.
+        self.cache.decr(key)
+
+        # Wait until enough of the previous window has slid out, or for
+        # the next window when the current one alone is over the limit.
+        if previous and count <= self.num_requests:
+            needed = (previous * weight + count - self.num_requests)
+            self.wait_seconds = needed / previous * self.duration
+        else:
+            self.wait_seconds = self.duration - offset
+        return self.throttle_failure()
+
+    def increment(self, key):
+        """Atomically increment and return the counter stored at key"""
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Only one process creates the counter, the others increment it.
+            if self.cache.add(key, 1, self.duration * 2):
+                return 1
+            return self.cache.incr(key)
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonRateThrottle(SlidingWindowMixin, throttling.AnonRateThrottle):
+    """Limit anonymous requests per IP address"""
+
+
+class UserRateThrottle(SlidingWindowMixin, throttling.UserRateThrottle):
+    """Limit requests per user, or per IP address when anonymous"""
+
+
+class ScopedRateThrottle(SlidingWindowMixin, throttling.ScopedRateThrottle):
+    """Limit requests to views declaring a `throttle_scope`"""
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class DashboardConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'dashboard'
+
+    def ready(self):
+        from core.changes import data_changed
+        from dashboard.cache import dashboard_changed
+
+        data_changed.connect(dashboard_changed)
@@ -0,0 +1,66 @@
+"""Per user cache of the dashboard.
+
+Every user has a version number, bumped whenever one of their recipes,
+tags, ingredients or events changes, see core.changes. The dashboard is
+cached under the current version, so a change makes the previous entry
+unreachable even when it is written by a request that started before the
+change.
+"""
+
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def _version_key(user_id):
+    return f'dashboard:version:{user_id}'
+
+
+def _data_key(user_id, version):
+    return f'dashboard:{user_id}:{version}'
+
+
+def version(user_id):
+    """Return the current dashboard version of a user"""
+    key = _version_key(user_id)
+    current = cache.get(key)
+    if current is None:
+        # Start from the clock so an evicted version is never reused.
+        cache.add(key, time.time_ns(), None)
+        current = cache.get(key)
+    return current
+
+
+def get_or_build(user_id, build):
+    """Return the cached dashboard of a user and its ETag.
+
+    build() is called on a miss and must return the serialized data.
+    """
+    key = _data_key(user_id, version(user_id))
+    entry = cache.get(key)
+    if entry is None:
+        data = build()
+        etag = hashlib.md5(
+            json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+        ).hexdigest()
+        entry = {'etag': f'"{etag}"', 'data': data}
+        cache.set(key, entry, settings.DASHBOARD_CACHE_TIMEOUT)
+    return entry['data'], entry['etag']
+
+
+def invalidate(user_id):
+    """Make the cached dashboard of a user stale"""
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        # No version, so nothing cached either.
+        pass
+
+
+def dashboard_changed(sender, user_id, **kwargs):
+    """Invalidate the dashboard of the owner of changed data"""
+    invalidate(user_id)
@@ -0,0 +1,18 @@
+"""serializers for the dashboard api"""
+
+from rest_framework import serializers
+
+from event.serializers import EventSerializer
+from recipe.serializers import (
+    IngredientSerializer,
+    RecipeSerializer,
+    TagSerializer,
+)
+
+
+class DashboardSerializer(serializers.Serializer):
+    """Serializer for the home screen of a user"""
+    recipes = RecipeSerializer(many=True, read_only=True)
+    tags = TagSerializer(many=True, read_only=True)
+    ingredients = IngredientSerializer(many=True, read_only=True)
+    events = EventSerializer(many=True, read_only=True)
@@ -0,0 +1,174 @@
+""" tests for the dashboard api"""
+
+from decimal import Decimal
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Event, Ingredient, Recipe, Tag
+from core.testing import QueryBudgetTestMixin
+from dashboard.views import DashboardViewSet
+
+DASHBOARD_URL = reverse('dashboard:dashboard')
+SHIFT_URL = reverse('event:event-shift')
+
+
+def create_user(email='user@example.com'):
+    """Create and return a new user"""
+    return get_user_model().objects.create_user(
+        email=email,
+        password='testpass123',
+        name='Test User',
+    )
+
+
+def create_recipe(user, title='Sample recipe'):
+    """Create a recipe with a tag and an ingredient"""
+    recipe = Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=10,
+        price=Decimal('5.25'),
+    )
+    recipe.tags.add(Tag.objects.create(user=user, name=f'{title} tag'))
+    recipe.ingredients.add(
+        Ingredient.objects.create(user=user, name=f'{title} ingredient'))
+    return recipe
+
+
+def create_event(user, recipe, start_time):
+    """Create an event of one hour for the recipe"""
+    return Event.objects.create(
+        user=user,
+        recipe=recipe,
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=1),
+    )
+
+
+class PublicDashboardApiTests(TestCase):
+    """Test unauthenticated requests"""
+
+    def test_auth_required(self):
+        res = APIClient().get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateDashboardApiTests(QueryBudgetTestMixin, TestCase):
+    """Test the dashboard of an authenticated user"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.now = timezone.now()
+
+    def test_dashboard(self):
+        """Test the dashboard returns the user's data only"""
+        recipe = create_recipe(self.user)
+        create_event(self.user, recipe, self.now + timedelta(days=1))
+        create_event(self.user, recipe, self.now - timedelta(days=1))
+        other = create_user('other@example.com')
+        create_event(other, create_recipe(other), self.now + timedelta(days=1))
+
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['recipes']], [recipe.id])
+        self.assertEqual(
+            res.data['recipes'][0]['tags'][0]['name'], 'Sample recipe tag')
+        self.assertEqual(res.data['tags'][0]['recipe_count'], 1)
+        self.assertEqual(res.data['ingredients'][0]['recipe_count'], 1)
+        self.assertEqual(len(res.data['events']), 1)
+        self.assertEqual(res.data['events'][0]['user'], self.user.id)
+
+    def test_cached(self):
+        """Test the dashboard is cached until the user's data changes"""
+        create_recipe(self.user)
+        self.client.get(DASHBOARD_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(DASHBOARD_URL)
+        self.assertEqual(len(res.data['recipes']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_recipe(self.user, 'Second recipe')
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(len(res.data['recipes']), 2)
+
+    def test_other_user_changes_keep_cache(self):
+        """Test changes of another user do not invalidate the dashboard"""
+        self.client.get(DASHBOARD_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_recipe(create_user('other@example.com'))
+
+        with self.assertNumQueries(1):
+            self.client.get(DASHBOARD_URL)
+
+    def test_bulk_changes_invalidate(self):
+        """Test updates sending no signals invalidate the dashboard"""
+        event = create_event(
+            self.user, create_recipe(self.user), self.now + timedelta(days=1))
+        before = self.client.get(DASHBOARD_URL).data['events'][0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                SHIFT_URL,
+                {'ids': [event.id], 'delta': '01:00:00'},
+                format='json',
+            )
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertNotEqual(
+            res.data['events'][0]['start_time'], before['start_time'])
+
+    def test_delete_invalidates(self):
+        """Test deleting through the api invalidates the dashboard"""
+        recipe = create_recipe(self.user)
+        self.client.get(DASHBOARD_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse('recipe:recipe-detail', args=[recipe.id]))
+        res = self.client.get(DASHBOARD_URL)
+
+        self.assertEqual(res.data['recipes'], [])
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match returns 304"""
+        etag = self.client.get(DASHBOARD_URL)['ETag']
+
+        res = self.client.get(DASHBOARD_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_query_budget(self):
+        """Test the queries do not grow with the user's data"""
+        def seed(count):
+            recipes = [create_recipe(self.user, f'Recipe {self.seeded + i}')
+                       for i in range(count)]
+            for recipe in recipes:
+                create_event(
+                    self.user, recipe, self.now + timedelta(days=1))
+            self.seeded += count
+
+        def request():
+            cache.clear()
+            return self.client.get(DASHBOARD_URL)
+
+        self.seeded = 0
+        self.assertWithinBudget(DashboardViewSet, 'list', request, seed)
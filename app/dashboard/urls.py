@@ -0,0 +1,15 @@
+"""urls mapping for dashboard app"""
+
+from django.urls import path
+
+from dashboard import views
+
+app_name = 'dashboard'
+
+urlpatterns = [
+    path(
+        '',
+        views.DashboardViewSet.as_view({'get': 'list'}),
+        name='dashboard',
+    ),
+]
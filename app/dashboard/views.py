@@ -0,0 +1,58 @@
+"""Views for the dashboard api"""
+
+from django.conf import settings
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema
+from rest_framework import status, viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from core.budgets import Budget, QueryBudgetMixin
+from core.models import Event, Ingredient, Recipe, Tag
+from dashboard import cache
+from dashboard.serializers import DashboardSerializer
+from recipe.search import recipe_count
+
+
+class DashboardViewSet(QueryBudgetMixin, viewsets.ViewSet):
+    """Return everything the home screen shows in one request"""
+    authentication_classes = (JWTAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    # The user, the recipes with their tags and ingredients, all tags and
+    # ingredients, the events. Only the user when cached.
+    query_budgets = {'list': Budget(queries=7, ms=500)}
+
+    def _build(self):
+        user = self.request.user
+        recipes = Recipe.objects.filter(user=user).prefetch_related(
+            'tags', 'ingredients',
+        ).order_by('-id')[:settings.DASHBOARD_RECIPES]
+        tags = Tag.objects.filter(user=user).annotate(
+            recipe_count=recipe_count(Recipe.tags.through, 'tag_id'),
+        ).order_by('-name')
+        ingredients = Ingredient.objects.filter(user=user).annotate(
+            recipe_count=recipe_count(
+                Recipe.ingredients.through, 'ingredient_id'),
+        ).order_by('-name')
+        events = Event.objects.filter(
+            user=user,
+            start_time__gte=timezone.now(),
+        ).order_by('start_time', 'id')[:settings.DASHBOARD_EVENTS]
+
+        return DashboardSerializer({
+            'recipes': recipes,
+            'tags': tags,
+            'ingredients': ingredients,
+            'events': events,
+        }).data
+
+    @extend_schema(responses=DashboardSerializer)
+    def list(self, request):
+        """Return recent recipes, tags, ingredients and upcoming events"""
+        data, etag = cache.get_or_build(request.user.id, self._build)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if request.headers.get('If-None-Match') == etag:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
@@ -0,0 +1,137 @@
+"""Meal planner filling a date range with recipes under constraints"""
+
+import random
+from array import array
+from bisect import bisect_right
+
+from core.models import Recipe
+
+
+class PlanningError(Exception):
+    """Raised when no plan satisfies the requested constraints"""
+
+
+class RecipeSnapshot:
+    """Array backed, read only copy of the recipes owned by a user.
+
+    Recipes are stored sorted by price so the planner can find every
+    recipe fitting in the remaining budget with a single bisect.
+    """
+
+    def __init__(self, rows, recipe_tags):
+        rows = sorted(rows, key=lambda row: (row[3], row[0]))
+        self.ids = array('q', (row[0] for row in rows))
+        self.titles = [row[1] for row in rows]
+        self.times = array('l', (row[2] for row in rows))
+        self.prices = array('q', (int(row[3] * 100) for row in rows))
+
+        position = {recipe_id: i for i, recipe_id in enumerate(self.ids)}
+        self._tag_bits = {}
+        # Plain ints, a user may have more tags than a machine word has
+        # bits.
+        self.tag_masks = [0] * len(rows)
+        for recipe_id, tag_id in recipe_tags:
+            bit = self._tag_bits.setdefault(tag_id, 1 << len(self._tag_bits))
+            self.tag_masks[position[recipe_id]] |= bit
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def for_user(cls, user):
+        """Load the snapshot of a user's recipes in two queries"""
+        rows = Recipe.objects.filter(user=user).values_list(
+            'id', 'title', 'time_minutes', 'price',
+        )
+        recipe_tags = Recipe.tags.through.objects.filter(
+            recipe__user=user,
+        ).values_list('recipe_id', 'tag_id')
+        return cls(list(rows), list(recipe_tags))
+
+    def tag_mask(self, tag_ids):
+        """Return the bit mask of tag ids, or None if a tag is unused"""
+        mask = 0
+        for tag_id in tag_ids:
+            if tag_id not in self._tag_bits:
+                return None
+            mask |= self._tag_bits[tag_id]
+        return mask
+
+
+def plan_meals(snapshot, days, slots_per_day, max_time_minutes=None,
+               budget=None, tag_ids=(), no_repeat_days=0, rng=None):
+    """Choose a recipe for every slot of every day.
+
+    Returns a list of ``(day, slot, position)`` tuples where ``position``
+    indexes the snapshot arrays. ``budget`` is the total price allowed for
+    the whole plan and a recipe is never reused within ``no_repeat_days``.
+    """
+    rng = rng or random.Random()
+    required = snapshot.tag_mask(tag_ids)
+    if required is None:
+        raise PlanningError('No recipe has all the requested tags.')
+
+    # Positions stay sorted by price since the snapshot arrays are.
+    candidates = array('l', (
+        i for i in range(len(snapshot))
+        if (max_time_minutes is None or snapshot.times[i] <= max_time_minutes)
+        and snapshot.tag_masks[i] & required == required
+    ))
+    if not candidates:
+        raise PlanningError('No recipe matches the requested constraints.')
+    prices = array('q', (snapshot.prices[i] for i in candidates))
+
+    # Recipes used within no_repeat_days days of each other are distinct,
+    # so the cheapest way to fill the rest of the plan cycles through the
+    # `cycle` cheapest candidates.
+    cycle = min(len(prices), max(no_repeat_days, 1) * slots_per_day)
+    cycle_prices = [0]
+    for price in prices[:cycle]:
+        cycle_prices.append(cycle_prices[-1] + price)
+
+    def reserve(slots):
+        """Return the lowest total price of filling slots more slots"""
+        laps, rest = divmod(slots, cycle)
+        return laps * cycle_prices[cycle] + cycle_prices[rest]
+
+    remaining = None if budget is None else int(budget * 100)
+    last_used = {}
+    plan = []
+    total = days * slots_per_day
+    for n in range(total):
+        day, slot = divmod(n, slots_per_day)
+        if remaining is None:
+            limit = len(candidates)
+        else:
+            # Keep enough money for the cheapest completion of the plan.
+            # It ignores the recipes used just before, a tight budget with
+            # no_repeat_days can still fail when those are the cheapest.
+            cap = remaining - reserve(total - n - 1)
+            limit = bisect_right(prices, cap)
+        choice = _pick(candidates, limit, last_used, day, no_repeat_days, rng)
+        if choice is None:
+            raise PlanningError(
+                'Not enough recipes to fill the plan with these constraints.'
+            )
+        last_used[candidates[choice]] = day
+        if remaining is not None:
+            remaining -= prices[choice]
+        plan.append((day, slot, candidates[choice]))
+
+    return plan
+
+
+def _pick(candidates, limit, last_used, day, no_repeat_days, rng):
+    """Return a random index below limit not used in the last days"""
+    def available(i):
+        used = last_used.get(candidates[i])
+        return used is None or day - used >= no_repeat_days
+
+    # Random probing finds a free recipe almost immediately unless the
+    # candidate pool is nearly exhausted, then fall back to a full scan.
+    for _ in range(min(limit, 16)):
+        i = rng.randrange(limit)
+        if available(i):
+            return i
+    free = [i for i in range(limit) if available(i)]
+    return rng.choice(free) if free else None
@@ -1,3 +1,5 @@
+from datetime import time
+
 from rest_framework import serializers
 from core.models import Event
 
@@ -15,3 +17,120 @@ class EventSerializer(serializers.ModelSerializer):
         title = recipe.title if recipe else None
         validated_data['title'] = title
         return super().create(validated_data)
+
+
+class MealPlanSerializer(serializers.Serializer):
+    """Serializer for the constraints of a generated meal plan"""
+    MAX_DAYS = 366
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    slots = serializers.ListField(
+        child=serializers.TimeField(),
+        min_length=1,
+        default=[time(12, 0), time(19, 0)],
+    )
+    slot_duration = serializers.IntegerField(min_value=1, default=60)
+    max_time_minutes = serializers.IntegerField(min_value=1, required=False)
+    budget = serializers.DecimalField(
+        max_digits=9,
+        decimal_places=2,
+        min_value=0,
+        required=False,
+    )
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
+        default=list,
+    )
+    no_repeat_days = serializers.IntegerField(min_value=0, default=7)
+    seed = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        days = (attrs['end_date'] - attrs['start_date']).days + 1
+        if days < 1:
+            raise serializers.ValidationError(
+                'end_date must not be before start_date.'
+            )
+        if days > self.MAX_DAYS:
+            raise serializers.ValidationError(
+                f'A plan cannot span more than {self.MAX_DAYS} days.'
+            )
+        attrs['slots'] = sorted(set(attrs['slots']))
+        return attrs
+
+
+class EventFilterSerializer(serializers.Serializer):
+    """Serializer for the date range limiting listed events"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+
+class EventStatsQuerySerializer(EventFilterSerializer):
+    """Serializer for the query parameters of the statistics endpoint"""
+    period = serializers.ChoiceField(
+        choices=('day', 'week', 'month'),
+        default='week',
+    )
+    group_by = serializers.ChoiceField(choices=('tag',), required=False)
+
+
+class EventStatsSerializer(serializers.Serializer):
+    """Serializer for aggregated spend and cooking time per period"""
+    period = serializers.DateTimeField()
+    tag = serializers.IntegerField(allow_null=True, required=False)
+    tag_name = serializers.CharField(allow_null=True, required=False)
+    events = serializers.IntegerField()
+    total_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+    total_time_minutes = serializers.IntegerField()
+
+
+class BulkEventItemSerializer(serializers.Serializer):
+    """Serializer for one event of a bulk creation"""
+    recipe = serializers.IntegerField()
+    description = serializers.CharField(allow_blank=True, default='')
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+
+
+class BulkEventSerializer(serializers.Serializer):
+    """Serializer for creating many events at once"""
+    MAX_EVENTS = 500
+
+    events = BulkEventItemSerializer(many=True, allow_empty=False)
+
+    def validate_events(self, events):
+        if len(events) > self.MAX_EVENTS:
+            raise serializers.ValidationError(
+                f'Cannot create more than {self.MAX_EVENTS} events at once.'
+            )
+        return events
+
+
+class ShiftEventsSerializer(serializers.Serializer):
+    """Serializer for moving events by a time delta"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+    )
+    delta = serializers.DurationField()
+
+
+class CopyEventsSerializer(serializers.Serializer):
+    """Serializer for copying a date range of events onto later weeks"""
+    MAX_WEEKS = 52
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    weeks = serializers.IntegerField(min_value=1, max_value=MAX_WEEKS)
+
+    def validate(self, attrs):
+        days = (attrs['end_date'] - attrs['start_date']).days + 1
+        if days < 1:
+            raise serializers.ValidationError(
+                'end_date must not be before start_date.'
+            )
+        if days > 7:
+            raise serializers.ValidationError(
+                'Only up to a week of events can be copied.'
+            )
+        return attrs
@@ -0,0 +1,187 @@
+""" tests for the bulk event operations"""
+
+from decimal import Decimal
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import changes
+from core.models import Event, Recipe
+
+BULK_URL = reverse('event:event-bulk')
+SHIFT_URL = reverse('event:event-shift')
+COPY_URL = reverse('event:event-copy')
+
+
+def create_user(email='test@event.com'):
+    """Create and return a new user"""
+    return get_user_model().objects.create_user(
+        email=email,
+        password='testpass',
+        name='Test User',
+    )
+
+
+def create_recipe(user, **params):
+    """Create a sample recipe"""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def create_event(user, recipe, start_time):
+    """Create an event of one hour for the recipe"""
+    return Event.objects.create(
+        user=user,
+        recipe=recipe,
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=1),
+    )
+
+
+def day(day_of_month, hour=12):
+    """Return an aware datetime in january 2024"""
+    return timezone.make_aware(datetime(2024, 1, day_of_month, hour))
+
+
+class BulkEventApiTests(TestCase):
+    """Test the bulk event endpoints"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user, title='Lasagna')
+
+    def test_bulk_create(self):
+        """Test many events are created with a bounded number of queries"""
+        other_recipe = create_recipe(user=self.user, title='Soup')
+        payload = {'events': [
+            {
+                'recipe': recipe.id,
+                'start_time': day(i),
+                'end_time': day(i) + timedelta(hours=1),
+            }
+            for i in range(1, 21)
+            for recipe in (self.recipe, other_recipe)
+        ]}
+
+        with self.assertNumQueries(4):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 40)
+        self.assertEqual(
+            Event.objects.filter(user=self.user, title='Soup').count(), 20)
+
+    def test_bulk_create_other_users_recipe(self):
+        """Test events cannot be created for another user's recipe"""
+        other_recipe = create_recipe(user=create_user('other@event.com'))
+        payload = {'events': [
+            {
+                'recipe': recipe.id,
+                'start_time': day(1),
+                'end_time': day(1) + timedelta(hours=1),
+            }
+            for recipe in (self.recipe, other_recipe)
+        ]}
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Event.objects.exists())
+
+    def test_shift_events(self):
+        """Test events are moved by the delta in a single update"""
+        event1 = create_event(self.user, self.recipe, day(1))
+        event2 = create_event(self.user, self.recipe, day(2))
+        untouched = create_event(self.user, self.recipe, day(3))
+        payload = {'ids': [event1.id, event2.id], 'delta': '1 02:00:00'}
+
+        with self.assertNumQueries(1):
+            res = self.client.post(SHIFT_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['updated'], 2)
+        for event, expected in ((event1, day(2, 14)), (event2, day(3, 14))):
+            event.refresh_from_db()
+            self.assertEqual(event.start_time, expected)
+            self.assertEqual(event.end_time, expected + timedelta(hours=1))
+        untouched.refresh_from_db()
+        self.assertEqual(untouched.start_time, day(3))
+
+    def test_shift_other_users_events(self):
+        """Test events of another user are not moved"""
+        other = create_user('other@event.com')
+        event = create_event(other, create_recipe(user=other), day(1))
+        payload = {'ids': [event.id], 'delta': '01:00:00'}
+
+        res = self.client.post(SHIFT_URL, payload, format='json')
+
+        self.assertEqual(res.data['updated'], 0)
+        event.refresh_from_db()
+        self.assertEqual(event.start_time, day(1))
+
+    def test_shift_notifies_moved_events(self):
+        """Test only the events actually moved are notified"""
+        mine = create_event(self.user, self.recipe, day(1))
+        other = create_user('other@event.com')
+        theirs = create_event(other, create_recipe(user=other), day(1))
+        sent = []
+
+        def receiver(sender, user_id, action, ids, **kwargs):
+            sent.append((sender, user_id, action, ids))
+
+        changes.data_changed.connect(receiver)
+        self.addCleanup(changes.data_changed.disconnect, receiver)
+        payload = {'ids': [mine.id, theirs.id, theirs.id + 1000],
+                   'delta': '01:00:00'}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(SHIFT_URL, payload, format='json')
+
+        self.assertEqual(sent, [(Event, self.user.id, 'updated', [mine.id])])
+
+    def test_copy_week(self):
+        """Test a week of events is copied onto the following weeks"""
+        create_event(self.user, self.recipe, day(1))
+        create_event(self.user, self.recipe, day(7, 19))
+        create_event(self.user, self.recipe, day(8))
+        payload = {
+            'start_date': '2024-01-01',
+            'end_date': '2024-01-07',
+            'weeks': 3,
+        }
+
+        res = self.client.post(COPY_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 6)
+        starts = set(Event.objects.filter(
+            user=self.user).values_list('start_time', flat=True))
+        for week in range(1, 4):
+            self.assertIn(day(1) + timedelta(weeks=week), starts)
+            self.assertIn(day(7, 19) + timedelta(weeks=week), starts)
+
+    def test_copy_range_too_long(self):
+        """Test copying more than a week is rejected"""
+        payload = {
+            'start_date': '2024-01-01',
+            'end_date': '2024-01-10',
+            'weeks': 1,
+        }
+
+        res = self.client.post(COPY_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
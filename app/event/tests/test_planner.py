@@ -0,0 +1,219 @@
+""" tests for the meal planner"""
+
+import random
+from decimal import Decimal
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event, Recipe, Tag
+
+from event.planner import PlanningError, RecipeSnapshot, plan_meals
+
+GENERATE_URL = reverse('event:event-generate')
+
+
+def create_recipe(user, **params):
+    """Create a sample recipe"""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def make_snapshot(count, tagged=()):
+    """Build a snapshot of count recipes priced 1.00, 2.00, ..."""
+    rows = [
+        (i, f'Recipe {i}', i * 5, Decimal(i))
+        for i in range(1, count + 1)
+    ]
+    return RecipeSnapshot(rows, [(recipe_id, 1) for recipe_id in tagged])
+
+
+class PlannerTests(SimpleTestCase):
+    """Test the in-memory planning algorithm"""
+
+    def test_plan_fills_every_slot(self):
+        """Test a plan contains one recipe per slot and day"""
+        snapshot = make_snapshot(20)
+
+        plan = plan_meals(snapshot, 7, 2, rng=random.Random(1))
+
+        self.assertEqual(len(plan), 14)
+        self.assertEqual(
+            [(day, slot) for day, slot, _ in plan],
+            [(day, slot) for day in range(7) for slot in range(2)],
+        )
+
+    def test_plan_respects_time_and_tags(self):
+        """Test only quick enough recipes with the tags are chosen"""
+        snapshot = make_snapshot(20, tagged=(2, 3, 4, 15))
+
+        plan = plan_meals(
+            snapshot, 3, 1, max_time_minutes=20, tag_ids=[1],
+            rng=random.Random(1),
+        )
+
+        chosen = {snapshot.ids[position] for _, _, position in plan}
+        self.assertTrue(chosen <= {2, 3, 4})
+
+    def test_plan_respects_budget(self):
+        """Test the total price of the plan stays within budget"""
+        snapshot = make_snapshot(50)
+
+        plan = plan_meals(
+            snapshot, 10, 2, budget=Decimal('60.00'), rng=random.Random(1),
+        )
+
+        total = sum(snapshot.prices[position] for _, _, position in plan)
+        self.assertLessEqual(total, 6000)
+
+    def test_plan_avoids_repeats(self):
+        """Test a recipe is not repeated within no_repeat_days"""
+        snapshot = make_snapshot(7)
+
+        plan = plan_meals(
+            snapshot, 14, 1, no_repeat_days=7, rng=random.Random(1),
+        )
+
+        for day, _, position in plan:
+            recent = [p for d, _, p in plan if day - 7 < d < day]
+            self.assertNotIn(position, recent)
+
+    def test_plan_budget_reserve_respects_repeats(self):
+        """Test the budget leaves room for the repeats no_repeat_days bans"""
+        rows = [(1, 'Cheap', 5, Decimal(1)), (2, 'Dear', 5, Decimal(10))]
+        snapshot = RecipeSnapshot(rows, [])
+
+        for seed in range(20):
+            plan = plan_meals(
+                snapshot, 3, 1, budget=Decimal(12), no_repeat_days=2,
+                rng=random.Random(seed),
+            )
+
+            self.assertEqual(
+                [snapshot.ids[position] for _, _, position in plan],
+                [1, 2, 1],
+            )
+
+    def test_plan_with_many_tags(self):
+        """Test recipes using more tags than a machine word has bits"""
+        rows = [(i, f'Recipe {i}', 5, Decimal(i)) for i in range(1, 11)]
+        recipe_tags = [
+            (recipe_id, tag_id)
+            for recipe_id in range(1, 11)
+            for tag_id in range(recipe_id, 100, 10)
+        ]
+        snapshot = RecipeSnapshot(rows, recipe_tags)
+
+        plan = plan_meals(snapshot, 2, 1, tag_ids=[99],
+                          rng=random.Random(1))
+
+        self.assertEqual(
+            {snapshot.ids[position] for _, _, position in plan}, {9})
+
+    def test_plan_impossible_raises(self):
+        """Test an error is raised when constraints cannot be met"""
+        snapshot = make_snapshot(3)
+
+        with self.assertRaises(PlanningError):
+            plan_meals(snapshot, 5, 1, no_repeat_days=5)
+        with self.assertRaises(PlanningError):
+            plan_meals(snapshot, 5, 1, budget=Decimal('4.00'))
+        with self.assertRaises(PlanningError):
+            plan_meals(snapshot, 1, 1, tag_ids=[42])
+
+
+class GenerateMealPlanApiTests(TestCase):
+    """Test the meal plan generation endpoint"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@event.com',
+            password='testpass',
+            name='Test User',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_generate_creates_events(self):
+        """Test events are created for every slot in the range"""
+        for i in range(20):
+            create_recipe(user=self.user, title=f'Recipe {i}')
+        payload = {
+            'start_date': date(2024, 1, 1),
+            'end_date': date(2024, 1, 7),
+            'slots': ['12:00', '19:30'],
+            'seed': 1,
+        }
+
+        res = self.client.post(GENERATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 14)
+        events = Event.objects.filter(user=self.user)
+        self.assertEqual(events.count(), 14)
+        for event in events.select_related('recipe'):
+            self.assertEqual(event.title, event.recipe.title)
+            self.assertEqual(event.recipe.user, self.user)
+
+    def test_generate_with_required_tag(self):
+        """Test only recipes with the required tag are scheduled"""
+        tag = Tag.objects.create(user=self.user, name='Vegetarian')
+        veggie = create_recipe(user=self.user, title='Ratatouille')
+        veggie.tags.add(tag)
+        create_recipe(user=self.user, title='Steak')
+        payload = {
+            'start_date': date(2024, 1, 1),
+            'end_date': date(2024, 1, 3),
+            'slots': ['19:00'],
+            'tags': [tag.id],
+            'no_repeat_days': 0,
+        }
+
+        res = self.client.post(GENERATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipes = set(
+            Event.objects.filter(user=self.user).values_list(
+                'recipe', flat=True)
+        )
+        self.assertEqual(recipes, {veggie.id})
+
+    def test_generate_ignores_other_users_recipes(self):
+        """Test an error is returned when the user has no recipes"""
+        other = get_user_model().objects.create_user(
+            email='other@event.com',
+            password='testpass',
+            name='Other User',
+        )
+        create_recipe(user=other)
+        payload = {
+            'start_date': date(2024, 1, 1),
+            'end_date': date(2024, 1, 1),
+        }
+
+        res = self.client.post(GENERATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Event.objects.exists())
+
+    def test_generate_invalid_range(self):
+        """Test end_date before start_date is rejected"""
+        payload = {
+            'start_date': date(2024, 1, 7),
+            'end_date': date(2024, 1, 1),
+        }
+
+        res = self.client.post(GENERATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,81 @@
+""" tests for the query budgets of the event api"""
+
+from decimal import Decimal
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Event, Recipe, Tag
+from core.testing import QueryBudgetTestMixin
+from event.views import EventViewSet
+
+EVENTS_URL = reverse('event:event-list')
+STATS_URL = reverse('event:event-stats')
+SHIFT_URL = reverse('event:event-shift')
+
+
+class EventQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the event api stays within its query budgets"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@event.com',
+            password='testpass',
+            name='Test User',
+        )
+        self.client = APIClient()
+        # Authenticate with a token to count the user lookup as well.
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.25'),
+        )
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        self.start = timezone.make_aware(datetime(2024, 1, 1, 12))
+        self.events = []
+
+    def seed_events(self, count):
+        self.events += Event.objects.bulk_create(
+            Event(
+                user=self.user,
+                recipe=self.recipe,
+                start_time=self.start + timedelta(hours=i),
+                end_time=self.start + timedelta(hours=i + 1),
+            )
+            for i in range(count)
+        )
+
+    def test_list(self):
+        """Test listing events"""
+        self.assertWithinBudget(
+            EventViewSet, 'list',
+            lambda: self.client.get(EVENTS_URL),
+            self.seed_events,
+        )
+
+    def test_stats(self):
+        """Test the event statistics grouped by tag"""
+        self.assertWithinBudget(
+            EventViewSet, 'stats',
+            lambda: self.client.get(STATS_URL, {'group_by': 'tag'}),
+            self.seed_events,
+        )
+
+    def test_shift(self):
+        """Test shifting many events at once"""
+        def shift():
+            ids = [event.id for event in self.events]
+            return self.client.post(
+                SHIFT_URL, {'ids': ids, 'delta': '01:00:00'}, format='json')
+
+        self.assertWithinBudget(EventViewSet, 'shift', shift,
+                                self.seed_events)
@@ -0,0 +1,130 @@
+""" tests for the event statistics api"""
+
+from decimal import Decimal
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Event, Recipe, Tag
+
+STATS_URL = reverse('event:event-stats')
+
+
+def create_recipe(user, **params):
+    """Create a sample recipe"""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.25'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def create_event(user, recipe, start_time):
+    """Create an event of one hour for the recipe"""
+    return Event.objects.create(
+        user=user,
+        recipe=recipe,
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=1),
+    )
+
+
+def day(day_of_month, hour=12):
+    """Return an aware datetime in january 2024"""
+    return timezone.make_aware(datetime(2024, 1, day_of_month, hour))
+
+
+class EventStatsApiTests(TestCase):
+    """Test the event statistics endpoint"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@event.com',
+            password='testpass',
+            name='Test User',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.cheap = create_recipe(
+            user=self.user, price=Decimal('2.50'), time_minutes=10)
+        self.fancy = create_recipe(
+            user=self.user, price=Decimal('12.00'), time_minutes=45)
+
+    def test_stats_per_day(self):
+        """Test spend and cooking time are summed per day"""
+        create_event(self.user, self.cheap, day(1, 12))
+        create_event(self.user, self.fancy, day(1, 19))
+        create_event(self.user, self.fancy, day(3))
+
+        res = self.client.get(STATS_URL, {'period': 'day'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(res.data[0]['events'], 2)
+        self.assertEqual(res.data[0]['total_price'], '14.50')
+        self.assertEqual(res.data[0]['total_time_minutes'], 55)
+        self.assertEqual(res.data[1]['total_price'], '12.00')
+
+    def test_stats_per_week_within_range(self):
+        """Test the date range limits the events aggregated"""
+        create_event(self.user, self.cheap, day(1))
+        create_event(self.user, self.cheap, day(2))
+        create_event(self.user, self.fancy, day(9))
+        create_event(self.user, self.fancy, day(20))
+
+        res = self.client.get(STATS_URL, {
+            'period': 'week',
+            'start': '2024-01-01',
+            'end': '2024-01-14',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row['total_price'] for row in res.data],
+            ['5.00', '12.00'],
+        )
+
+    def test_stats_per_tag(self):
+        """Test stats are broken down per tag"""
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.cheap.tags.add(vegan)
+        create_event(self.user, self.cheap, day(1))
+        create_event(self.user, self.fancy, day(2))
+
+        res = self.client.get(
+            STATS_URL, {'period': 'month', 'group_by': 'tag'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        by_tag = {row['tag']: row for row in res.data}
+        self.assertEqual(by_tag[vegan.id]['tag_name'], 'Vegan')
+        self.assertEqual(by_tag[vegan.id]['total_price'], '2.50')
+        self.assertEqual(by_tag[None]['total_price'], '12.00')
+
+    def test_stats_limited_to_user(self):
+        """Test stats only include events of the authenticated user"""
+        other = get_user_model().objects.create_user(
+            email='other@event.com',
+            password='testpass',
+            name='Other User',
+        )
+        create_event(other, create_recipe(user=other), day(1))
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_stats_invalid_period(self):
+        """Test an unknown period is rejected"""
+        res = self.client.get(STATS_URL, {'period': 'decade'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,24 +1,319 @@
 """ manage events in the database"""
 
-from rest_framework import viewsets
+import random
+from decimal import Decimal
+from datetime import datetime, time, timedelta
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+from drf_spectacular.utils import (
+    extend_schema_view,
+    extend_schema,
+    OpenApiParameter,
+    OpenApiTypes,
+)
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Event
+from core import changes
+from core.budgets import Budget, QueryBudgetMixin
+from core.models import Event, Recipe
 from event import serializers
+from event.planner import PlanningError, RecipeSnapshot, plan_meals
 
 
-class EventViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'start',
+                OpenApiTypes.DATE,
+                description='Only include events starting on or after',
+            ),
+            OpenApiParameter(
+                'end',
+                OpenApiTypes.DATE,
+                description='Only include events starting on or before',
+            ),
+        ]
+    )
+)
+class EventViewSet(QueryBudgetMixin, changes.NotifyDeleteMixin,
+                   viewsets.ModelViewSet):
     """Manage events in the database"""
     queryset = Event.objects.all()
     serializer_class = serializers.EventSerializer
     authentication_classes = (JWTAuthentication,)
     permission_classes = (IsAuthenticated,)
+    query_budgets = {
+        'list': Budget(queries=2, ms=500),
+        'retrieve': Budget(queries=2, ms=200),
+        'stats': Budget(queries=2, ms=500),
+        'shift': Budget(queries=2, ms=500),
+    }
+
+    def _filter_dates(self, queryset, params):
+        """Limit events to those starting within the start and end dates.
+
+        Events are partitioned by start_time, so the range also lets the
+        database skip the partitions outside of it.
+        """
+        if 'start' in params:
+            queryset = queryset.filter(start_time__gte=timezone.make_aware(
+                datetime.combine(params['start'], time.min)
+            ))
+        if 'end' in params:
+            queryset = queryset.filter(start_time__lt=timezone.make_aware(
+                datetime.combine(params['end'] + timedelta(days=1), time.min)
+            ))
+        return queryset
 
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
-        return self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'list':
+            params = serializers.EventFilterSerializer(
+                data=self.request.query_params
+            )
+            params.is_valid(raise_exception=True)
+            queryset = self._filter_dates(queryset, params.validated_data)
+
+        return queryset
+
+    def get_serializer_class(self):
+        """Return appropriate serializer class"""
+        if self.action == 'generate':
+            return serializers.MealPlanSerializer
+        elif self.action == 'stats':
+            return serializers.EventStatsSerializer
+        elif self.action == 'bulk':
+            return serializers.BulkEventSerializer
+        elif self.action == 'shift':
+            return serializers.ShiftEventsSerializer
+        elif self.action == 'copy':
+            return serializers.CopyEventsSerializer
+
+        return self.serializer_class
 
     def perform_create(self, serializer):
         """Create a new event"""
         serializer.save(user=self.request.user)
+
+    @extend_schema(responses=serializers.EventSerializer(many=True))
+    @action(methods=['POST'], detail=False, url_path='generate')
+    def generate(self, request):
+        """Fill a date range with events for recipes matching constraints"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        days = (params['end_date'] - params['start_date']).days + 1
+        slots = params['slots']
+        snapshot = RecipeSnapshot.for_user(request.user)
+        try:
+            plan = plan_meals(
+                snapshot,
+                days,
+                len(slots),
+                max_time_minutes=params.get('max_time_minutes'),
+                budget=params.get('budget'),
+                tag_ids=params['tags'],
+                no_repeat_days=params['no_repeat_days'],
+                rng=random.Random(params.get('seed')),
+            )
+        except PlanningError as exc:
+            return Response(
+                {'detail': str(exc)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        duration = timedelta(minutes=params['slot_duration'])
+        events = []
+        for day, slot, position in plan:
+            start_time = timezone.make_aware(datetime.combine(
+                params['start_date'] + timedelta(days=day),
+                slots[slot],
+            ))
+            events.append(Event(
+                user=request.user,
+                recipe_id=snapshot.ids[position],
+                title=snapshot.titles[position],
+                start_time=start_time,
+                end_time=start_time + duration,
+            ))
+        events = Event.objects.bulk_create(events)
+        # bulk_create and update send no signals.
+        changes.notify(
+            Event, request.user.id, 'created', [e.id for e in events])
+
+        return Response(
+            serializers.EventSerializer(events, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'period',
+                OpenApiTypes.STR, enum=['day', 'week', 'month'],
+                description='Length of the periods to aggregate over',
+            ),
+            OpenApiParameter(
+                'start',
+                OpenApiTypes.DATE,
+                description='Only include events starting on or after',
+            ),
+            OpenApiParameter(
+                'end',
+                OpenApiTypes.DATE,
+                description='Only include events starting on or before',
+            ),
+            OpenApiParameter(
+                'group_by',
+                OpenApiTypes.STR, enum=['tag'],
+                description='Break every period down per recipe tag',
+            ),
+        ],
+        responses=serializers.EventStatsSerializer(many=True),
+    )
+    @action(methods=['GET'], detail=False, url_path='stats')
+    def stats(self, request):
+        """Aggregate spend and cooking time of events per period"""
+        params = serializers.EventStatsQuerySerializer(
+            data=request.query_params
+        )
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        queryset = self._filter_dates(self.get_queryset(), params)
+
+        groups = ['period']
+        if params.get('group_by') == 'tag':
+            groups += ['tag', 'tag_name']
+            queryset = queryset.annotate(
+                tag=F('recipe__tags__id'),
+                tag_name=F('recipe__tags__name'),
+            )
+        rows = queryset.annotate(
+            period=Trunc('start_time', params['period']),
+        ).values(*groups).annotate(
+            events=Count('id'),
+            total_price=Coalesce(Sum('recipe__price'), Decimal('0')),
+            total_time_minutes=Coalesce(Sum('recipe__time_minutes'), 0),
+        ).order_by(*groups)
+
+        serializer = self.get_serializer(rows, many=True)
+        return Response(serializer.data)
+
+    @extend_schema(responses=serializers.EventSerializer(many=True))
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Create many events with a single insert"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['events']
+
+        recipe_ids = {item['recipe'] for item in items}
+
+        with transaction.atomic():
+            titles = dict(Recipe.objects.filter(
+                user=request.user,
+                id__in=recipe_ids,
+            ).values_list('id', 'title'))
+            unknown = recipe_ids - titles.keys()
+            if unknown:
+                return Response(
+                    {'events': [f'Unknown recipe ids: {sorted(unknown)}.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            events = Event.objects.bulk_create(
+                Event(
+                    user=request.user,
+                    recipe_id=item['recipe'],
+                    title=titles[item['recipe']],
+                    description=item['description'],
+                    start_time=item['start_time'],
+                    end_time=item['end_time'],
+                )
+                for item in items
+            )
+            changes.notify(
+                Event, request.user.id, 'created', [e.id for e in events])
+
+        return Response(
+            serializers.EventSerializer(events, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(methods=['POST'], detail=False, url_path='shift')
+    def shift(self, request):
+        """Move events by a time delta with a single update"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        delta = serializer.validated_data['delta']
+
+        # RETURNING notifies only the events moved, those of other users
+        # or unknown are skipped, still in a single query. The filter is
+        # the one of get_queryset().
+        with connections[router.db_for_write(Event)].cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {Event._meta.db_table} '
+                'SET start_time = start_time + %s, end_time = end_time + %s '
+                'WHERE user_id = %s AND id = ANY(%s) RETURNING id',
+                [delta, delta, request.user.id,
+                 serializer.validated_data['ids']],
+            )
+            updated = [row[0] for row in cursor.fetchall()]
+        changes.notify(Event, request.user.id, 'updated', updated)
+
+        return Response({'updated': len(updated)}, status=status.HTTP_200_OK)
+
+    @extend_schema(responses=serializers.EventSerializer(many=True))
+    @action(methods=['POST'], detail=False, url_path='copy')
+    def copy(self, request):
+        """Copy the events of a date range onto the following weeks"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        start = timezone.make_aware(
+            datetime.combine(params['start_date'], time.min)
+        )
+        end = timezone.make_aware(
+            datetime.combine(params['end_date'] + timedelta(days=1), time.min)
+        )
+        offsets = [
+            timedelta(weeks=week) for week in range(1, params['weeks'] + 1)
+        ]
+
+        with transaction.atomic():
+            sources = list(self.get_queryset().filter(
+                start_time__gte=start,
+                start_time__lt=end,
+            ).values('recipe_id', 'title', 'description',
+                     'start_time', 'end_time'))
+            events = Event.objects.bulk_create(
+                Event(
+                    user=request.user,
+                    recipe_id=source['recipe_id'],
+                    title=source['title'],
+                    description=source['description'],
+                    start_time=source['start_time'] + offset,
+                    end_time=source['end_time'] + offset,
+                )
+                for offset in offsets
+                for source in sources
+            )
+            changes.notify(
+                Event, request.user.id, 'created', [e.id for e in events])
+
+        return Response(
+            serializers.EventSerializer(events, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_save
 
 
 class RecipeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipe'
+
+    def ready(self):
+        from core.models import Ingredient, Recipe
+        from recipe import dedup
+
+        post_save.connect(dedup.recipe_changed, sender=Recipe)
+        m2m_changed.connect(dedup.ingredients_changed,
+                            sender=Recipe.ingredients.through)
+        post_save.connect(dedup.ingredient_changed, sender=Ingredient)
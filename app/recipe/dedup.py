@@ -0,0 +1,265 @@
+"""Near duplicate recipes.
+
+A recipe is summarized by a MinHash signature of its features, the
+trigrams of its title and the names of its ingredients: the share of
+equal values in two signatures estimates the Jaccard similarity of their
+features. Signatures are cut in BANDS bands of ROWS values, each hashed
+with the owner's id into RecipeSignature.bands. Recipes sharing a band
+hash are the candidates, grouped when their estimated similarity reaches
+RECIPE_DUPLICATE_THRESHOLD. With 32 bands of 4 values, pairs at 0.7 are
+candidates with a probability above 99.9%, pairs under 0.2 with one
+under 5%.
+
+Signatures are computed by a background task when the title or the
+ingredients of a recipe change, so listing duplicates only reads.
+`python manage.py find_duplicate_recipes` computes the missing ones.
+"""
+
+import hashlib
+import random
+import struct
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Prefetch
+
+from core.models import Ingredient, Recipe, RecipeSignature
+from core.tasks import enqueue, task
+from recipe import search
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_FORMAT = struct.Struct(f'<{NUM_PERM}I')
+# Fixed seed, stored signatures must stay comparable across processes.
+_rng = random.Random(0)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def features(title, ingredients):
+    """Return the set of features of a recipe compared by MinHash"""
+    return (
+        {f't:{gram}' for gram in search.trigrams(title)}
+        | {f'i:{" ".join(name.lower().split())}' for name in ingredients}
+    )
+
+
+def minhash(features):
+    """Return the MinHash signature of a set of features"""
+    hashes = [
+        int.from_bytes(
+            hashlib.blake2b(feature.encode(), digest_size=8).digest(),
+            'little',
+        )
+        for feature in features
+    ]
+    if not hashes:
+        return [_MAX_HASH] * NUM_PERM
+    return [
+        min(((a * value + b) % _PRIME) & _MAX_HASH for value in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_hashes(user_id, signature):
+    """Return the locality sensitive hashes of the bands of signature"""
+    packed = _FORMAT.pack(*signature)
+    size = ROWS * 4
+    hashes = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(struct.pack('<qH', user_id, band))
+        digest.update(packed[band * size:(band + 1) * size])
+        hashes.append(
+            int.from_bytes(digest.digest(), 'little', signed=True))
+    return hashes
+
+
+def similarity(left, right):
+    """Return the similarity estimated from two packed signatures"""
+    equal = sum(
+        a == b for a, b in zip(_FORMAT.unpack(left), _FORMAT.unpack(right)))
+    return equal / NUM_PERM
+
+
+def signature_of(recipe):
+    """Return the unsaved signature of a recipe and its ingredients"""
+    recipe_features = features(
+        recipe.title, [ingredient.name for ingredient in
+                       recipe.ingredients.all()])
+    values = minhash(recipe_features)
+    return RecipeSignature(
+        recipe=recipe,
+        minhash=_FORMAT.pack(*values),
+        # Recipes without features would all collide.
+        bands=band_hashes(recipe.user_id, values) if recipe_features else [],
+    )
+
+
+def _recipes_to_sign(recipes):
+    return recipes.only('id', 'user_id', 'title').prefetch_related(
+        Prefetch('ingredients', queryset=Ingredient.objects.only('name')),
+    ).order_by('id')
+
+
+def update_signatures(recipes):
+    """Compute the signatures of recipes again"""
+    recipes = list(_recipes_to_sign(
+        recipes.using(router.db_for_write(RecipeSignature))))
+    with transaction.atomic():
+        RecipeSignature.objects.filter(recipe__in=recipes).delete()
+        # Conflicts come from concurrent updates of the same recipes.
+        RecipeSignature.objects.bulk_create(
+            [signature_of(recipe) for recipe in recipes],
+            ignore_conflicts=True,
+        )
+
+
+def refresh_signatures(recipes, batch_size=500):
+    """Compute the missing signatures of recipes, return how many"""
+    # Read from the database written to, a lagging replica would return
+    # the same batch again.
+    missing = _recipes_to_sign(
+        recipes.using(router.db_for_write(RecipeSignature))
+        .filter(signature__isnull=True)
+    )
+    count, last_id = 0, 0
+    while True:
+        batch = list(missing.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return count
+        RecipeSignature.objects.bulk_create(
+            [signature_of(recipe) for recipe in batch],
+            ignore_conflicts=True,
+        )
+        count += len(batch)
+        last_id = batch[-1].id
+
+
+def duplicate_groups(user_id, threshold=None, using=DEFAULT_DB_ALIAS):
+    """Return the user's groups of duplicate recipes.
+
+    Groups are (similarity, recipe ids), most similar first, similarity
+    being the lowest of the pairs joining the group. Only recipes with a
+    signature are compared.
+    """
+    if threshold is None:
+        threshold = settings.RECIPE_DUPLICATE_THRESHOLD
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT array_agg(s.recipe_id ORDER BY s.recipe_id) '
+            f'FROM {RecipeSignature._meta.db_table} AS s '
+            f'JOIN {Recipe._meta.db_table} AS r ON r.id = s.recipe_id '
+            'CROSS JOIN LATERAL unnest(s.bands) AS band '
+            'WHERE r.user_id = %s '
+            'GROUP BY band HAVING count(*) > 1',
+            [user_id],
+        )
+        buckets = [row[0] for row in cursor.fetchall()]
+    if not buckets:
+        return []
+    minhashes = {
+        recipe_id: bytes(minhash)
+        for recipe_id, minhash in RecipeSignature.objects.using(using)
+        .filter(recipe_id__in={pk for bucket in buckets for pk in bucket})
+        .values_list('recipe_id', 'minhash')
+    }
+
+    # Union-find over the recipes, each member of a bucket is compared
+    # with its first one only: k copies cost k comparisons, not k².
+    parent = {pk: pk for pk in minhashes}
+    lowest = {}
+
+    def find(pk):
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    for first, *others in buckets:
+        for other in others:
+            root, other_root = find(first), find(other)
+            if root == other_root:
+                continue
+            score = similarity(minhashes[first], minhashes[other])
+            if score >= threshold:
+                parent[other_root] = root
+                lowest[root] = min(
+                    score, lowest.get(root, 1.0), lowest.pop(other_root, 1.0))
+
+    groups = {}
+    for pk in sorted(minhashes):
+        groups.setdefault(find(pk), []).append(pk)
+    return sorted(
+        ((lowest[root], ids) for root, ids in groups.items()
+         if len(ids) > 1),
+        key=lambda group: (-group[0], group[1]),
+    )
+
+
+def scan_users(user_ids, threshold=None):
+    """Return the duplicate groups of several users.
+
+    Missing signatures are computed first. Groups are (user id,
+    similarity, recipe ids).
+    """
+    results = []
+    for user_id in user_ids:
+        refresh_signatures(Recipe.objects.filter(user_id=user_id))
+        results += [
+            (user_id, score, ids)
+            for score, ids in duplicate_groups(user_id, threshold)
+        ]
+    return results
+
+
+@task(batch=True)
+def compute_signatures(payloads):
+    """Compute the signatures of changed recipes"""
+    update_signatures(Recipe.objects.filter(
+        id__in={pk for payload in payloads for pk in payload['recipes']}))
+    return [None] * len(payloads)
+
+
+def schedule(recipe_ids):
+    """Queue the computation of the signatures of recipes"""
+    if recipe_ids:
+        enqueue(compute_signatures, {'recipes': sorted(recipe_ids)})
+
+
+def recipe_changed(sender, instance, update_fields=None, **kwargs):
+    """Sign a recipe again when its title changes"""
+    if update_fields is None or 'title' in update_fields:
+        schedule([instance.id])
+
+
+def ingredients_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    """Sign recipes again when their ingredients change"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule([instance.id])
+    elif action in ('post_add', 'post_remove'):
+        schedule(pk_set)
+    elif action == 'pre_clear':
+        instance._cleared_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True))
+    elif action == 'post_clear':
+        schedule(instance.__dict__.pop('_cleared_recipe_ids', []))
+
+
+def ingredient_changed(sender, instance, created=False, **kwargs):
+    """Sign the recipes using a renamed ingredient again.
+
+    Deleted ingredients are not followed, a pre_delete receiver would
+    turn off fast deletes. Their recipes are signed again on their next
+    change, or by find_duplicate_recipes --rebuild.
+    """
+    if not created:
+        schedule(instance.recipe_set.values_list('id', flat=True))
@@ -0,0 +1,57 @@
+"""Autocomplete search for user owned recipe attributes"""
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+
+def recipe_count(through, field):
+    """Return an expression counting the recipes linked through a M2M"""
+    counts = through.objects.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(count=Count('*')).values('count')
+    return Coalesce(
+        Subquery(counts, output_field=IntegerField()),
+        0,
+    )
+
+
+def search(queryset, query, limit):
+    """Return the limit best matches of query among the objects.
+
+    Names starting with the query rank first, then names within a few
+    typos of it, both found through the trigram indexes. Ties are broken
+    by the number of recipes using them, which the queryset must annotate
+    as recipe_count.
+    """
+    return queryset.annotate(
+        similarity=TrigramSimilarity('name', query),
+        is_prefix=Case(
+            When(name__istartswith=query, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    ).filter(
+        Q(name__istartswith=query) | Q(name__trigram_similar=query)
+    ).order_by('-is_prefix', '-recipe_count', '-similarity', 'name')[:limit]
+
+
+def trigrams(text):
+    """Return the set of trigrams of text the way pg_trgm computes it"""
+    grams = set()
+    for word in ''.join(
+        c if c.isalnum() else ' ' for c in text.lower()
+    ).split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
@@ -1,5 +1,9 @@
 """serializers for recipe api"""
 
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
 from rest_framework import serializers
 
 from core.models import (
@@ -11,20 +15,24 @@ from core.models import (
 
 class IngredientSerializer(serializers.ModelSerializer):
     """Serializer for ingredient objects"""
+    # Only present when the queryset annotates it, not in nested recipes.
+    recipe_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Ingredient
-        fields = ('id', 'name')
-        read_only_fields = ('id',)
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
 
 
 class TagSerializer(serializers.ModelSerializer):
     """Serializer for tag objects"""
+    # Only present when the queryset annotates it, not in nested recipes.
+    recipe_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Tag
-        fields = ('id', 'name')
-        read_only_fields = ('id',)
+        fields = ('id', 'name', 'recipe_count')
+        read_only_fields = ('id', 'recipe_count')
 
 
 class RecipeSerializer(serializers.ModelSerializer):
@@ -113,3 +121,88 @@ class RecipeImageSerializer(serializers.ModelSerializer):
         fields = ('id', 'image')
         read_only_fields = ('id',)
         extra_kwargs = {'image': {'required': True}}
+
+
+class RecipeImageUploadSerializer(serializers.Serializer):
+    """Serializer for uploading an image straight to the object store"""
+    EXTENSIONS = {
+        'image/jpeg': '.jpg',
+        'image/png': '.png',
+        'image/gif': '.gif',
+        'image/webp': '.webp',
+    }
+
+    content_type = serializers.ChoiceField(
+        choices=list(EXTENSIONS), write_only=True)
+    size = serializers.IntegerField(min_value=1, write_only=True)
+    url = serializers.URLField(read_only=True)
+    method = serializers.CharField(read_only=True)
+    headers = serializers.DictField(
+        child=serializers.CharField(), read_only=True)
+    token = serializers.CharField(
+        read_only=True,
+        help_text='Pass it to image-complete once the upload is done',
+    )
+
+    def validate_size(self, value):
+        if value > settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Images are limited to {settings.IMAGE_UPLOAD_MAX_SIZE} '
+                'bytes.'
+            )
+        return value
+
+
+class RecipeImageCompleteSerializer(serializers.Serializer):
+    """Serializer for completing an image upload"""
+    SALT = 'recipe.image_upload'
+    # Uploads left unreferenced longer are removed by collect_media.
+    MAX_AGE = timedelta(hours=24)
+
+    token = serializers.CharField(write_only=True)
+
+    def validate_token(self, value):
+        try:
+            return signing.loads(value, salt=self.SALT, max_age=self.MAX_AGE)
+        except signing.BadSignature:
+            raise serializers.ValidationError(
+                'Invalid or expired upload token.')
+
+
+class RecipeDuplicatesSerializer(serializers.Serializer):
+    """Serializer for a group of recipes that look like duplicates"""
+    recipes = RecipeSerializer(many=True, read_only=True)
+    similarity = serializers.FloatField(
+        read_only=True,
+        help_text='Lowest estimated similarity of the titles and '
+                  'ingredients of the recipes linking the group, from 0 '
+                  'to 1',
+    )
+
+
+class RecipeFilterSerializer(serializers.Serializer):
+    """Serializer for the query parameters filtering the recipe list"""
+    ORDERING_FIELDS = ('id', 'title', 'time_minutes', 'price')
+
+    match = serializers.ChoiceField(choices=('any', 'all'), default='any')
+    min_time = serializers.IntegerField(min_value=0, required=False)
+    max_time = serializers.IntegerField(min_value=0, required=False)
+    min_price = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False)
+    ordering = serializers.ChoiceField(
+        choices=ORDERING_FIELDS + tuple(f'-{f}' for f in ORDERING_FIELDS),
+        default='-id',
+    )
+
+
+class AttrFilterSerializer(serializers.Serializer):
+    """Serializer for the query parameters of tags and ingredients lists"""
+    assigned_only = serializers.ChoiceField(choices=(0, 1), default=0)
+    ordering = serializers.ChoiceField(
+        choices=('name', '-name', 'recipe_count', '-recipe_count'),
+        default='-name',
+    )
+    q = serializers.CharField(required=False, max_length=255)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
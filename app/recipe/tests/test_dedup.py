@@ -0,0 +1,226 @@
+"""Tests for near duplicate recipe detection"""
+
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Job, Recipe, RecipeSignature
+from recipe import dedup
+
+DUPLICATES_URL = reverse('recipe:recipe-duplicates')
+
+PANCAKES = ['Flour', 'Milk', 'Eggs', 'Sugar', 'Butter']
+
+
+def create_user(email='user@example.com'):
+    return get_user_model().objects.create_user(
+        email=email,
+        password='testpass123',
+        name='Test User',
+    )
+
+
+def create_recipe(user, title, ingredients=()):
+    recipe = Recipe.objects.create(
+        user=user,
+        title=title,
+        time_minutes=10,
+        price=Decimal('5.25'),
+    )
+    for name in ingredients:
+        ingredient, _ = Ingredient.objects.get_or_create(user=user, name=name)
+        recipe.ingredients.add(ingredient)
+    return recipe
+
+
+class MinHashTests(SimpleTestCase):
+    """Test signatures estimate the similarity of features"""
+
+    def estimate(self, left, right):
+        return dedup.similarity(
+            dedup._FORMAT.pack(*dedup.minhash(left)),
+            dedup._FORMAT.pack(*dedup.minhash(right)),
+        )
+
+    def test_estimates_jaccard(self):
+        """Test the estimate is close to the Jaccard similarity"""
+        left = {f'feature {i}' for i in range(100)}
+        right = {f'feature {i}' for i in range(30, 130)}
+        jaccard = len(left & right) / len(left | right)
+
+        self.assertEqual(self.estimate(left, left), 1.0)
+        self.assertAlmostEqual(self.estimate(left, right), jaccard, delta=0.1)
+        self.assertLess(self.estimate(left, {'other'}), 0.1)
+
+    def test_features(self):
+        """Test titles are shingled and ingredient names normalized"""
+        features = dedup.features('Pancakes', ['Whole  Milk'])
+
+        self.assertIn('t:pan', features)
+        self.assertIn('i:whole milk', features)
+
+    def test_bands_per_user(self):
+        """Test the same signature falls in other buckets for other users"""
+        signature = dedup.minhash({'a', 'b'})
+
+        self.assertEqual(len(dedup.band_hashes(1, signature)), dedup.BANDS)
+        self.assertFalse(
+            set(dedup.band_hashes(1, signature))
+            & set(dedup.band_hashes(2, signature))
+        )
+
+
+@override_settings(TASKS_EAGER=True)
+class DuplicatesApiTests(TestCase):
+    """Test listing the duplicate recipes of a user"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_lists_near_duplicates(self):
+        """Test recipes with close titles and ingredients are grouped"""
+        first = create_recipe(self.user, 'Fluffy pancakes', PANCAKES)
+        second = create_recipe(self.user, 'Fluffy pancakes!', PANCAKES)
+        create_recipe(self.user, 'Beef stew', ['Beef', 'Carrots', 'Wine'])
+
+        res = self.client.get(DUPLICATES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data[0]['recipes']],
+            [first.id, second.id],
+        )
+        self.assertGreaterEqual(res.data[0]['similarity'], 0.7)
+        self.assertEqual(len(res.data[0]['recipes'][0]['ingredients']), 5)
+
+    def test_copies_form_one_group(self):
+        """Test several copies of a recipe are listed once, not by pairs"""
+        copies = [
+            create_recipe(self.user, 'Fluffy pancakes', PANCAKES)
+            for _ in range(5)
+        ]
+
+        res = self.client.get(DUPLICATES_URL)
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data[0]['recipes']],
+            [recipe.id for recipe in copies],
+        )
+        self.assertEqual(res.data[0]['similarity'], 1.0)
+
+    def test_read_only(self):
+        """Test listing duplicates does not compute missing signatures"""
+        with self.settings(TASKS_EAGER=False):
+            create_recipe(self.user, 'Fluffy pancakes', PANCAKES)
+            create_recipe(self.user, 'Fluffy pancakes', PANCAKES)
+
+        res = self.client.get(DUPLICATES_URL)
+
+        self.assertEqual(res.data, [])
+        self.assertFalse(RecipeSignature.objects.exists())
+
+    def test_limited_to_user(self):
+        """Test recipes of other users are never grouped"""
+        create_recipe(self.user, 'Fluffy pancakes', PANCAKES)
+        create_recipe(create_user('other@example.com'),
+                      'Fluffy pancakes', PANCAKES)
+
+        res = self.client.get(DUPLICATES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_title_change(self):
+        """Test the signature of a renamed recipe is computed again"""
+        create_recipe(self.user, 'Fluffy pancakes', PANCAKES)
+        other = create_recipe(self.user, 'Fluffy pancakes', PANCAKES)
+        self.assertEqual(len(self.client.get(DUPLICATES_URL).data), 1)
+
+        other.title = 'Savory buckwheat galettes with ham'
+        other.save()
+        other.ingredients.set(Ingredient.objects.create(
+            user=self.user, name=name) for name in ['Buckwheat', 'Ham'])
+
+        self.assertEqual(self.client.get(DUPLICATES_URL).data, [])
+
+    def test_ingredient_changes(self):
+        """Test signatures follow the ingredients of recipes"""
+        first = create_recipe(self.user, 'Pancakes', PANCAKES)
+        second = create_recipe(self.user, 'Crepes', PANCAKES)
+
+        def minhash(recipe):
+            return bytes(RecipeSignature.objects.get(recipe=recipe).minhash)
+
+        before = minhash(first), minhash(second)
+        second.ingredients.remove(second.ingredients.first())
+        self.assertEqual(minhash(first), before[0])
+        self.assertNotEqual(minhash(second), before[1])
+
+        before = minhash(first), minhash(second)
+        milk = Ingredient.objects.get(name='Milk')
+        milk.name = 'Oat milk'
+        milk.save()
+        self.assertNotEqual(minhash(first), before[0])
+        self.assertNotEqual(minhash(second), before[1])
+
+        before = minhash(first)
+        milk.recipe_set.clear()
+        self.assertNotEqual(minhash(first), before)
+
+    def test_other_fields_keep_signature(self):
+        """Test changes not affecting the features queue nothing"""
+        recipe = create_recipe(self.user, 'Pancakes', PANCAKES)
+        recipe.price = Decimal('6.00')
+
+        with self.settings(TASKS_EAGER=False):
+            recipe.save(update_fields=['price'])
+
+        self.assertFalse(Job.objects.exists())
+
+
+class FindDuplicateRecipesCommandTests(TestCase):
+    """Test scanning the whole database for duplicates"""
+
+    def test_reports_groups_of_every_user(self):
+        """Test missing signatures are computed and groups reported"""
+        for email in ('one@example.com', 'two@example.com'):
+            user = create_user(email)
+            create_recipe(user, 'Fluffy pancakes', PANCAKES)
+            create_recipe(user, 'Fluffy pancakes', PANCAKES)
+            create_recipe(user, 'Fluffy pancakes', PANCAKES)
+            create_recipe(user, 'Beef stew', ['Beef', 'Carrots'])
+        out = StringIO()
+
+        call_command('find_duplicate_recipes', '--chunk-size=1', stdout=out)
+
+        self.assertIn('Found 2 groups of duplicates among 2 users',
+                      out.getvalue())
+        self.assertEqual(RecipeSignature.objects.count(), 8)
+
+    def test_rebuild(self):
+        """Test stale signatures are only replaced with --rebuild"""
+        user = create_user()
+        create_recipe(user, 'Fluffy pancakes', PANCAKES)
+        RecipeSignature.objects.create(
+            recipe=create_recipe(user, 'Fluffy pancakes', PANCAKES),
+            minhash=dedup._FORMAT.pack(*[0] * dedup.NUM_PERM),
+            bands=[],
+        )
+        out = StringIO()
+
+        call_command('find_duplicate_recipes', stdout=out)
+        self.assertIn('Found 0 groups', out.getvalue())
+
+        call_command('find_duplicate_recipes', '--rebuild', stdout=out)
+        self.assertIn('Found 1 groups', out.getvalue())
@@ -0,0 +1,203 @@
+"""Tests for direct image uploads to the object store"""
+
+from decimal import Decimal
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.tests.s3server import S3Server
+
+
+def upload_url(recipe_id):
+    return reverse('recipe:recipe-image-upload', args=[recipe_id])
+
+
+def complete_url(recipe_id):
+    return reverse('recipe:recipe-image-complete', args=[recipe_id])
+
+
+def create_recipe(user):
+    return Recipe.objects.create(
+        user=user,
+        title='Sample recipe',
+        time_minutes=10,
+        price=Decimal('5.25'),
+    )
+
+
+class DirectImageUploadTests(TestCase):
+    """Test uploading recipe images without going through the API"""
+
+    def setUp(self):
+        self.server = S3Server().__enter__()
+        self.addCleanup(self.server.__exit__)
+        settings = override_settings(**self.server.settings())
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(self.user)
+
+    def start(self, content_type='image/png', size=5):
+        res = self.client.post(
+            upload_url(self.recipe.id),
+            {'content_type': content_type, 'size': size},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def upload(self, upload, body):
+        request = Request(upload['url'], data=body, method=upload['method'],
+                          headers=upload['headers'])
+        with urlopen(request) as response:
+            self.assertEqual(response.status, 200)
+
+    def test_upload_and_complete(self):
+        """Test the image uploaded to the presigned URL is set"""
+        upload = self.start()
+        self.upload(upload, b'image')
+
+        res = self.client.post(complete_url(self.recipe.id),
+                               {'token': upload['token']})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.image.name.startswith('uploads/recipe/'))
+        self.assertTrue(self.recipe.image.name.endswith('.png'))
+        self.assertEqual(
+            self.server.objects[self.recipe.image.name]['body'], b'image')
+        self.assertIn('image', res.data)
+
+    def test_upload_limited(self):
+        """Test only images up to IMAGE_UPLOAD_MAX_SIZE are accepted"""
+        with override_settings(IMAGE_UPLOAD_MAX_SIZE=4):
+            res = self.client.post(
+                upload_url(self.recipe.id),
+                {'content_type': 'image/png', 'size': 5},
+            )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('size', res.data)
+
+        res = self.client.post(
+            upload_url(self.recipe.id),
+            {'content_type': 'text/html', 'size': 5},
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('content_type', res.data)
+
+    def test_complete_before_upload(self):
+        """Test completing an upload that was not sent fails"""
+        upload = self.start()
+
+        res = self.client.post(complete_url(self.recipe.id),
+                               {'token': upload['token']})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_other_content(self):
+        """Test the store refuses uploads not matching the signed headers"""
+        upload = self.start()
+        upload['headers']['Content-Type'] = 'text/html'
+
+        with self.assertRaises(HTTPError):
+            self.upload(upload, b'image')
+        self.assertEqual(self.server.objects, {})
+
+    def test_complete_mismatched_type(self):
+        """Test an object of another type than requested is refused"""
+        upload = self.start()
+        self.upload(upload, b'image')
+        key = next(iter(self.server.objects))
+        self.server.objects[key]['content_type'] = 'text/html'
+
+        res = self.client.post(complete_url(self.recipe.id),
+                               {'token': upload['token']})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_complete_mismatched_size(self):
+        """Test an object of another size than requested is refused"""
+        upload = self.start(size=5)
+        self.upload(upload, b'image')
+        key = next(iter(self.server.objects))
+        self.server.objects[key]['body'] = b'larger image'
+
+        res = self.client.post(complete_url(self.recipe.id),
+                               {'token': upload['token']})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_complete_other_recipe(self):
+        """Test a token is only valid for the recipe it was issued for"""
+        upload = self.start()
+        self.upload(upload, b'image')
+        other = create_recipe(self.user)
+
+        res = self.client.post(complete_url(other.id),
+                               {'token': upload['token']})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('token', res.data)
+
+    def test_complete_forged_token(self):
+        """Test tokens not issued by image-upload are refused"""
+        res = self.client.post(complete_url(self.recipe.id),
+                               {'token': 'forged'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('token', res.data)
+
+    def test_other_user_recipe(self):
+        """Test uploads are limited to the user's recipes"""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+            name='Other User',
+        )
+        recipe = create_recipe(other)
+
+        res = self.client.post(
+            upload_url(recipe.id),
+            {'content_type': 'image/png', 'size': 5},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class LocalStorageTests(TestCase):
+    """Test direct uploads are refused without an object store"""
+
+    def test_not_available(self):
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        recipe = create_recipe(user)
+
+        res = client.post(
+            upload_url(recipe.id),
+            {'content_type': 'image/png', 'size': 5},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
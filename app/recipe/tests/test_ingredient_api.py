@@ -3,6 +3,7 @@
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db.models import Count
 from django.urls import reverse
 from django.test import TestCase
 
@@ -66,7 +67,9 @@ class PrivateIngredientsApiTests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL)
 
-        ingredients = Ingredient.objects.all().order_by("-name")
+        ingredients = Ingredient.objects.annotate(
+            recipe_count=Count("recipe"),
+        ).order_by("-name")
         serializer = IngredientSerializer(ingredients, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
@@ -122,6 +125,8 @@ class PrivateIngredientsApiTests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
 
+        ingredient1.recipe_count = 1
+        ingredient2.recipe_count = 0
         s1 = IngredientSerializer(ingredient1)
         s2 = IngredientSerializer(ingredient2)
         self.assertIn(s1.data, res.data)
@@ -151,3 +156,23 @@ class PrivateIngredientsApiTests(TestCase):
 
         res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
         self.assertEqual(len(res.data), 1)
+
+    def test_ingredients_recipe_count_assigned_only(self):
+        """ Test assigned ingredients are listed with their recipe count """
+        ingredient = Ingredient.objects.create(user=self.user, name="Eggs")
+        Ingredient.objects.create(user=self.user, name="Lentils")
+        for title in ("Omelette", "Eggs benedict"):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=5,
+                price=Decimal("10.00"),
+            )
+            recipe.ingredients.add(ingredient)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["id"], ingredient.id)
+        self.assertEqual(res.data[0]["recipe_count"], 2)
@@ -0,0 +1,106 @@
+""" tests for the query budgets of the recipe api"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Ingredient, Recipe, Tag
+from core.testing import QueryBudgetTestMixin
+from recipe import dedup
+from recipe.views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+RECIPES_URL = reverse('recipe:recipe-list')
+DUPLICATES_URL = reverse('recipe:recipe-duplicates')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class RecipeQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Test the recipe api stays within its query budgets"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+        self.client = APIClient()
+        # Authenticate with a token to count the user lookup as well.
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.recipe = self.create_recipe()
+
+    def create_recipe(self):
+        """Create a recipe with a tag and an ingredient"""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.25'),
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Salt'))
+        return recipe
+
+    def seed_recipes(self, count):
+        for _ in range(count):
+            self.create_recipe()
+
+    def seed_duplicates(self, count):
+        """Add copies of the recipe, with their signatures computed"""
+        self.seed_recipes(count)
+        dedup.update_signatures(Recipe.objects.filter(user=self.user))
+
+    def seed_recipe_attributes(self, count):
+        for i in range(count):
+            self.recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'Tag {i}'))
+            self.recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'Ing {i}'))
+
+    def test_list(self):
+        """Test listing recipes"""
+        self.assertWithinBudget(
+            RecipeViewSet, 'list',
+            lambda: self.client.get(RECIPES_URL),
+            self.seed_recipes,
+        )
+
+    def test_retrieve(self):
+        """Test retrieving a recipe with many tags and ingredients"""
+        url = reverse('recipe:recipe-detail', args=[self.recipe.id])
+        self.assertWithinBudget(
+            RecipeViewSet, 'retrieve',
+            lambda: self.client.get(url),
+            self.seed_recipe_attributes,
+        )
+
+    def test_duplicates(self):
+        """Test listing duplicates once their signatures are computed"""
+        self.assertWithinBudget(
+            RecipeViewSet, 'duplicates',
+            lambda: self.client.get(DUPLICATES_URL),
+            self.seed_duplicates,
+        )
+
+    def test_tags_list(self):
+        """Test listing tags"""
+        self.assertWithinBudget(
+            TagViewSet, 'list',
+            lambda: self.client.get(TAGS_URL),
+            self.seed_recipes,
+        )
+
+    def test_ingredients_list(self):
+        """Test listing ingredients"""
+        self.assertWithinBudget(
+            IngredientViewSet, 'list',
+            lambda: self.client.get(INGREDIENTS_URL),
+            self.seed_recipes,
+        )
@@ -453,6 +453,91 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_filter_by_all_tags(self):
+        """ test filter recipes having every requested tag"""
+        r1 = create_recipe(user=self.user, title='Vegan curry')
+        r2 = create_recipe(user=self.user, title='Vegetable soup')
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Dinner')
+        r1.tags.add(tag1, tag2)
+        r2.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'}
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data], [r1.id])
+
+    def test_filter_by_all_tags_and_ingredients(self):
+        """ test match all combines tags and ingredients"""
+        r1 = create_recipe(user=self.user, title='Cheese omelette')
+        r2 = create_recipe(user=self.user, title='Plain omelette')
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        eggs = Ingredient.objects.create(user=self.user, name='Eggs')
+        cheese = Ingredient.objects.create(user=self.user, name='Cheese')
+        r1.tags.add(tag)
+        r2.tags.add(tag)
+        r1.ingredients.add(eggs, cheese)
+        r2.ingredients.add(eggs)
+
+        params = {
+            'tags': f'{tag.id}',
+            'ingredients': f'{eggs.id},{cheese.id}',
+            'match': 'all',
+        }
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual([r['id'] for r in res.data], [r1.id])
+
+    def test_filter_by_any_tag_unique(self):
+        """ test recipes matching several tags are listed once"""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Dinner')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPE_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        self.assertEqual(len(res.data), 1)
+
+    def test_filter_by_time_and_price_range(self):
+        """ test filter recipes by time and price range"""
+        create_recipe(user=self.user, time_minutes=5, price=Decimal('2.00'))
+        r2 = create_recipe(
+            user=self.user, time_minutes=20, price=Decimal('6.00'))
+        create_recipe(user=self.user, time_minutes=25, price=Decimal('15.00'))
+        create_recipe(user=self.user, time_minutes=90, price=Decimal('7.00'))
+
+        params = {
+            'min_time': 10,
+            'max_time': 60,
+            'min_price': '5.00',
+            'max_price': '10.00',
+        }
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual([r['id'] for r in res.data], [r2.id])
+
+    def test_ordering(self):
+        """ test sorting recipes by a field"""
+        r1 = create_recipe(user=self.user, price=Decimal('9.00'))
+        r2 = create_recipe(user=self.user, price=Decimal('3.00'))
+        r3 = create_recipe(user=self.user, price=Decimal('6.00'))
+
+        res = self.client.get(RECIPE_URL, {'ordering': 'price'})
+        self.assertEqual([r['id'] for r in res.data], [r2.id, r3.id, r1.id])
+
+        res = self.client.get(RECIPE_URL, {'ordering': '-price'})
+        self.assertEqual([r['id'] for r in res.data], [r1.id, r3.id, r2.id])
+
+    def test_invalid_filter_params(self):
+        """ test invalid filter parameters return an error"""
+        for params in ({'match': 'some'}, {'max_time': 'long'},
+                       {'ordering': 'user'}):
+            res = self.client.get(RECIPE_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class imageUploadTests(TestCase):
 
@@ -0,0 +1,115 @@
+""" tests for tag and ingredient autocomplete"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Ingredient,
+    Recipe,
+    Tag,
+)
+
+
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """ Helper function to create and return a user """
+    return get_user_model().objects.create_user(
+        email=email,
+        password=password,
+        name='Test User',
+    )
+
+
+def create_recipe(user, tags=(), ingredients=()):
+    """ Create a recipe using the given tags and ingredients """
+    recipe = Recipe.objects.create(
+        user=user,
+        title='Sample recipe',
+        time_minutes=10,
+        price=Decimal('5.00'),
+    )
+    recipe.tags.add(*tags)
+    recipe.ingredients.add(*ingredients)
+    return recipe
+
+
+class TagAutocompleteApiTests(TestCase):
+    """ Test autocomplete on the tags API """
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_prefix_ordered_by_usage(self):
+        """ Test prefix matches come first, most used first """
+        dinner = Tag.objects.create(user=self.user, name='Dinner')
+        dessert = Tag.objects.create(user=self.user, name='Dessert')
+        Tag.objects.create(user=self.user, name='Breakfast')
+        create_recipe(self.user, tags=[dessert])
+        create_recipe(self.user, tags=[dessert, dinner])
+        create_recipe(self.user, tags=[dessert])
+
+        res = self.client.get(TAGS_URL, {'q': 'd'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['id'] for tag in res.data],
+            [dessert.id, dinner.id],
+        )
+
+    def test_typo_tolerant(self):
+        """ Test a misspelled query finds the tag """
+        tag = Tag.objects.create(user=self.user, name='Vegetarian')
+
+        res = self.client.get(TAGS_URL, {'q': 'vegetarain'})
+
+        self.assertEqual([t['id'] for t in res.data], [tag.id])
+
+    def test_limit_and_user(self):
+        """ Test results are limited to the user and to limit """
+        other = create_user(email='other@example.com')
+        Tag.objects.create(user=other, name='Lunch')
+        for i in range(5):
+            Tag.objects.create(user=self.user, name=f'Lunch {i}')
+
+        res = self.client.get(TAGS_URL, {'q': 'lun', 'limit': 3})
+
+        self.assertEqual(len(res.data), 3)
+        for tag in res.data:
+            self.assertTrue(
+                Tag.objects.filter(id=tag['id'], user=self.user).exists()
+            )
+
+    def test_invalid_limit(self):
+        """ Test an invalid limit is rejected """
+        res = self.client.get(TAGS_URL, {'q': 'a', 'limit': 0})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class IngredientAutocompleteApiTests(TestCase):
+    """ Test autocomplete on the ingredients API """
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_search_ingredients(self):
+        """ Test ingredients are matched by prefix """
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        Ingredient.objects.create(user=self.user, name='Pepper')
+
+        res = self.client.get(INGREDIENTS_URL, {'q': 'sa'})
+
+        self.assertEqual([i['id'] for i in res.data], [salt.id])
@@ -3,6 +3,7 @@
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db.models import Count
 from django.urls import reverse
 from django.test import TestCase
 
@@ -59,7 +60,9 @@ class PrivateTagsApiTests(TestCase):
 
         res = self.client.get(TAGS_URL)
 
-        tags = Tag.objects.all().order_by("-name")
+        tags = Tag.objects.annotate(
+            recipe_count=Count("recipe"),
+        ).order_by("-name")
         serializer = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)  # 200: OK
         self.assertEqual(res.data, serializer.data)
@@ -114,6 +117,8 @@ class PrivateTagsApiTests(TestCase):
 
         res = self.client.get(TAGS_URL, {"assigned_only": 1})
 
+        tag1.recipe_count = 1
+        tag2.recipe_count = 0
         serializer1 = TagSerializer(tag1)
         serializer2 = TagSerializer(tag2)
         self.assertIn(serializer1.data, res.data)
@@ -142,3 +147,33 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL, {"assigned_only": 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_tags_recipe_count(self):
+        """ Test tags expose the number of recipes using them """
+        tag1 = Tag.objects.create(user=self.user, name="Breakfast")
+        tag2 = Tag.objects.create(user=self.user, name="Lunch")
+        Tag.objects.create(user=self.user, name="Dinner")
+        for title in ("Pancakes", "Porridge"):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=5,
+                price=Decimal("3.00"),
+            )
+            recipe.tags.add(tag1)
+        recipe.tags.add(tag2)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, {"ordering": "-recipe_count"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tag["name"], tag["recipe_count"]) for tag in res.data],
+            [("Breakfast", 2), ("Lunch", 1), ("Dinner", 0)],
+        )
+
+    def test_invalid_ordering(self):
+        """ Test sorting by an unknown field is rejected """
+        res = self.client.get(TAGS_URL, {"ordering": "user"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,5 +1,8 @@
 """ Views for recipe api"""
 
+from django.conf import settings
+from django.core import signing
+from django.db.models import Count, Exists, OuterRef
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -16,13 +19,17 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from core.budgets import Budget, QueryBudgetMixin
+from core.changes import NotifyDeleteMixin
 from core.models import (
     Recipe,
     Tag,
-    Ingredient
+    Ingredient,
+    recipe_image_file_path,
 )
+from core.storage import S3Storage
 
-from recipe import serializers
+from recipe import dedup, search, serializers
 
 
 @extend_schema_view(
@@ -37,36 +44,121 @@ from recipe import serializers
                 'ingredients',
                 OpenApiTypes.STR,
                 description='Comma separated list of ingredient ids to filter',
-            )
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=['any', 'all'],
+                description='Require any (default) or all of the tags and '
+                            'ingredients',
+            ),
+            OpenApiParameter(
+                'min_time',
+                OpenApiTypes.INT,
+                description='Minimum preparation time in minutes',
+            ),
+            OpenApiParameter(
+                'max_time',
+                OpenApiTypes.INT,
+                description='Maximum preparation time in minutes',
+            ),
+            OpenApiParameter(
+                'min_price',
+                OpenApiTypes.DECIMAL,
+                description='Minimum price',
+            ),
+            OpenApiParameter(
+                'max_price',
+                OpenApiTypes.DECIMAL,
+                description='Maximum price',
+            ),
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR,
+                description='Field to sort by (id, title, time_minutes or '
+                            'price), prefixed with - for descending order',
+            ),
         ]
     )
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(QueryBudgetMixin, NotifyDeleteMixin,
+                    viewsets.ModelViewSet):
     """Manage recipes in the database"""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
     authentication_classes = (JWTAuthentication,)
     permission_classes = (IsAuthenticated,)
+    # The user, the recipes, then their tags and ingredients.
+    query_budgets = {
+        'list': Budget(queries=4, ms=500),
+        'retrieve': Budget(queries=4, ms=200),
+        # The user, the buckets, their signatures, then the recipes, tags
+        # and ingredients.
+        'duplicates': Budget(queries=6, ms=500),
+    }
 
     def _params_to_ints(self, qs):
         """Convert a list of string IDs to a list of integers"""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _filter_related(self, queryset, relation, ids, match_all):
+        """Filter recipes linked to any or all of ids through relation.
+
+        Any joins the M2M table and removes the duplicated recipes with
+        DISTINCT, measured faster than EXISTS or IN subqueries by
+        benchmark_recipe_filters. All counts the matches per recipe in a
+        subquery on the M2M table.
+        """
+        if not match_all:
+            return queryset.filter(**{f'{relation}__id__in': ids}).distinct()
+
+        field = Recipe._meta.get_field(relation)
+        through = field.remote_field.through
+        column = field.m2m_reverse_name()
+        matching = through.objects.filter(
+            **{f'{column}__in': ids}
+        ).values('recipe_id').annotate(
+            matched=Count(column),
+        ).filter(matched=len(set(ids))).values('recipe_id')
+        return queryset.filter(id__in=matching)
+
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related('tags', 'ingredients')
+        if self.action != 'list':
+            return queryset
+
+        params = serializers.RecipeFilterSerializer(
+            data=self.request.query_params
+        )
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+        match_all = params['match'] == 'all'
+
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_related(
+                queryset, 'tags', tag_ids, match_all,
+            )
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = self._filter_related(
+                queryset, 'ingredients', ingredient_ids, match_all,
+            )
 
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-id').distinct()
+        if 'min_time' in params:
+            queryset = queryset.filter(time_minutes__gte=params['min_time'])
+        if 'max_time' in params:
+            queryset = queryset.filter(time_minutes__lte=params['max_time'])
+        if 'min_price' in params:
+            queryset = queryset.filter(price__gte=params['min_price'])
+        if 'max_price' in params:
+            queryset = queryset.filter(price__lte=params['max_price'])
+
+        return queryset.order_by(params['ordering'], '-id')
 
     def get_serializer_class(self):
         """Return appropriate serializer class"""
@@ -74,6 +166,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return serializers.RecipeSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'image_upload':
+            return serializers.RecipeImageUploadSerializer
+        elif self.action == 'image_complete':
+            return serializers.RecipeImageCompleteSerializer
+        elif self.action == 'duplicates':
+            return serializers.RecipeDuplicatesSerializer
 
         return self.serializer_class
 
@@ -98,6 +196,105 @@ class RecipeViewSet(viewsets.ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    def _image_storage(self):
+        """Return the storage of recipe images if it takes direct uploads"""
+        storage = Recipe._meta.get_field('image').storage
+        return storage if isinstance(storage, S3Storage) else None
+
+    @action(methods=['POST'], detail=True, url_path='image-upload')
+    def image_upload(self, request, pk=None):
+        """Return a presigned URL uploading an image to the object store.
+
+        The client sends the image there with the returned method and
+        headers, then posts the token to image-complete. The image never
+        goes through the API.
+        """
+        recipe = self.get_object()
+        storage = self._image_storage()
+        if storage is None:
+            return Response(
+                {'detail': 'Direct uploads are not available, use '
+                           'upload-image.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        content_type = serializer.validated_data['content_type']
+        size = serializer.validated_data['size']
+
+        key = recipe_image_file_path(
+            recipe, 'image' + serializer.EXTENSIONS[content_type])
+        headers = {'Content-Type': content_type, 'Content-Length': str(size)}
+        return Response({
+            'url': storage.client.presign(
+                'PUT', key, settings.IMAGE_UPLOAD_EXPIRY, headers),
+            'method': 'PUT',
+            'headers': headers,
+            'token': signing.dumps(
+                {'recipe': recipe.id, 'key': key, 'size': size,
+                 'content_type': content_type},
+                salt=serializers.RecipeImageCompleteSerializer.SALT,
+            ),
+        }, status=status.HTTP_200_OK)
+
+    @extend_schema(responses=serializers.RecipeImageSerializer)
+    @action(methods=['POST'], detail=True, url_path='image-complete')
+    def image_complete(self, request, pk=None):
+        """Set the image uploaded with a token from image-upload"""
+        recipe = self.get_object()
+        storage = self._image_storage()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['token']
+        if storage is None or upload['recipe'] != recipe.id:
+            return Response(
+                {'token': ['Invalid or expired upload token.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        head = storage.client.head(upload['key'])
+        if head is None:
+            return Response(
+                {'detail': 'The image has not been uploaded.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (head['size'] != upload['size']
+                or head['content_type'] != upload['content_type']):
+            return Response(
+                {'detail': 'The uploaded image does not match the upload '
+                           'request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        recipe.image.name = upload['key']
+        recipe.save(update_fields=['image'])
+        return Response(
+            serializers.RecipeImageSerializer(
+                recipe, context=self.get_serializer_context()).data,
+            status=status.HTTP_200_OK
+        )
+
+    @action(methods=['GET'], detail=False)
+    def duplicates(self, request):
+        """List the groups of the user's recipes that look like duplicates.
+
+        Only reads, signatures are computed when recipes change.
+        """
+        recipes = self.get_queryset()
+        # The groups and the recipes must be read from the same database.
+        recipes = recipes.using(recipes.db)
+        groups = dedup.duplicate_groups(request.user.id, using=recipes.db)
+        by_id = recipes.prefetch_related('tags', 'ingredients').in_bulk(
+            [pk for _, ids in groups for pk in ids])
+        serializer = self.get_serializer([
+            {
+                'recipes': [by_id[pk] for pk in ids if pk in by_id],
+                'similarity': score,
+            }
+            for score, ids in groups
+        ], many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -107,39 +304,89 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter out by assigned to recipes only',
             ),
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR,
+                enum=['name', '-name', 'recipe_count', '-recipe_count'],
+                description='Field to sort by, prefixed with - for '
+                            'descending order (default -name)',
+            ),
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                description='Return the best prefix or typo tolerant '
+                            'matches of this text, most used first',
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Maximum number of matches returned with q '
+                            '(default 10)',
+            ),
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
+class BaseRecipeAttrViewSet(QueryBudgetMixin,
+                            NotifyDeleteMixin,
+                            mixins.DestroyModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet, ):
     """Base viewset for user owned recipe attributes"""
     authentication_classes = (JWTAuthentication,)
     permission_classes = (IsAuthenticated,)
+    query_budgets = {'list': Budget(queries=2, ms=200)}
+    # M2M table linking the attribute to recipes and its column name.
+    recipe_through = None
+    recipe_through_field = None
+
+    def _recipe_count(self):
+        """Return an expression counting the recipes using an object"""
+        return search.recipe_count(
+            self.recipe_through,
+            self.recipe_through_field,
+        )
 
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
+        queryset = self.queryset.filter(
+            user=self.request.user
+        ).annotate(recipe_count=self._recipe_count())
+        if self.action != 'list':
+            return queryset
+
+        params = serializers.AttrFilterSerializer(
+            data=self.request.query_params
         )
-        queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+        if params['assigned_only']:
+            queryset = queryset.filter(Exists(
+                self.recipe_through.objects.filter(
+                    **{self.recipe_through_field: OuterRef('pk')}
+                )
+            ))
+        if 'q' in params:
+            return search.search(
+                queryset,
+                params['q'],
+                params['limit'],
+            )
 
-        # return self.queryset.filter(user=self.request.user).order_by('-name')
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-name').distinct()
+        return queryset.order_by(params['ordering'], '-id')
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database"""
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
+    recipe_through = Recipe.tags.through
+    recipe_through_field = 'tag_id'
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredients in the database"""
     serializer_class = serializers.IngredientSerializer
     queryset = Ingredient.objects.all()
+    recipe_through = Recipe.ingredients.through
+    recipe_through_field = 'ingredient_id'
@@ -1,17 +1,76 @@
+from django.core import mail
 from djoser import email
 
+from core.tasks import enqueue, task
 
-class ActivationEmail(email.ActivationEmail):
+
+@task(batch=True)
+def send_emails(payloads):
+    """Send queued emails reusing a single SMTP connection"""
+    try:
+        connection = mail.get_connection(fail_silently=False)
+        connection.open()
+    except Exception as error:
+        return [error] * len(payloads)
+
+    errors = []
+    try:
+        for payload in payloads:
+            message = mail.EmailMultiAlternatives(
+                subject=payload['subject'],
+                body=payload['body'],
+                from_email=payload['from_email'],
+                to=payload['to'],
+                cc=payload['cc'],
+                bcc=payload['bcc'],
+                reply_to=payload['reply_to'],
+                alternatives=[tuple(alt) for alt in payload['alternatives']],
+                connection=connection,
+            )
+            message.content_subtype = payload['content_subtype']
+            try:
+                message.send()
+            except Exception as error:
+                errors.append(error)
+            else:
+                errors.append(None)
+    finally:
+        connection.close()
+    return errors
+
+
+class QueuedEmailMixin:
+    """Render the email during the request, deliver it from the worker"""
+
+    def send(self, to, *args, **kwargs):
+        self.render()
+        enqueue(send_emails, {
+            'subject': self.subject,
+            'body': self.body,
+            'content_subtype': self.content_subtype,
+            'alternatives': [list(alt) for alt in self.alternatives],
+            'from_email': kwargs.pop('from_email', self.from_email),
+            'to': list(to),
+            'cc': kwargs.pop('cc', []),
+            'bcc': kwargs.pop('bcc', []),
+            'reply_to': kwargs.pop('reply_to', []),
+        })
+
+
+class ActivationEmail(QueuedEmailMixin, email.ActivationEmail):
     template_name = 'account/activation.html'
 
 
-class ConfirmationEmail(email.ConfirmationEmail):
+class ConfirmationEmail(QueuedEmailMixin, email.ConfirmationEmail):
     template_name = 'account/confirmation.html'
 
 
-class PasswordResetEmail(email.PasswordResetEmail):
+class PasswordResetEmail(QueuedEmailMixin, email.PasswordResetEmail):
     template_name = 'account/password_reset.html'
 
 
-class PasswordChangedConfirmationEmail(email.PasswordChangedConfirmationEmail):
+class PasswordChangedConfirmationEmail(
+    QueuedEmailMixin,
+    email.PasswordChangedConfirmationEmail,
+):
     template_name = 'account/password_changed_confirmation.html'
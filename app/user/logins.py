@@ -0,0 +1,87 @@
+"""Coalesced last_login updates.
+
+Issuing a token used to write last_login on every login, an UPDATE of a
+hot row under login bursts and mobile clients re-authenticating. Logins
+now skip the write while the stored value is less than LAST_LOGIN_WINDOW
+seconds old, and the remaining ones are buffered and written by a single
+UPDATE at most LAST_LOGIN_FLUSH_INTERVAL seconds later, or as soon as
+LAST_LOGIN_BATCH_SIZE users are waiting. last_login is then accurate to
+the sum of both settings.
+"""
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_pending = {}
+_lock = threading.Lock()
+_timer = None
+
+
+def record_login(user):
+    """Note that user logged in now"""
+    now = timezone.now()
+    window = settings.LAST_LOGIN_WINDOW
+    if user.last_login and (now - user.last_login).total_seconds() < window:
+        return
+    user.last_login = now
+
+    global _timer
+    with _lock:
+        _pending[user.pk] = now
+        full = len(_pending) >= settings.LAST_LOGIN_BATCH_SIZE
+        if not full and _timer is None:
+            _timer = threading.Timer(
+                settings.LAST_LOGIN_FLUSH_INTERVAL, _flush_in_thread)
+            _timer.daemon = True
+            _timer.start()
+    if full:
+        flush()
+
+
+def flush():
+    """Write the buffered logins, return the number of users updated"""
+    global _timer
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if not pending:
+        return 0
+
+    table = get_user_model()._meta.db_table
+    values = ', '.join(['(%s, %s::timestamptz)'] * len(pending))
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Never move last_login back, another process may be ahead.
+            cursor.execute(
+                f'UPDATE {table} AS u SET last_login = v.last_login '
+                f'FROM (VALUES {values}) AS v (id, last_login) '
+                'WHERE u.id = v.id '
+                'AND (u.last_login IS NULL OR u.last_login < v.last_login)',
+                [param for item in pending.items() for param in item],
+            )
+            return cursor.rowcount
+    except DatabaseError:
+        logger.exception('Could not update last_login of %d users',
+                         len(pending))
+        return 0
+
+
+def _flush_in_thread():
+    try:
+        flush()
+    finally:
+        connection.close()
+
+
+atexit.register(flush)
@@ -0,0 +1,152 @@
+"""Revocation of refresh tokens.
+
+Revoked token ids are kept in the RevokedToken table until the token
+expires. Every process answers checks from a Bloom filter of the table:
+a token missing from the filter is not revoked, without any query, and
+only the rare hits, revoked tokens or false positives, are confirmed by
+the database.
+
+The filter is built on the first check, rebuilt every
+REVOCATION_REBUILD_SECONDS, when expired rows are also purged, and kept
+up to date by loading the rows revoked recently whenever the generation
+counter shared in the cache changes. Each revocation increments it.
+
+The filter only serves refreshes without rotation, which write nothing.
+With rotation, revoking the rotated token already refuses reused ones.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from core.models import RevokedToken
+
+GENERATION_KEY = 'revoked-tokens:generation'
+# Rows loaded again on each sync, covering revocations committed out of
+# order.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """Set membership with false positives but no false negatives"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class RevocationStore:
+    """Revoked refresh tokens of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._built_at = 0
+        self._synced_at = None
+        self._generation = None
+
+    def _rebuild(self):
+        now = timezone.now()
+        RevokedToken.objects.filter(expires_at__lte=now).delete()
+        jtis = list(RevokedToken.objects.values_list('jti', flat=True))
+        bloom = BloomFilter(
+            max(settings.REVOCATION_BLOOM_CAPACITY, 2 * len(jtis)),
+            settings.REVOCATION_BLOOM_ERROR_RATE,
+        )
+        for jti in jtis:
+            bloom.add(jti)
+        self._filter = bloom
+        self._built_at = time.monotonic()
+        self._synced_at = now
+
+    def _sync(self):
+        generation = cache.get(GENERATION_KEY)
+        if (self._filter is None
+                or self._filter.count > self._filter.capacity
+                or time.monotonic() - self._built_at
+                > settings.REVOCATION_REBUILD_SECONDS):
+            self._rebuild()
+        elif generation != self._generation:
+            now = timezone.now()
+            for jti in RevokedToken.objects.filter(
+                revoked_at__gte=self._synced_at - SYNC_OVERLAP,
+            ).values_list('jti', flat=True):
+                self._filter.add(jti)
+            self._synced_at = now
+        self._generation = generation
+
+    def is_revoked(self, jti):
+        """Return whether the token with this id was revoked"""
+        with self._lock:
+            self._sync()
+            if jti not in self._filter:
+                return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, expires_at):
+        """Revoke the token with this id until it expires.
+
+        Return False when it was already revoked, by a concurrent request
+        reusing the same token for instance.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {RevokedToken._meta.db_table} '
+                '(jti, expires_at, revoked_at) VALUES (%s, %s, now()) '
+                'ON CONFLICT (jti) DO NOTHING RETURNING id',
+                [jti, expires_at],
+            )
+            revoked = cursor.fetchone() is not None
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+        transaction.on_commit(_bump_generation)
+        return revoked
+
+
+def _bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Start from the clock so an evicted generation is never reused.
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+
+
+store = RevocationStore()
+
+
+def revoke_token(token):
+    """Revoke a validated simplejwt token, False if it already was"""
+    return store.revoke(
+        token[api_settings.JTI_CLAIM],
+        datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc),
+    )
@@ -3,7 +3,15 @@ from djoser.serializers import (
     UserSerializer
     as BaseUserSerializer
 )
+from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
 from core.models import User
+from user.logins import record_login
+from user import revocation
 
 
 class UserCreateSerializer(UserCreateSerializer):
@@ -16,3 +24,38 @@ class CustomUserSerializer(BaseUserSerializer):
     class Meta(BaseUserSerializer.Meta):
         model = User
         fields = ('id', 'email', 'name')
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """Issue a token pair, coalescing last_login writes"""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        record_login(self.user)
+        return data
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """Refresh tokens, refusing revoked ones and revoking rotated ones"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if not api_settings.ROTATE_REFRESH_TOKENS:
+            if revocation.store.is_revoked(refresh[api_settings.JTI_CLAIM]):
+                raise InvalidToken('Token is revoked')
+            return super().validate(attrs)
+        data = super().validate(attrs)
+        # Revoking the rotated token fails when it was already revoked,
+        # by an earlier refresh, a logout or a concurrent request.
+        if not revocation.revoke_token(refresh):
+            raise InvalidToken('Token is revoked')
+        return data
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    """Revoke a refresh token, when logging out"""
+    refresh = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        revocation.revoke_token(RefreshToken(attrs['refresh']))
+        return {}
@@ -0,0 +1,73 @@
+"""Background tasks of the user app"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from core import changes
+from core.models import Event, EventArchive, Ingredient, Recipe, Tag
+from core.tasks import report_progress, task
+
+# Models whose deletions are sent to core.changes.
+NOTIFIED_MODELS = (Event, Recipe, Tag, Ingredient)
+
+
+def deletion_steps(user_id):
+    """Return (name, queryset) of the user's rows, in deletion order.
+
+    Children come before their parents so each batch only deletes the rows
+    it selected, without cascading into an unbounded number of others.
+    """
+    return [
+        ('events', Event.objects.filter(user_id=user_id)),
+        ('archived_events', EventArchive.objects.filter(user_id=user_id)),
+        ('recipe_tags', Recipe.tags.through.objects.filter(
+            recipe__user_id=user_id)),
+        ('recipe_ingredients', Recipe.ingredients.through.objects.filter(
+            recipe__user_id=user_id)),
+        ('recipes', Recipe.objects.filter(user_id=user_id)),
+        ('tags', Tag.objects.filter(user_id=user_id)),
+        ('ingredients', Ingredient.objects.filter(user_id=user_id)),
+    ]
+
+
+def delete_batch(queryset, size, user_id):
+    """Delete up to size rows of queryset in a short transaction.
+
+    The batch is notified as a whole, the models send no delete signals.
+    """
+    with transaction.atomic():
+        ids = list(queryset.values_list('pk', flat=True)[:size])
+        if not ids:
+            return 0
+        queryset.model.objects.filter(pk__in=ids).delete()
+        if queryset.model in NOTIFIED_MODELS:
+            changes.notify(queryset.model, user_id, 'deleted', ids)
+    return len(ids)
+
+
+@task(bind=True)
+def delete_user(job, payload):
+    """Delete a deactivated user and their data in small batches"""
+    user_id = payload['user_id']
+    users = get_user_model().objects.filter(id=user_id, is_active=False)
+    if not users.exists():
+        # Reactivated, or already deleted.
+        return
+
+    size = settings.USER_DELETION_BATCH_SIZE
+    progress = {'step': None, 'deleted': {}}
+    for name, queryset in deletion_steps(user_id):
+        progress['step'] = name
+        deleted = progress['deleted'].setdefault(name, 0)
+        while True:
+            count = delete_batch(queryset, size, user_id)
+            if not count:
+                break
+            deleted += count
+            progress['deleted'][name] = deleted
+            report_progress(job, progress)
+
+    users.delete()
+    progress['step'] = 'done'
+    report_progress(job, progress)
@@ -0,0 +1,143 @@
+"""Tests for the background deletion of accounts"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models.deletion import Collector
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import changes, tasks
+from core.models import Event, Ingredient, Job, Recipe, Tag
+
+ME_URL = reverse('user:user-me')
+
+
+def create_user(email):
+    return get_user_model().objects.create_user(
+        email=email,
+        password='testpass123',
+        name='Test User',
+    )
+
+
+@override_settings(TASKS_EAGER=False, USER_DELETION_BATCH_SIZE=2)
+class UserDeletionTests(TestCase):
+    """Test deleting an account"""
+
+    def setUp(self):
+        self.user = create_user('user@example.com')
+        self.other = create_user('other@example.com')
+        for owner in (self.user, self.other):
+            tags = [Tag.objects.create(user=owner, name=f'Tag {i}')
+                    for i in range(3)]
+            ingredient = Ingredient.objects.create(user=owner, name='Salt')
+            for i in range(5):
+                recipe = Recipe.objects.create(
+                    user=owner,
+                    title=f'Recipe {i}',
+                    time_minutes=10,
+                    price=Decimal('5.00'),
+                )
+                recipe.tags.add(*tags)
+                recipe.ingredients.add(ingredient)
+                Event.objects.create(
+                    user=owner,
+                    recipe=recipe,
+                    start_time=timezone.now(),
+                    end_time=timezone.now() + timedelta(hours=1),
+                )
+        # Only the deletion jobs are checked, not the recipe signatures.
+        Job.objects.all().delete()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_delete_deactivates_then_deletes(self):
+        """Test the account is deactivated and deleted by the worker"""
+        res = self.client.delete(
+            ME_URL, {'current_password': 'testpass123'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 5)
+
+        tasks.run_pending()
+
+        self.assertFalse(
+            get_user_model().objects.filter(id=self.user.id).exists())
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.progress['step'], 'done')
+        self.assertEqual(job.progress['deleted'], {
+            'events': 5,
+            'archived_events': 0,
+            'recipe_tags': 15,
+            'recipe_ingredients': 5,
+            'recipes': 5,
+            'tags': 3,
+            'ingredients': 1,
+        })
+        self.assertEqual(Recipe.objects.filter(user=self.other).count(), 5)
+        self.assertEqual(Event.objects.filter(user=self.other).count(), 5)
+        self.assertEqual(
+            Recipe.tags.through.objects.filter(
+                recipe__user=self.other).count(),
+            15,
+        )
+
+    def test_deletions_notified_per_batch(self):
+        """Test each batch is deleted in one query and notified once"""
+        self.assertTrue(
+            Collector('default').can_fast_delete(Event.objects.all()))
+        sent = []
+
+        def receiver(sender, user_id, action, ids, **kwargs):
+            sent.append((sender, user_id, action, len(ids)))
+
+        changes.data_changed.connect(receiver)
+        self.addCleanup(changes.data_changed.disconnect, receiver)
+        self.client.delete(
+            ME_URL, {'current_password': 'testpass123'}, format='json')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks.run_pending()
+
+        self.assertEqual(sent, [
+            (Event, self.user.id, 'deleted', 2),
+            (Event, self.user.id, 'deleted', 2),
+            (Event, self.user.id, 'deleted', 1),
+            (Recipe, self.user.id, 'deleted', 2),
+            (Recipe, self.user.id, 'deleted', 2),
+            (Recipe, self.user.id, 'deleted', 1),
+            (Tag, self.user.id, 'deleted', 2),
+            (Tag, self.user.id, 'deleted', 1),
+            (Ingredient, self.user.id, 'deleted', 1),
+        ])
+
+    def test_wrong_password(self):
+        """Test nothing is queued without the current password"""
+        res = self.client.delete(
+            ME_URL, {'current_password': 'wrong'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Job.objects.exists())
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+
+    def test_reactivated_user_kept(self):
+        """Test a user reactivated before the job runs is not deleted"""
+        self.client.delete(
+            ME_URL, {'current_password': 'testpass123'}, format='json')
+        get_user_model().objects.filter(id=self.user.id).update(
+            is_active=True)
+
+        tasks.run_pending()
+
+        self.assertTrue(
+            get_user_model().objects.filter(id=self.user.id).exists())
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 5)
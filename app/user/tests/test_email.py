@@ -0,0 +1,68 @@
+"""Tests for the queued account emails"""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+
+from core import tasks
+from core.models import Job
+from user.email import ActivationEmail
+
+
+@override_settings(TASKS_EAGER=False)
+class QueuedEmailTests(TestCase):
+    """Test emails are delivered by the worker"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+
+    def send_activation(self, to):
+        ActivationEmail(context={'user': self.user}).send([to])
+
+    def test_send_queues_job(self):
+        """Test sending renders the email and queues its delivery"""
+        self.send_activation(self.user.email)
+
+        self.assertEqual(len(mail.outbox), 0)
+        job = Job.objects.get()
+        self.assertEqual(job.payload['to'], [self.user.email])
+        self.assertTrue(job.payload['subject'])
+
+    def test_worker_delivers_batch(self):
+        """Test queued emails are sent over a single connection"""
+        self.send_activation('first@example.com')
+        self.send_activation('second@example.com')
+
+        with patch('user.email.mail.get_connection',
+                   wraps=mail.get_connection) as get_connection:
+            tasks.run_pending()
+
+        get_connection.assert_called_once()
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['first@example.com'], ['second@example.com']],
+        )
+        self.assertEqual(
+            mail.outbox[0].subject,
+            Job.objects.first().payload['subject'],
+        )
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
+
+    def test_delivery_failure_retried(self):
+        """Test an unreachable mail server leaves the job queued"""
+        self.send_activation(self.user.email)
+
+        with patch('user.email.mail.get_connection',
+                   side_effect=ConnectionRefusedError), \
+                self.assertLogs('core.tasks', 'WARNING'):
+            tasks.run_pending()
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
@@ -0,0 +1,92 @@
+""" tests for coalescing last_login writes"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user import logins
+
+TOKEN_URL = reverse('user:jwt-create')
+
+
+def create_user(email='user@example.com', last_login=None):
+    """Create and return a new user"""
+    user = get_user_model().objects.create_user(
+        email=email,
+        password='testpass123',
+        name='Test User',
+    )
+    if last_login is not None:
+        user.last_login = last_login
+        user.save(update_fields=['last_login'])
+    return user
+
+
+@override_settings(LAST_LOGIN_FLUSH_INTERVAL=3600)
+class LastLoginTests(TestCase):
+    """Test last_login updates on token issuance"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.addCleanup(logins.flush)
+
+    def login(self, user):
+        return self.client.post(TOKEN_URL, {
+            'email': user.email,
+            'password': 'testpass123',
+        })
+
+    def test_login_buffered(self):
+        """Test last_login is written when the buffer is flushed"""
+        user = create_user()
+
+        res = self.login(user)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertIsNone(user.last_login)
+        self.assertEqual(logins.flush(), 1)
+        user.refresh_from_db()
+        self.assertIsNotNone(user.last_login)
+
+    def test_recent_login_read_only(self):
+        """Test logging in again within the window writes nothing"""
+        user = create_user(last_login=timezone.now() - timedelta(seconds=5))
+
+        with self.assertNumQueries(1):
+            self.login(user)
+
+        self.assertEqual(logins._pending, {})
+
+    @override_settings(LAST_LOGIN_BATCH_SIZE=2)
+    def test_batch_flushed_in_one_query(self):
+        """Test a full buffer is written by a single update"""
+        users = [create_user(f'user{i}@example.com') for i in range(2)]
+        self.login(users[0])
+
+        with patch('user.logins.flush', wraps=logins.flush) as flush:
+            self.login(users[1])
+
+        flush.assert_called_once()
+        self.assertEqual(
+            get_user_model().objects.filter(last_login__isnull=False).count(),
+            2,
+        )
+
+    def test_newer_value_kept(self):
+        """Test a flush never moves last_login back"""
+        user = create_user()
+        self.login(user)
+        later = timezone.now() + timedelta(minutes=1)
+        get_user_model().objects.filter(id=user.id).update(last_login=later)
+
+        self.assertEqual(logins.flush(), 0)
+        user.refresh_from_db()
+        self.assertEqual(user.last_login, later)
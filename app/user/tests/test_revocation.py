@@ -0,0 +1,127 @@
+""" tests for revoking refresh tokens"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.models import RevokedToken
+from user.revocation import BloomFilter, RevocationStore
+
+REFRESH_URL = reverse('user:jwt-refresh')
+REVOKE_URL = reverse('user:jwt-revoke')
+
+
+class BloomFilterTests(SimpleTestCase):
+    """Test the membership filter"""
+
+    def test_no_false_negatives(self):
+        """Test every added key is found"""
+        bloom = BloomFilter(1000, 0.01)
+        keys = [f'key-{i}' for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        self.assertTrue(all(key in bloom for key in keys))
+
+    def test_error_rate(self):
+        """Test false positives stay close to the requested rate"""
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f'key-{i}')
+
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+
+        self.assertLess(false_positives, 300)
+
+
+class RevocationTests(TestCase):
+    """Test refusing revoked refresh tokens"""
+
+    def setUp(self):
+        cache.clear()
+        self.store = RevocationStore()
+        patcher = patch('user.revocation.store', self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test User',
+        )
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post(REFRESH_URL, {'refresh': str(token)})
+
+    def test_rotated_token_revoked(self):
+        """Test a refresh token cannot be used twice"""
+        token = RefreshToken.for_user(self.user)
+
+        res = self.refresh(token)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        rotated = res.data['refresh']
+
+        res = self.refresh(token)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        res = self.refresh(rotated)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_check_without_query(self):
+        """Test checking a token missing from the filter runs no query"""
+        self.store.is_revoked('warm-up')
+
+        with self.assertNumQueries(0):
+            self.assertFalse(self.store.is_revoked('unknown'))
+
+    def test_revocations_synced(self):
+        """Test revocations by another process reach the filter"""
+        self.store.is_revoked('warm-up')
+        other = RevocationStore()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.revoke('abc', timezone.now() + timedelta(days=1))
+
+        self.assertTrue(self.store.is_revoked('abc'))
+
+    def test_rebuild_purges_expired(self):
+        """Test expired revocations are deleted on rebuild"""
+        RevokedToken.objects.create(
+            jti='expired', expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertFalse(self.store.is_revoked('expired'))
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_revoke(self):
+        """Test revoking a token on logout"""
+        token = RefreshToken.for_user(self.user)
+
+        res = self.client.post(REVOKE_URL, {'refresh': str(token)})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoked_without_rotation(self):
+        """Test the filter refuses revoked tokens when none are rotated"""
+        token = RefreshToken.for_user(self.user)
+        revoked = RefreshToken.for_user(self.user)
+        self.client.post(REVOKE_URL, {'refresh': str(revoked)})
+
+        with patch.object(api_settings, 'ROTATE_REFRESH_TOKENS', False):
+            self.assertEqual(
+                self.refresh(token).status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                self.refresh(revoked).status_code,
+                status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(RevokedToken.objects.count(), 1)
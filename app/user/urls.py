@@ -1,10 +1,24 @@
 """Urls mapping for user api."""
 
-from django.urls import path, include
+from django.urls import path, re_path, include
+from rest_framework.routers import DefaultRouter
+
+from user import views
 
 app_name = "user"
 
+router = DefaultRouter()
+router.register('users', views.UserViewSet)
+
+# Same routes as djoser.urls and djoser.urls.jwt, using throttled views.
 urlpatterns = [
-    path('auth/', include('djoser.urls')),
-    path('auth/', include('djoser.urls.jwt')),
+    path('auth/', include(router.urls)),
+    re_path(r'^auth/jwt/create/?', views.TokenObtainPairView.as_view(),
+            name='jwt-create'),
+    re_path(r'^auth/jwt/refresh/?', views.TokenRefreshView.as_view(),
+            name='jwt-refresh'),
+    re_path(r'^auth/jwt/verify/?', views.TokenVerifyView.as_view(),
+            name='jwt-verify'),
+    re_path(r'^auth/jwt/revoke/?', views.TokenRevokeView.as_view(),
+            name='jwt-revoke'),
 ]
@@ -0,0 +1,58 @@
+"""Views for the user API, extending the djoser and simplejwt views."""
+
+from djoser import views as djoser_views
+from rest_framework_simplejwt import views as jwt_views
+
+from core.tasks import enqueue
+from user.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+    TokenRevokeSerializer,
+)
+from user.tasks import delete_user
+
+# Actions sending emails or checking credentials, rate limited per client
+# under the 'auth' scope.
+AUTH_ACTIONS = {
+    'create',
+    'activation',
+    'resend_activation',
+    'set_password',
+    'reset_password',
+    'reset_password_confirm',
+}
+
+
+class UserViewSet(djoser_views.UserViewSet):
+    """Djoser user endpoints, throttled and deleting in the background"""
+
+    @property
+    def throttle_scope(self):
+        if self.action in AUTH_ACTIONS:
+            return 'auth'
+        return None
+
+    def perform_destroy(self, instance):
+        """Deactivate the account now, delete its data in the background"""
+        instance.is_active = False
+        instance.save(update_fields=['is_active'])
+        enqueue(delete_user, {'user_id': instance.id})
+
+
+class TokenObtainPairView(jwt_views.TokenObtainPairView):
+    serializer_class = TokenObtainPairSerializer
+    throttle_scope = 'auth'
+
+
+class TokenRefreshView(jwt_views.TokenRefreshView):
+    serializer_class = TokenRefreshSerializer
+    throttle_scope = 'auth'
+
+
+class TokenRevokeView(jwt_views.TokenViewBase):
+    serializer_class = TokenRevokeSerializer
+    throttle_scope = 'auth'
+
+
+class TokenVerifyView(jwt_views.TokenVerifyView):
+    throttle_scope = 'auth'